@@ -1,23 +1,46 @@
 from __future__ import annotations
 
-import json
 import os
 import subprocess
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List
 
+import dateparser
 import typer
 from tabulate import tabulate
 
+from s2s.execute import DeadlineIndex, export_formats
+from s2s.extract import extraction_mode_kwargs
+from s2s.generation_cache import GenerationCache
 from s2s.ingest import Document
-from s2s.ingest.pdf_reader import read_pdf
-from s2s.ingest.html_reader import read_html_or_text
-from s2s.rag import RAGIndex
-from s2s.extract import AssignmentExtractor
-from s2s.plan import TaskPlanner
-from s2s.execute import schedule_tasks, write_calendar_ics, write_tasks_csv, write_sqlite
-from s2s.schemas import AssignmentRecord, Task
-from s2s.utils import ensure_dir, log_interaction, read_jsonl, write_jsonl
+from s2s.ingest.loader import discover_sources
+from s2s.ingest.store import DocumentWriter, read_documents
+from s2s.rag import EmbeddingOptions, RAGIndex
+from s2s.rag.scope import SCOPE_TOP_K
+from s2s.pipeline import (
+    BatchRunner,
+    PipelineOrchestrator,
+    ProjectWatcher,
+    WatchEvent,
+    load_manifest,
+    make_watcher,
+    write_summary,
+)
+from s2s.pipeline.artifacts import load_assignments, plan_rows, project_paths, write_assignments, write_plan
+from s2s.pipeline.cache import StageCache
+from s2s.pipeline.stages import (
+    export_outputs,
+    extract_documents,
+    extract_scoped_documents,
+    index_documents,
+    ingest_document,
+    plan_assignments,
+    update_deadline_index,
+)
+from s2s.utils import log_interaction
 
 app = typer.Typer(help="Syllabus-to-Schedule Agent CLI.")
 
@@ -26,106 +49,437 @@ def _project_name(project: str | None) -> str:
     return project or os.getenv("S2S_PROJECT_NAME", "default")
 
 
-def _data_dir() -> Path:
-    return Path(os.getenv("S2S_DATA_DIR", "data"))
+FORCE_OPTION = typer.Option(False, "--force", help="Ignore the stage cache and recompute everything.")
+GENERATION_CACHE_OPTION = typer.Option(
+    True, "--generation-cache/--no-generation-cache", help="Reuse memoized model generations."
+)
+CLEAR_GENERATION_CACHE_OPTION = typer.Option(
+    False, "--clear-generation-cache", help="Drop memoized model generations before running."
+)
+EXTRACTOR_OPTION = typer.Option(
+    "rules", "--extractor", help="rules, model, or cascade (rules first; the model re-reads low-confidence sections)."
+)
+CPU_OPTIMIZED_OPTION = typer.Option(
+    False, "--cpu-optimized", help="Merge the LoRA adapter into the model and decode greedily (model/cascade)."
+)
+INT8_OPTION = typer.Option(False, "--int8", help="Dynamically quantize the extractor model to int8 on CPU.")
+THREADS_OPTION = typer.Option(
+    None, "--threads", help="Torch threads for the extractor (default: S2S_EXTRACTOR_THREADS)."
+)
+CONSTRAINED_OPTION = typer.Option(False, "--constrained", help="Constrain model output to the assignment JSON schema.")
+FORMAT_OPTION = typer.Option(
+    None,
+    "--format",
+    help="Export format, repeatable: ics, csv, sqlite, jsonl, markdown or a plugin "
+    "(default: S2S_EXPORT_FORMATS, else ics, csv and sqlite).",
+)
+VECTOR_BACKEND_OPTION = typer.Option(
+    None, "--vector-backend", help="chroma or numpy (default: S2S_VECTOR_BACKEND, else chroma)."
+)
 
 
 def _project_paths(project: str) -> Dict[str, Path]:
-    base = _data_dir()
-    processed = ensure_dir(base / "processed")
-    out_dir = ensure_dir(Path("out"))
-    return {
-        "documents": processed / f"{project}_documents.jsonl",
-        "assignments": out_dir / f"{project}_assignments.json",
-        "plan": out_dir / f"{project}_plan.json",
-        "ics": out_dir / "calendar.ics",
-        "csv": out_dir / "tasks.csv",
-        "sqlite": out_dir / "tasks.db",
-    }
+    return project_paths(project)
+
+
+def _stage_cache(paths: Dict[str, Path], force: bool) -> StageCache:
+    return StageCache.for_project(paths, enabled=not force)
+
+
+def _extractor_kwargs(
+    mode: str,
+    generation_cache: bool,
+    cpu_optimized: bool = False,
+    int8: bool = False,
+    threads: int | None = None,
+    constrained: bool = False,
+) -> Dict[str, Any]:
+    try:
+        kwargs = extraction_mode_kwargs(mode)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    kwargs = dict(kwargs, generation_cache=generation_cache)
+    # Only options that are switched on go in, so the extract stage fingerprint
+    # of a default run stays the same.
+    options = {"optimize_cpu": cpu_optimized, "quantize_int8": int8, "num_threads": threads, "constrained": constrained}
+    kwargs.update({name: value for name, value in options.items() if value})
+    return kwargs
+
+
+def _export_formats(formats: List[str] | None) -> List[str]:
+    try:
+        return export_formats(formats)
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+
+
+def _clear_generation_cache(clear: bool) -> None:
+    if clear:
+        removed = GenerationCache.shared().clear()
+        typer.echo(f"Cleared {removed} cached generations.")
+
+
+def _echo_generation_cache() -> None:
+    report = GenerationCache.report()
+    if report:
+        typer.echo(report.capitalize() + ".")
 
 
 @app.command()
-def ingest(path: Path, project: str = typer.Option(None, "--project", "-p")) -> None:
+def ingest(path: Path, project: str = typer.Option(None, "--project", "-p"), force: bool = FORCE_OPTION) -> None:
     """Ingest PDFs and HTML/txt files into normalized documents."""
     project = _project_name(project)
-    docs: List[Document] = []
-    for file_path in sorted(path.rglob("*")):
-        if not file_path.is_file():
-            continue
-        suffix = file_path.suffix.lower()
-        if suffix == ".pdf":
-            doc = read_pdf(file_path)
-        elif suffix in {".html", ".htm", ".txt"}:
-            doc = read_html_or_text(file_path)
-        else:
-            continue
-        docs.append(doc)
     paths = _project_paths(project)
-    write_jsonl(paths["documents"], [d.to_dict() for d in docs])
+    cache = _stage_cache(paths, force)
+    previous: Dict[str, Document] = {}
+    if cache.enabled:
+        previous = {doc.path: doc for doc in read_documents(paths["documents"])}
+    sources = discover_sources(path)
+    docs: List[Document] = []
+    with DocumentWriter(paths["documents"]) as writer:
+        for file_path in sources:
+            doc = ingest_document(file_path, cache, previous)
+            if doc is not None:
+                docs.append(writer.add(doc))
+    cache.prune("ingest", [str(file_path) for file_path in sources])
+    cache.save()
     log_interaction("cli_ingest", str(path), f"stored {len(docs)} documents", {"project": project})
-    typer.echo(f"Ingested {len(docs)} documents for project '{project}'.")
+    typer.echo(f"Ingested {len(docs)} documents for project '{project}' ({cache.summary('ingest')}).")
 
 
 @app.command()
-def index(project: str = typer.Option(None, "--project", "-p")) -> None:
-    """Index ingested documents into Chroma."""
+def index(
+    project: str = typer.Option(None, "--project", "-p"),
+    force: bool = FORCE_OPTION,
+    shard_by: str = typer.Option(None, "--shard-by", help="Split the index into one collection per course."),
+    reset: bool = typer.Option(False, "--reset", help="Drop the project's collections before indexing."),
+    compact: bool = typer.Option(False, "--compact", help="Rebuild collections to reclaim deleted chunks."),
+    vector_backend: str = VECTOR_BACKEND_OPTION,
+    quantize: str = typer.Option(
+        None, "--quantize", help="float32, int8 or binary storage (numpy backend; default S2S_VECTOR_QUANTIZATION)."
+    ),
+    embed_runtime: str = typer.Option(None, "--embed-runtime", help="torch or onnx (default S2S_EMBED_RUNTIME)."),
+    embed_batch_size: int = typer.Option(None, "--embed-batch-size", help="Chunks per embedding batch."),
+    embed_threads: int = typer.Option(None, "--embed-threads", help="Threads for the embedding runtime."),
+) -> None:
+    """Index ingested documents into the vector store."""
     project = _project_name(project)
     paths = _project_paths(project)
-    docs = [Document.from_dict(d) for d in read_jsonl(paths["documents"])]
+    docs = read_documents(paths["documents"])
     if not docs:
         raise typer.BadParameter("No documents found. Run ingest first.")
-    rag_index = RAGIndex(project=project)
-    chunks = rag_index.ingest_documents(docs)
-    typer.echo(f"Indexed {chunks} chunks for project '{project}'.")
+    cache = _stage_cache(paths, force)
+    embedding = EmbeddingOptions.from_env()
+    overrides = {"runtime": embed_runtime, "batch_size": embed_batch_size, "num_threads": embed_threads}
+    embedding = replace(embedding, **{name: value for name, value in overrides.items() if value is not None})
+    try:
+        rag_index = RAGIndex(
+            project=project, shard_by=shard_by, backend=vector_backend, quantization=quantize, embedding=embedding
+        )
+    except (FileNotFoundError, ValueError) as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    if reset:
+        rag_index.reset()
+    chunks = index_documents(rag_index, docs, cache)
+    if compact:
+        typer.echo(f"Compacted index to {rag_index.compact()} chunks.")
+    cache.save()
+    typer.echo(f"Indexed {chunks} chunks for project '{project}' ({cache.summary('index')}).")
+    if chunks:
+        typer.echo(f"Embedded {rag_index.embedder.chunks_per_second():.1f} chunks/s ({embedding.runtime}).")
 
 
 @app.command()
-def extract(project: str = typer.Option(None, "--project", "-p")) -> None:
+def extract(
+    project: str = typer.Option(None, "--project", "-p"),
+    force: bool = FORCE_OPTION,
+    extractor: str = EXTRACTOR_OPTION,
+    cpu_optimized: bool = CPU_OPTIMIZED_OPTION,
+    int8: bool = INT8_OPTION,
+    threads: int = THREADS_OPTION,
+    constrained: bool = CONSTRAINED_OPTION,
+    scope: str = typer.Option(
+        "full", "--scope", help="full (every line) or retrieval (deadline chunks from the index)."
+    ),
+    top_k: int = typer.Option(SCOPE_TOP_K, "--top-k", help="Nearest chunks per document for --scope retrieval, besides keyword matches."),
+    vector_backend: str = VECTOR_BACKEND_OPTION,
+    generation_cache: bool = GENERATION_CACHE_OPTION,
+    clear_generation_cache: bool = CLEAR_GENERATION_CACHE_OPTION,
+) -> None:
     """Run the extractor over indexed documents."""
     project = _project_name(project)
+    if scope not in ("full", "retrieval"):
+        raise typer.BadParameter(f"Unknown scope '{scope}'; expected full or retrieval")
+    _clear_generation_cache(clear_generation_cache)
     paths = _project_paths(project)
-    docs = [Document.from_dict(d) for d in read_jsonl(paths["documents"])]
+    docs = read_documents(paths["documents"])
     if not docs:
         raise typer.BadParameter("No documents found. Run ingest first.")
-    extractor = AssignmentExtractor(force_rule_based=True)
-    assignments: List[Dict[str, str]] = []
-    for doc in docs:
-        records = extractor.extract_many(doc.text, doc.path)
-        for record in records:
-            assignments.append(record.dict_for_storage())
-    ensure_dir(paths["assignments"].parent)
-    paths["assignments"].write_text(json.dumps(assignments, indent=2), encoding="utf-8")
-    typer.echo(f"Extracted {len(assignments)} assignments for project '{project}'.")
+    cache = _stage_cache(paths, force)
+    extractor_kwargs = _extractor_kwargs(extractor, generation_cache, cpu_optimized, int8, threads, constrained)
+    coverage = None
+    if scope == "retrieval":
+        rag_index = RAGIndex(project=project, backend=vector_backend)
+        if not rag_index.count():
+            raise typer.BadParameter("No index found. Run index first.")
+        assignments, coverage = extract_scoped_documents(docs, extractor_kwargs, rag_index, cache, top_k=top_k)
+    else:
+        assignments = extract_documents(docs, extractor_kwargs, cache)
+    write_assignments(paths["assignments"], assignments)
+    cache.save()
+    typer.echo(f"Extracted {len(assignments)} assignments for project '{project}' ({cache.summary('extract')}).")
+    if coverage and coverage["total"]:
+        typer.echo(
+            f"Scanned {coverage['scanned']} of {coverage['total']} lines "
+            f"({coverage['scanned'] / coverage['total']:.0%}); {coverage['full_scans']} unindexed documents scanned in full."
+        )
+    _echo_generation_cache()
 
 
 @app.command()
-def plan(project: str = typer.Option(None, "--project", "-p")) -> None:
+def plan(
+    project: str = typer.Option(None, "--project", "-p"),
+    force: bool = FORCE_OPTION,
+    batch_size: int = typer.Option(None, "--batch-size", help="Prompts per planner model batch."),
+    generation_cache: bool = GENERATION_CACHE_OPTION,
+    clear_generation_cache: bool = CLEAR_GENERATION_CACHE_OPTION,
+) -> None:
     """Generate milestone plans for extracted assignments."""
     project = _project_name(project)
+    _clear_generation_cache(clear_generation_cache)
     paths = _project_paths(project)
     if not paths["assignments"].exists():
-        raise typer.BadParameter("No assignment JSON found. Run extract first.")
-    assignments = [AssignmentRecord(**item) for item in json.loads(paths["assignments"].read_text())]
-    planner = TaskPlanner()
-    plans: Dict[str, List[Dict[str, str]]] = {}
-    for idx, record in enumerate(assignments):
-        tasks = planner.plan(record)
-        key = f"{record.assignment_title}::{Path(record.source_doc).name}::{idx}"
-        plans[key] = [task.dict_for_storage() for task in tasks]
-    paths["plan"].write_text(json.dumps(plans, indent=2), encoding="utf-8")
-    typer.echo(f"Planned schedules for {len(plans)} assignments.")
+        raise typer.BadParameter("No assignments found. Run extract first.")
+    cache = _stage_cache(paths, force)
+    assignments = load_assignments(paths["assignments"])
+    planner_kwargs = {"batch_size": batch_size, "generation_cache": generation_cache}
+    plans = plan_assignments(None, assignments, cache, planner_kwargs)
+    write_plan(paths["plan"], plans, assignments)
+    update_deadline_index(project, paths, assignments, plans)
+    cache.save()
+    typer.echo(f"Planned schedules for {len(plans)} assignments ({cache.summary('plan')}).")
+    _echo_generation_cache()
 
 
 @app.command()
-def run(project: str = typer.Option(None, "--project", "-p")) -> None:
+def run(
+    project: str = typer.Option(None, "--project", "-p"),
+    source: Path = typer.Option(Path("data/raw"), "--source", help="Directory of syllabi to process."),
+    overlap: bool = typer.Option(True, "--overlap/--sequential", help="Stream documents through stages concurrently."),
+    queue_size: int = typer.Option(4, "--queue-size", help="Documents buffered between stages."),
+    workers: int = typer.Option(2, "--workers", help="Parallel readers and extractors."),
+    ingest_executor: str = typer.Option("process", "--ingest-executor", help="thread or process"),
+    extract_executor: str = typer.Option("thread", "--extract-executor", help="thread or process"),
+    force: bool = FORCE_OPTION,
+    extractor: str = EXTRACTOR_OPTION,
+    cpu_optimized: bool = CPU_OPTIMIZED_OPTION,
+    int8: bool = INT8_OPTION,
+    threads: int = THREADS_OPTION,
+    constrained: bool = CONSTRAINED_OPTION,
+    generation_cache: bool = GENERATION_CACHE_OPTION,
+    clear_generation_cache: bool = CLEAR_GENERATION_CACHE_OPTION,
+    vector_backend: str = VECTOR_BACKEND_OPTION,
+    formats: List[str] = FORMAT_OPTION,
+) -> None:
     """Run ingest->index->extract->plan->export pipeline."""
     project = _project_name(project)
-    ingest(Path("data/raw"), project=project)
-    index(project=project)
-    extract(project=project)
-    plan(project=project)
-    _export_outputs(project)
-    typer.echo("Pipeline completed.")
+    paths = _project_paths(project)
+    formats = _export_formats(formats)
+    if not overlap:
+        ingest(source, project=project, force=force)
+        index(
+            project=project,
+            force=force,
+            shard_by=None,
+            reset=False,
+            compact=False,
+            vector_backend=vector_backend,
+            quantize=None,
+            embed_runtime=None,
+            embed_batch_size=None,
+            embed_threads=None,
+        )
+        extract(
+            project=project,
+            force=force,
+            extractor=extractor,
+            cpu_optimized=cpu_optimized,
+            int8=int8,
+            threads=threads,
+            constrained=constrained,
+            scope="full",
+            top_k=SCOPE_TOP_K,
+            vector_backend=vector_backend,
+            generation_cache=generation_cache,
+            clear_generation_cache=clear_generation_cache,
+        )
+        plan(
+            project=project,
+            force=force,
+            batch_size=None,
+            generation_cache=generation_cache,
+            clear_generation_cache=False,
+        )
+        cache = _stage_cache(paths, force)
+        if not export_outputs(paths, cache, formats):
+            typer.echo("Exports are up to date.")
+        cache.save()
+        typer.echo("Pipeline completed.")
+        return
+    try:
+        orchestrator = PipelineOrchestrator(
+            project=project,
+            paths=paths,
+            source_dir=source,
+            queue_size=queue_size,
+            workers=workers,
+            ingest_executor=ingest_executor,
+            extract_executor=extract_executor,
+            extractor_kwargs=_extractor_kwargs(extractor, generation_cache, cpu_optimized, int8, threads, constrained),
+            planner_kwargs={"generation_cache": generation_cache},
+            cache=_stage_cache(paths, force),
+            rag_index_factory=lambda name: RAGIndex(project=name, backend=vector_backend),
+            formats=formats,
+        )
+    except ValueError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    _clear_generation_cache(clear_generation_cache)
+    result = orchestrator.run_sync()
+    typer.echo(
+        f"Ingested {result.documents} documents, indexed {result.chunks} chunks, "
+        f"extracted {result.assignments} assignments, planned {result.plans}."
+    )
+    reused = ", ".join(
+        f"{stage} {counts['hits']}/{counts['hits'] + counts['misses']}" for stage, counts in result.cache.items()
+    )
+    if reused:
+        typer.echo(f"Reused from stage cache: {reused}.")
+    _echo_generation_cache()
+    timings = ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in result.timings.items())
+    typer.echo(f"Pipeline completed ({timings}).")
+
+
+@app.command()
+def watch(
+    source: Path = typer.Argument(Path("data/raw"), help="Directory of syllabi and announcements to watch."),
+    project: str = typer.Option(None, "--project", "-p"),
+    backend: str = typer.Option("auto", "--backend", help="auto (watchfiles if installed), poll or watchfiles."),
+    interval: float = typer.Option(0.5, "--interval", help="Seconds between polls."),
+    debounce: float = typer.Option(1.0, "--debounce", help="Quiet seconds that end a burst of changes."),
+    workers: int = typer.Option(2, "--workers", help="Parallel readers and extractors."),
+    build_index: bool = typer.Option(True, "--index/--no-index", help="Embed changed documents into the index."),
+    max_batches: int = typer.Option(0, "--max-batches", help="Stop after this many bursts (0 = until Ctrl-C)."),
+    extractor: str = EXTRACTOR_OPTION,
+    cpu_optimized: bool = CPU_OPTIMIZED_OPTION,
+    int8: bool = INT8_OPTION,
+    threads: int = THREADS_OPTION,
+    constrained: bool = CONSTRAINED_OPTION,
+    generation_cache: bool = GENERATION_CACHE_OPTION,
+    vector_backend: str = VECTOR_BACKEND_OPTION,
+    formats: List[str] = FORMAT_OPTION,
+) -> None:
+    """Keep a project's artifacts and exports current as files in SOURCE change."""
+    project = _project_name(project)
+    formats = _export_formats(formats)
+    if not source.is_dir():
+        raise typer.BadParameter(f"Source directory not found: {source}")
+    try:
+        watcher = make_watcher(source, backend=backend, interval=interval, debounce=debounce)
+    except (ValueError, ImportError) as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    project_watcher = ProjectWatcher(
+        project=project,
+        paths=_project_paths(project),
+        source_dir=source,
+        watcher=watcher,
+        workers=workers,
+        index=build_index,
+        extractor_kwargs=_extractor_kwargs(extractor, generation_cache, cpu_optimized, int8, threads, constrained),
+        planner_kwargs={"generation_cache": generation_cache},
+        rag_index_factory=lambda name: RAGIndex(project=name, backend=vector_backend),
+        formats=formats,
+    )
+    started = time.perf_counter()
+    result = project_watcher.sync()
+    typer.echo(
+        f"Synced {result.documents} documents, {result.assignments} assignments in "
+        f"{time.perf_counter() - started:.2f}s. Watching {source} ({type(watcher).__name__})..."
+    )
+
+    def report(event: WatchEvent) -> None:
+        changes = event.changes
+        names = ", ".join(path.name for path in changes.changed + changes.removed)
+        typer.echo(
+            f"{len(changes.changed)} changed, {len(changes.removed)} removed ({names}): "
+            f"re-extracted {event.reprocessed()} documents, {event.result.assignments} assignments, "
+            f"exports {'updated' if event.result.exported else 'unchanged'}; "
+            f"calendar {event.latency:.2f}s after the change (pipeline {event.seconds:.2f}s)."
+        )
+
+    try:
+        project_watcher.run(report, max_batches=max_batches or None)
+    except KeyboardInterrupt:
+        project_watcher.close()
+        typer.echo("Stopped watching.")
+
+
+@app.command()
+def batch(
+    manifest: Path,
+    workers: int = typer.Option(4, "--workers", help="Projects processed concurrently."),
+    stage_workers: int = typer.Option(2, "--stage-workers", help="Parallel readers and extractors per project."),
+    queue_size: int = typer.Option(4, "--queue-size", help="Documents buffered between stages."),
+    ingest_executor: str = typer.Option("process", "--ingest-executor", help="thread or process"),
+    extract_executor: str = typer.Option("thread", "--extract-executor", help="thread or process"),
+    build_index: bool = typer.Option(True, "--index/--no-index", help="Embed documents into each project's index."),
+    summary: Path = typer.Option(Path("out/batch_summary.json"), "--summary", help="Where to write the summary."),
+    force: bool = FORCE_OPTION,
+    extractor: str = EXTRACTOR_OPTION,
+    cpu_optimized: bool = CPU_OPTIMIZED_OPTION,
+    int8: bool = INT8_OPTION,
+    threads: int = THREADS_OPTION,
+    constrained: bool = CONSTRAINED_OPTION,
+    generation_cache: bool = GENERATION_CACHE_OPTION,
+    clear_generation_cache: bool = CLEAR_GENERATION_CACHE_OPTION,
+    vector_backend: str = VECTOR_BACKEND_OPTION,
+    formats: List[str] = FORMAT_OPTION,
+) -> None:
+    """Run the pipeline for every project listed in a JSON/JSONL manifest."""
+    try:
+        runner = BatchRunner(
+            load_manifest(manifest),
+            workers=workers,
+            stage_workers=stage_workers,
+            queue_size=queue_size,
+            ingest_executor=ingest_executor,
+            extract_executor=extract_executor,
+            index=build_index,
+            extractor_kwargs=_extractor_kwargs(extractor, generation_cache, cpu_optimized, int8, threads, constrained),
+            planner_kwargs={"generation_cache": generation_cache},
+            force=force,
+            vector_backend=vector_backend,
+            formats=formats,
+        )
+    except (OSError, ValueError) as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    _clear_generation_cache(clear_generation_cache)
+    result = runner.run_sync()
+    write_summary(result, summary)
+    table = [
+        [item.project, item.status, item.documents, item.chunks, item.assignments, f"{item.seconds:.2f}"]
+        for item in result.projects
+    ]
+    typer.echo(tabulate(table, headers=["Project", "Status", "Docs", "Chunks", "Assignments", "Seconds"]))
+    for item in result.failed:
+        typer.echo(f"{item.project}: {item.error}")
+    totals = result.to_dict()["totals"]
+    typer.echo(
+        f"{totals['projects']} projects ({totals['failed']} failed) in {totals['wall_seconds']:.2f}s wall, "
+        f"{totals['project_seconds']:.2f}s summed. Summary written to {summary}."
+    )
+    _echo_generation_cache()
+    if result.failed:
+        raise typer.Exit(code=1)
 
 
 @app.command()
@@ -135,51 +489,67 @@ def show(project: str = typer.Option(None, "--project", "-p")) -> None:
     paths = _project_paths(project)
     if not paths["plan"].exists():
         raise typer.BadParameter("No plan available. Run plan first.")
-    assignment_items = json.loads(paths["assignments"].read_text())
-    assignments = {
-        f'{item["assignment_title"]}::{Path(item["source_doc"]).name}::{idx}': item
-        for idx, item in enumerate(assignment_items)
-    }
-    plans = json.loads(paths["plan"].read_text())
-    table = []
-    for title, tasks in plans.items():
-        record = assignments.get(title)
-        if not record:
-            continue
-        for task in tasks:
-            table.append(
-                [
-                    record.get("course", ""),
-                    record.get("assignment_title", ""),
-                    task["title"],
-                    task.get("earliest_start_iso", ""),
-                    task["due_iso"],
-                    task["hours_estimate"],
-                ]
-            )
+    rows = plan_rows(
+        paths,
+        ["course", "assignment_title"],
+        ["title", "earliest_start_iso", "due_iso", "hours_estimate"],
+    )
+    table = [
+        [
+            row["course"] or "",
+            row["assignment_title"],
+            row["title"],
+            row["earliest_start_iso"] or "",
+            row["due_iso"],
+            row["hours_estimate"],
+        ]
+        for row in rows
+    ]
     typer.echo(tabulate(table, headers=["Course", "Assignment", "Task", "Start", "Due", "Hours"]))
 
 
+def _parse_when(value: str) -> datetime:
+    parsed = dateparser.parse(value, settings={"RETURN_AS_TIMEZONE_AWARE": False})
+    if parsed is None:
+        raise typer.BadParameter(f"Could not parse date '{value}'.")
+    return parsed
+
+
+@app.command()
+def due(
+    start: str = typer.Option(None, "--from", help="Window start, e.g. 2024-03-01 or 'today'. Defaults to now."),
+    end: str = typer.Option(None, "--to", help="Window end (inclusive). Defaults to seven days after --from."),
+    course: str = typer.Option(None, "--course", help="Only this course (case-insensitive)."),
+    project: str = typer.Option(None, "--project", "-p", help="Only this project. Defaults to all projects."),
+    tasks: bool = typer.Option(True, "--tasks/--assignments-only", help="Include planned task milestones."),
+) -> None:
+    """List deadlines in a time window across every planned project."""
+    window_start = _parse_when(start) if start else datetime.now()
+    window_end = _parse_when(end) if end else window_start + timedelta(days=7)
+    if end and window_end.time() == datetime.min.time():
+        # A bare date means "through the end of that day".
+        window_end += timedelta(days=1, seconds=-1)
+    kinds = ("assignment", "task") if tasks else ("assignment",)
+    index = DeadlineIndex(project_paths(_project_name(project))["deadlines"])
+    try:
+        deadlines = index.due(window_start, window_end, course=course, project=project, kinds=kinds)
+    finally:
+        index.close()
+    if not deadlines:
+        typer.echo(f"Nothing due between {window_start:%Y-%m-%d %H:%M} and {window_end:%Y-%m-%d %H:%M}.")
+        return
+    table = [
+        [item.due_iso, item.course or "", item.assignment, item.title if item.kind == "task" else "", item.project]
+        for item in deadlines
+    ]
+    typer.echo(tabulate(table, headers=["Due", "Course", "Assignment", "Task", "Project"]))
+
+
 @app.command()
 def eval(project: str = typer.Option(None, "--project", "-p")) -> None:
     """Run evaluation script."""
     subprocess.run(["python", "training/eval_extraction.py"], check=True)
 
 
-def _export_outputs(project: str) -> None:
-    paths = _project_paths(project)
-    assignment_items = json.loads(paths["assignments"].read_text())
-    assignments = [AssignmentRecord(**item) for item in assignment_items]
-    plans_data = json.loads(paths["plan"].read_text())
-    paired: List[Tuple[AssignmentRecord, List[Task]]] = []
-    for idx, assignment in enumerate(assignments):
-        key = f"{assignment.assignment_title}::{Path(assignment.source_doc).name}::{idx}"
-        tasks = [Task(**task) for task in plans_data.get(key, [])]
-        paired.append((assignment, tasks))
-    write_calendar_ics(paired, output_dir=paths["ics"].parent, filename=paths["ics"].name)
-    write_tasks_csv(paired, output_dir=paths["csv"].parent, filename=paths["csv"].name)
-    write_sqlite(paired, output_path=paths["sqlite"])
-
-
 if __name__ == "__main__":
     app()
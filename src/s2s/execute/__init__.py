@@ -1,6 +1,37 @@
 """Execution package exports."""
 
 from .scheduler import schedule_tasks
-from .exporters import write_calendar_ics, write_tasks_csv, write_sqlite
+from .exporters import (
+    DEFAULT_EXPORT_FORMATS,
+    EXPORTERS,
+    Exporter,
+    export_formats,
+    exporter_names,
+    make_exporter,
+    register_exporter,
+    run_exporters,
+    write_calendar_ics,
+    write_tasks_csv,
+    write_sqlite,
+)
+from .text_exporters import JsonLinesExporter, MarkdownAgendaExporter
+from .deadlines import Deadline, DeadlineIndex
 
-__all__ = ["schedule_tasks", "write_calendar_ics", "write_tasks_csv", "write_sqlite"]
+__all__ = [
+    "schedule_tasks",
+    "write_calendar_ics",
+    "write_tasks_csv",
+    "write_sqlite",
+    "DEFAULT_EXPORT_FORMATS",
+    "EXPORTERS",
+    "Exporter",
+    "export_formats",
+    "exporter_names",
+    "make_exporter",
+    "register_exporter",
+    "run_exporters",
+    "JsonLinesExporter",
+    "MarkdownAgendaExporter",
+    "Deadline",
+    "DeadlineIndex",
+]
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+from s2s.schemas import AssignmentRecord, Task
+from s2s.utils import ensure_dir
+
+KINDS = ("assignment", "task")
+
+_COLUMNS = "due_key, due_iso, kind, project, course, assignment, title, start_iso, hours, source_doc"
+
+
+def default_index_path() -> Path:
+    return Path(os.getenv("S2S_DATA_DIR", "data")) / "processed" / "deadlines.sqlite"
+
+
+def due_key(value: Union[str, datetime]) -> str:
+    """Lexicographically sortable UTC timestamp; naive values are taken as already UTC."""
+    moment = value if isinstance(value, datetime) else datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.replace(microsecond=0).isoformat()
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """One assignment due date or planned task milestone."""
+
+    due_iso: str
+    kind: str
+    project: str
+    course: Optional[str]
+    assignment: str
+    title: str
+    start_iso: Optional[str] = None
+    hours: Optional[float] = None
+    source_doc: str = ""
+
+
+class DeadlineIndex:
+    """Time-sorted deadlines across every project, stored in sqlite.
+
+    Rows are keyed by a normalized ``due_key`` with B-tree indexes on
+    ``(due_key)`` and ``(course, due_key)``, so a range query costs
+    O(log n + k). Each project's rows are replaced wholesale whenever it is
+    re-planned.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = Path(path or default_index_path())
+        self._lock = threading.Lock()
+        ensure_dir(self.path.parent)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS deadlines (
+                due_key TEXT NOT NULL,
+                due_iso TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                project TEXT NOT NULL,
+                course TEXT COLLATE NOCASE,
+                assignment TEXT,
+                title TEXT,
+                start_iso TEXT,
+                hours REAL,
+                source_doc TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS deadlines_due ON deadlines (due_key)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS deadlines_course_due ON deadlines (course, due_key)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS deadlines_project ON deadlines (project)")
+        self._conn.commit()
+
+    def replace_project(self, project: str, items: Iterable[Tuple[AssignmentRecord, List[Task]]]) -> int:
+        """Swap in the deadlines of one project's assignments and their planned tasks."""
+        rows = []
+        for assignment, tasks in items:
+            rows.append(
+                self._row(project, "assignment", assignment, assignment.assignment_title, assignment.due_datetime_iso)
+            )
+            rows.extend(
+                self._row(
+                    project, "task", assignment, task.title, task.due_iso, task.earliest_start_iso, task.hours_estimate
+                )
+                for task in tasks
+            )
+        with self._lock:
+            self._conn.execute("DELETE FROM deadlines WHERE project = ?", (project,))
+            self._conn.executemany(f"INSERT INTO deadlines ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return len(rows)
+
+    def due(
+        self,
+        start: Union[str, datetime, None] = None,
+        end: Union[str, datetime, None] = None,
+        course: Optional[str] = None,
+        project: Optional[str] = None,
+        kinds: Sequence[str] = KINDS,
+        limit: Optional[int] = None,
+    ) -> List[Deadline]:
+        """Deadlines with ``start <= due <= end`` in due order; open bounds are unbounded."""
+        clauses = []
+        params: List[object] = []
+        if start is not None:
+            clauses.append("due_key >= ?")
+            params.append(due_key(start))
+        if end is not None:
+            clauses.append("due_key <= ?")
+            params.append(due_key(end))
+        if course is not None:
+            clauses.append("course = ?")
+            params.append(course)
+        if project is not None:
+            clauses.append("project = ?")
+            params.append(project)
+        if set(kinds) != set(KINDS):
+            clauses.append(f"kind IN ({','.join('?' for _ in kinds)})")
+            params.extend(kinds)
+        query = f"SELECT {_COLUMNS} FROM deadlines"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY due_key, rowid"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [Deadline(*row[1:]) for row in rows]
+
+    def projects(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT project FROM deadlines ORDER BY project")]
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @staticmethod
+    def _row(
+        project: str,
+        kind: str,
+        assignment: AssignmentRecord,
+        title: str,
+        due_iso: str,
+        start_iso: Optional[str] = None,
+        hours: Optional[float] = None,
+    ) -> Tuple[object, ...]:
+        return (
+            due_key(due_iso),
+            due_iso,
+            kind,
+            project,
+            assignment.course,
+            assignment.assignment_title,
+            title,
+            start_iso,
+            hours,
+            assignment.source_doc,
+        )
@@ -1,54 +1,385 @@
 from __future__ import annotations
 
 import csv
+import os
+import queue
+import re
 import sqlite3
+import threading
+from abc import ABC, abstractmethod
 from datetime import datetime
+from importlib.metadata import entry_points
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Collection, Dict, Iterable, List, Optional, Sequence, TextIO, Tuple, Type
 
 from s2s.schemas import AssignmentRecord, Task
 from s2s.utils import ensure_dir
 
+Paired = Tuple[AssignmentRecord, List[Task]]
+
+DEFAULT_EXPORT_FORMATS = ("ics", "csv", "sqlite")
+EXPORTER_ENTRY_POINT = "s2s.exporters"
+# Pairs buffered between the reader and each sink.
+EXPORT_QUEUE_SIZE = 256
+
+_ICS_HEADER = "BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:-//S2S Agent//EN"
+_ICS_FOOTER = "END:VCALENDAR"
+
+EXPORTERS: Dict[str, Type["Exporter"]] = {}
+_plugins_loaded = False
+
+
+class Exporter(ABC):
+    """A sink that writes (assignment, tasks) pairs to one file.
+
+    ``open`` runs before the first pair, ``write`` once per pair in order and
+    ``close`` after the last, all on the same thread. Subclasses set ``name``
+    (the ``--format`` value) and ``filename`` (the file's name in the export
+    directory) and are registered with ``register_exporter``; other packages
+    can register theirs under the ``s2s.exporters`` entry point group.
+
+    Sinks that can edit a previous export in place override ``update``.
+    """
+
+    name: str
+    filename: str
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+
+    def open(self) -> None:
+        ensure_dir(self.path.parent)
+
+    @abstractmethod
+    def write(self, assignment: AssignmentRecord, tasks: List[Task]) -> None:
+        ...
+
+    def close(self) -> Path:
+        return self.path
+
+    def update(self, items: Iterable[Paired], sources: Collection[str]) -> bool:
+        """Replace the rows of the ``sources`` documents in the existing export with ``items``.
+
+        ``items`` are the current pairs of those documents (none for removed
+        ones); rows of other documents are left as they are. Returns False,
+        without touching the file, when the sink cannot update in place and
+        must be rewritten instead.
+        """
+        return False
+
+
+def register_exporter(cls: Type[Exporter]) -> Type[Exporter]:
+    """Class decorator adding an exporter to the registry under its ``name``."""
+    EXPORTERS[cls.name] = cls
+    return cls
+
+
+def exporter_names() -> List[str]:
+    """Registered export formats, including entry-point plugins."""
+    global _plugins_loaded
+    if not _plugins_loaded:
+        _plugins_loaded = True
+        for entry in entry_points(group=EXPORTER_ENTRY_POINT):
+            register_exporter(entry.load())
+    return sorted(EXPORTERS)
+
+
+def export_formats(names: Optional[Sequence[str]] = None) -> List[str]:
+    """Selected export formats (``S2S_EXPORT_FORMATS``, default ics, csv and sqlite), validated and deduplicated.
+
+    Each name may itself be a comma-separated list.
+    """
+    if not names:
+        env = os.getenv("S2S_EXPORT_FORMATS")
+        names = [env] if env else list(DEFAULT_EXPORT_FORMATS)
+    selected: List[str] = []
+    for name in (part.strip().lower() for value in names for part in value.split(",")):
+        if name and name not in selected:
+            selected.append(name)
+    known = exporter_names()
+    unknown = [name for name in selected if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown export format '{unknown[0]}'; expected one of {', '.join(known)}")
+    return selected
+
+
+def make_exporter(name: str, path: Path) -> Exporter:
+    exporter_names()
+    return EXPORTERS[name](path)
+
+
+def run_exporters(
+    items: Iterable[Paired], exporters: Sequence[Exporter], queue_size: int = EXPORT_QUEUE_SIZE
+) -> List[Path]:
+    """Make one pass over ``items`` and feed every exporter, each on its own thread.
+
+    Each pair is handed to a bounded queue per sink as soon as it is read, so
+    the sinks write concurrently, the export takes about as long as the
+    slowest one, and at most ``queue_size`` pairs wait per sink. A single
+    exporter runs on the calling thread. The first sink error is re-raised
+    once every sink has stopped.
+    """
+    if len(exporters) == 1:
+        (exporter,) = exporters
+        exporter.open()
+        for assignment, tasks in items:
+            exporter.write(assignment, tasks)
+        return [exporter.close()]
+
+    done = object()
+    queues: List[queue.Queue] = [queue.Queue(maxsize=queue_size) for _ in exporters]
+    results: List[Optional[Path]] = [None] * len(exporters)
+    errors: List[BaseException] = []
+
+    def drain(slot: int) -> None:
+        exporter, inbox = exporters[slot], queues[slot]
+        failed = False
+        try:
+            exporter.open()
+        except BaseException as exc:  # keep draining so the reader never blocks
+            errors.append(exc)
+            failed = True
+        while True:
+            item = inbox.get()
+            if item is done:
+                break
+            if failed:
+                continue
+            try:
+                exporter.write(*item)
+            except BaseException as exc:
+                errors.append(exc)
+                failed = True
+        if not failed:
+            try:
+                results[slot] = exporter.close()
+            except BaseException as exc:
+                errors.append(exc)
+
+    threads = [
+        threading.Thread(target=drain, args=(slot,), name=f"s2s-export-{exporter.name}", daemon=True)
+        for slot, exporter in enumerate(exporters)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for item in items:
+            for inbox in queues:
+                inbox.put(item)
+    finally:
+        for inbox in queues:
+            inbox.put(done)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return [path for path in results if path is not None]
+
+
+@register_exporter
+class IcsExporter(Exporter):
+    """Assignments and tasks as ICS events.
+
+    Every event names its source document in ``X-S2S-SOURCE``, so ``update``
+    can swap one document's events and keep the rest, DTSTAMPs included.
+    """
+
+    name = "ics"
+    filename = "calendar.ics"
+
+    def open(self) -> None:
+        super().open()
+        self._handle: TextIO = self.path.open("w", encoding="utf-8")
+        self._handle.write(_ICS_HEADER)
+        # One DTSTAMP for the whole export: every event is created by this write.
+        self._stamp = _ics_datetime(datetime.utcnow().isoformat())
+
+    def write(self, assignment: AssignmentRecord, tasks: List[Task]) -> None:
+        lines = _ics_events(assignment, tasks, self._stamp)
+        self._handle.write("".join(f"\n{line}" for line in lines))
+
+    def close(self) -> Path:
+        self._handle.write(f"\n{_ICS_FOOTER}")
+        self._handle.close()
+        return self.path
+
+    def update(self, items: Iterable[Paired], sources: Collection[str]) -> bool:
+        if not self.path.exists():
+            return False
+        text = self.path.read_text(encoding="utf-8")
+        if not (text.startswith(_ICS_HEADER) and text.endswith(_ICS_FOOTER)):
+            return False
+        kept: List[str] = []
+        for event in re.findall(r"^BEGIN:VEVENT$.*?^END:VEVENT$", text, flags=re.M | re.S):
+            source = re.search(r"^X-S2S-SOURCE:(.*)$", event, flags=re.M)
+            if source is None:  # written before events carried their source
+                return False
+            if source.group(1) not in sources:
+                kept.append(event)
+        stamp = _ics_datetime(datetime.utcnow().isoformat())
+        for assignment, tasks in items:
+            kept.append("\n".join(_ics_events(assignment, tasks, stamp)))
+        partial = self.path.with_name(self.path.name + ".partial")
+        partial.write_text("\n".join([_ICS_HEADER, *kept, _ICS_FOOTER]), encoding="utf-8")
+        os.replace(partial, self.path)
+        return True
+
+
+@register_exporter
+class CsvExporter(Exporter):
+    """One row per task."""
+
+    name = "csv"
+    filename = "tasks.csv"
+
+    def open(self) -> None:
+        super().open()
+        self._handle: TextIO = self.path.open("w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._handle)
+        self._writer.writerow(["course", "assignment", "task", "start_iso", "due_iso", "hours", "depends_on"])
+
+    def write(self, assignment: AssignmentRecord, tasks: List[Task]) -> None:
+        self._writer.writerows(
+            [
+                assignment.course or "",
+                assignment.assignment_title,
+                task.title,
+                task.earliest_start_iso or "",
+                task.due_iso,
+                task.hours_estimate,
+                ";".join(task.depends_on),
+            ]
+            for task in tasks
+        )
+
+    def close(self) -> Path:
+        self._handle.close()
+        return self.path
+
+
+@register_exporter
+class SqliteExporter(Exporter):
+    """A ``tasks`` table, replaced on every export; ``update`` swaps one source document's rows."""
+
+    name = "sqlite"
+    filename = "tasks.db"
+
+    def open(self) -> None:
+        super().open()
+        self._conn = sqlite3.connect(str(self.path))
+        # Dropped rather than emptied so tables from before ``source_doc`` get the new column.
+        self._conn.execute("DROP TABLE IF EXISTS tasks")
+        self._conn.execute(
+            """
+            CREATE TABLE tasks (
+                course TEXT,
+                assignment TEXT,
+                task TEXT,
+                start_iso TEXT,
+                due_iso TEXT,
+                hours REAL,
+                depends_on TEXT,
+                source_doc TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX tasks_source ON tasks (source_doc)")
+
+    def write(self, assignment: AssignmentRecord, tasks: List[Task]) -> None:
+        self._conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _task_rows(assignment, tasks))
+
+    def close(self) -> Path:
+        self._conn.commit()
+        self._conn.close()
+        return self.path
+
+    def update(self, items: Iterable[Paired], sources: Collection[str]) -> bool:
+        if not self.path.exists():
+            return False
+        conn = sqlite3.connect(str(self.path))
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(tasks)")]
+            if "source_doc" not in columns:
+                return False
+            with conn:
+                conn.executemany("DELETE FROM tasks WHERE source_doc = ?", [(source,) for source in sources])
+                for assignment, tasks in items:
+                    conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _task_rows(assignment, tasks))
+        finally:
+            conn.close()
+        return True
+
 
 def write_calendar_ics(
-    items: Iterable[Tuple[AssignmentRecord, List[Task]]],
+    items: Iterable[Paired],
     output_dir: Path = Path("out"),
     filename: str = "calendar.ics",
 ) -> Path:
     """Export assignments and tasks as ICS events."""
-    ensure_dir(output_dir)
-    path = output_dir / filename
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//S2S Agent//EN",
+    return run_exporters(items, [IcsExporter(output_dir / filename)])[0]
+
+
+def write_tasks_csv(
+    items: Iterable[Paired],
+    output_dir: Path = Path("out"),
+    filename: str = "tasks.csv",
+) -> Path:
+    return run_exporters(items, [CsvExporter(output_dir / filename)])[0]
+
+
+def write_sqlite(
+    items: Iterable[Paired],
+    output_path: Path = Path("out/tasks.db"),
+) -> Path:
+    return run_exporters(items, [SqliteExporter(output_path)])[0]
+
+
+def _task_rows(assignment: AssignmentRecord, tasks: List[Task]) -> List[Tuple[object, ...]]:
+    return [
+        (
+            assignment.course,
+            assignment.assignment_title,
+            task.title,
+            task.earliest_start_iso,
+            task.due_iso,
+            task.hours_estimate,
+            ";".join(task.depends_on),
+            assignment.source_doc,
+        )
+        for task in tasks
     ]
-    for assignment, tasks in items:
-        event_uid = getattr(assignment, "id", assignment.assignment_title)
-        lines.extend(_ics_event(assignment.assignment_title, assignment.due_datetime_iso, event_uid))
-        for task in tasks:
-            lines.extend(
-                _ics_event(
-                    task.title,
-                    task.due_iso,
-                    f"{event_uid}-{task.title}",
-                    start_iso=task.earliest_start_iso,
-                )
+
+
+def _ics_events(assignment: AssignmentRecord, tasks: List[Task], stamp: str) -> List[str]:
+    event_uid = getattr(assignment, "id", assignment.assignment_title)
+    source = assignment.source_doc
+    lines = _ics_event(assignment.assignment_title, assignment.due_datetime_iso, event_uid, stamp, source)
+    for task in tasks:
+        lines.extend(
+            _ics_event(
+                task.title,
+                task.due_iso,
+                f"{event_uid}-{task.title}",
+                stamp,
+                source,
+                start_iso=task.earliest_start_iso,
             )
-    lines.append("END:VCALENDAR")
-    path.write_text("\n".join(lines), encoding="utf-8")
-    return path
+        )
+    return lines
 
 
-def _ics_event(title: str, due_iso: str, uid: str, start_iso: str | None = None) -> List[str]:
+def _ics_event(
+    title: str, due_iso: str, uid: str, stamp: str, source: str, start_iso: str | None = None
+) -> List[str]:
     start = start_iso or due_iso
     return [
         "BEGIN:VEVENT",
         f"UID:{uid}",
-        f"DTSTAMP:{_ics_datetime(datetime.utcnow().isoformat())}",
+        f"DTSTAMP:{stamp}",
         f"DTSTART:{_ics_datetime(start)}",
         f"DTEND:{_ics_datetime(due_iso)}",
         f"SUMMARY:{title}",
+        f"X-S2S-SOURCE:{source}",
         "END:VEVENT",
     ]
 
@@ -56,69 +387,3 @@ def _ics_event(title: str, due_iso: str, uid: str, start_iso: str | None = None)
 def _ics_datetime(value: str) -> str:
     dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
     return dt.strftime("%Y%m%dT%H%M%SZ")
-
-
-def write_tasks_csv(
-    items: Iterable[Tuple[AssignmentRecord, List[Task]]],
-    output_dir: Path = Path("out"),
-    filename: str = "tasks.csv",
-) -> Path:
-    ensure_dir(output_dir)
-    path = output_dir / filename
-    with path.open("w", newline="", encoding="utf-8") as handle:
-        writer = csv.writer(handle)
-        writer.writerow(["course", "assignment", "task", "start_iso", "due_iso", "hours", "depends_on"])
-        for assignment, tasks in items:
-            for task in tasks:
-                writer.writerow(
-                    [
-                        assignment.course or "",
-                        assignment.assignment_title,
-                        task.title,
-                        task.earliest_start_iso or "",
-                        task.due_iso,
-                        task.hours_estimate,
-                        ";".join(task.depends_on),
-                    ]
-                )
-    return path
-
-
-def write_sqlite(
-    items: Iterable[Tuple[AssignmentRecord, List[Task]]],
-    output_path: Path = Path("out/tasks.db"),
-) -> Path:
-    ensure_dir(output_path.parent)
-    conn = sqlite3.connect(str(output_path))
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS tasks (
-            course TEXT,
-            assignment TEXT,
-            task TEXT,
-            start_iso TEXT,
-            due_iso TEXT,
-            hours REAL,
-            depends_on TEXT
-        )
-        """
-    )
-    cur.execute("DELETE FROM tasks")
-    for assignment, tasks in items:
-        for task in tasks:
-            cur.execute(
-                "INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (
-                    assignment.course,
-                    assignment.assignment_title,
-                    task.title,
-                    task.earliest_start_iso,
-                    task.due_iso,
-                    task.hours_estimate,
-                    ";".join(task.depends_on),
-                ),
-            )
-    conn.commit()
-    conn.close()
-    return output_path
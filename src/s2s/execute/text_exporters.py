@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import List, TextIO, Tuple
+
+from s2s.execute.deadlines import due_key
+from s2s.execute.exporters import Exporter, register_exporter
+from s2s.schemas import AssignmentRecord, Task
+
+
+@register_exporter
+class JsonLinesExporter(Exporter):
+    """One JSON object per assignment, with its tasks nested under ``tasks``."""
+
+    name = "jsonl"
+    filename = "schedule.jsonl"
+
+    def open(self) -> None:
+        super().open()
+        self._handle: TextIO = self.path.open("w", encoding="utf-8")
+
+    def write(self, assignment: AssignmentRecord, tasks: List[Task]) -> None:
+        row = assignment.dict_for_storage()
+        row["tasks"] = [task.dict_for_storage() for task in tasks]
+        self._handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def close(self) -> Path:
+        self._handle.close()
+        return self.path
+
+
+@register_exporter
+class MarkdownAgendaExporter(Exporter):
+    """A day-by-day Markdown agenda of due dates and task milestones.
+
+    Entries are buffered and written on ``close``: a section per calendar day,
+    taken from each due time as written, lists assignment deadlines in bold
+    and tasks as checkboxes, in due order within the day.
+    """
+
+    name = "markdown"
+    filename = "agenda.md"
+
+    def open(self) -> None:
+        super().open()
+        self._entries: List[Tuple[str, str, int, str]] = []
+
+    def write(self, assignment: AssignmentRecord, tasks: List[Task]) -> None:
+        title = assignment.assignment_title
+        course = f" ({assignment.course})" if assignment.course else ""
+        weight = f", {assignment.points_or_weight}" if assignment.points_or_weight else ""
+        due = assignment.due_datetime_iso
+        self._add(due, 1, f"**{_time(due)} {title} due**{course}{weight}")
+        for task in tasks:
+            owner = "" if task.title.startswith(title) else f" for {title}"
+            self._add(task.due_iso, 0, f"[ ] {_time(task.due_iso)} {task.title} ({task.hours_estimate:g} h){owner}")
+
+    def close(self) -> Path:
+        lines = ["# Agenda"]
+        day = None
+        # Days sort before instants, so mixed UTC offsets never split or reorder a day.
+        for date, _, _, line in sorted(self._entries):
+            if date != day:
+                day = date
+                lines += ["", f"## {datetime.fromisoformat(date).strftime('%A, %B %d, %Y')}", ""]
+            lines.append(f"- {line}")
+        self.path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return self.path
+
+    def _add(self, due_iso: str, order: int, line: str) -> None:
+        self._entries.append((due_iso[:10], due_key(due_iso), order, line))
+
+
+def _time(value: str) -> str:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%H:%M")
@@ -1,5 +1,6 @@
 """Extraction package exports."""
 
-from .infer_lora_t5 import AssignmentExtractor
+from .infer_lora_t5 import EXTRACTION_MODES, AssignmentExtractor, extraction_mode_kwargs
+from .parsed import ParsedDocument
 
-__all__ = ["AssignmentExtractor"]
+__all__ = ["AssignmentExtractor", "EXTRACTION_MODES", "ParsedDocument", "extraction_mode_kwargs"]
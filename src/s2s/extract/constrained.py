@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+import copy
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import torch
+from transformers import LogitsProcessor, StoppingCriteria
+
+# Grammar state: (field index, phase, detail). Phases are documented on SchemaGrammar.
+State = Tuple[int, str, Any]
+
+_FIELD_PATTERN = re.compile(r'"(\w+)":\s*([\w\[\]]+)')
+_VALUE_TYPES = {"str", "Optional[str]", "List[str]", "float"}
+# Fewest characters a value of each type takes: ``"x"``, ``[]`` or one digit.
+_MIN_VALUE = {"str": 3, "Optional[str]": 3, "List[str]": 2, "float": 1}
+# ``float`` values are confidences: 0 to 1 with at most four decimals.
+_NUMBER_PREFIX = re.compile(r"0(\.\d{0,4})?|1(\.0{0,4})?")
+_NUMBER = re.compile(r"0(\.\d{1,4})?|1(\.0{1,4})?")
+
+
+def schema_fields(schema_prompt: str) -> List[Tuple[str, str]]:
+    """Parse ``"name": type`` pairs from a schema prompt such as ``SCHEMA_PROMPT``."""
+    fields = _FIELD_PATTERN.findall(schema_prompt)
+    unknown = [kind for _, kind in fields if kind not in _VALUE_TYPES]
+    if not fields or unknown:
+        raise ValueError(f"Unsupported schema prompt types: {unknown or schema_prompt}")
+    return fields
+
+
+class SchemaGrammar:
+    """Character-level automaton accepting one JSON object with the schema's keys in order.
+
+    Phases: ``start`` (expects ``{``), ``key`` (inside the quoted key literal),
+    ``colon``, ``value`` (first character decides the value kind), ``str`` /
+    ``list_str`` (inside a string), ``null`` (inside the ``null`` literal),
+    ``num``, ``list_open`` / ``list_next`` / ``list_after`` (inside a list),
+    ``after`` (expects ``,`` or the closing brace), ``space`` (one whitespace
+    character after the state held in its detail) and ``done``.
+
+    Characters listed in ``implicit`` cannot be produced by the tokenizer (t5-small
+    has no brace tokens); wherever the grammar forces one of them it is inserted
+    automatically, and ``render`` restores them in the final text. Strings are
+    capped at ``max_string`` characters and lists at ``max_items`` entries, at
+    most one whitespace character may separate structural characters, and
+    strings must hold a non-whitespace character, so a degenerate model can
+    neither loop inside a value nor pad the object with blanks until
+    ``max_length``. ``float`` values are confidences between 0 and 1 with at
+    most four decimals, as ``AssignmentRecord`` requires.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[Tuple[str, str]],
+        implicit: str = "",
+        max_string: int = 160,
+        max_items: int = 8,
+    ) -> None:
+        self.fields = list(fields)
+        self.implicit = set(implicit)
+        self.max_string = max_string
+        self.max_items = max_items
+
+    def initial(self) -> State:
+        return self._settle((0, "start", None))
+
+    def is_done(self, state: State) -> bool:
+        return state[1] == "done"
+
+    def can_end(self, state: State) -> bool:
+        """Whether the text may stop here; a trailing number closes an implicit brace."""
+        idx, phase, detail = state
+        if phase == "num":
+            return idx == len(self.fields) - 1 and bool(_NUMBER.fullmatch(detail)) and "}" in self.implicit
+        return self.is_done(state)
+
+    def remaining(self, state: State) -> int:
+        """Fewest characters that complete the object from ``state``, not counting implicit ones."""
+        idx, phase, detail = state
+        if phase == "space":
+            return self.remaining(detail)
+        if phase == "done":
+            return 0
+        name, kind = self.fields[idx]
+        value = _MIN_VALUE[kind]
+        if phase == "start":
+            current = int("{" not in self.implicit) + len(name) + 3 + value
+        elif phase == "key":
+            current = len(name) + 2 - detail + 1 + value
+        elif phase == "colon":
+            current = 1 + value
+        elif phase == "value":
+            current = value
+        elif phase == "str":
+            current = int(detail[1]) + 1
+        elif phase == "list_str":
+            current = int(detail[2]) + 2
+        elif phase == "null":
+            current = 4 - detail
+        elif phase == "num":
+            current = int(not _NUMBER.fullmatch(detail))
+        elif phase in ("list_open", "list_after"):
+            current = 1
+        elif phase == "list_next":
+            current = 4
+        else:  # after
+            current = 0
+        later = sum(len(name) + 4 + _MIN_VALUE[kind] for name, kind in self.fields[idx + 1 :])
+        return current + later + int("}" not in self.implicit)
+
+    def advance(self, state: State, text: str) -> Optional[State]:
+        for ch in text:
+            state = self._step(state, ch)
+            if state is None:
+                return None
+            state = self._settle(state)
+        return state
+
+    def render(self, text: str) -> Optional[str]:
+        """Return ``text`` with implicit characters restored, or None when it does not parse."""
+        out: List[str] = []
+        state: Optional[State] = (0, "start", None)
+        for ch in text:
+            state = self._settle(state, out)
+            state = self._step(state, ch)
+            if state is None:
+                return None
+            out.append(ch)
+        state = self._settle(state, out)
+        if not self.can_end(state):
+            return None
+        if not self.is_done(state):
+            out.append("}")
+        return "".join(out)
+
+    def _forced(self, state: State) -> Optional[str]:
+        idx, phase, _ = state
+        if phase == "start":
+            return "{"
+        if phase == "after" and idx == len(self.fields) - 1:
+            return "}"
+        return None
+
+    def _settle(self, state: State, out: Optional[List[str]] = None) -> State:
+        forced = self._forced(state)
+        while forced is not None and forced in self.implicit:
+            state = self._step(state, forced)
+            if out is not None:
+                out.append(forced)
+            forced = self._forced(state)
+        return state
+
+    def _step(self, state: State, ch: str) -> Optional[State]:
+        idx, phase, detail = state
+        if phase == "space":
+            return None if ch.isspace() else self._step(detail, ch)
+        if phase == "done":
+            return state if ch.isspace() else None
+        if ch.isspace() and (phase not in {"key", "str", "list_str", "null", "num"} or state == (idx, "key", 0)):
+            return (idx, "space", state)
+        if phase == "start":
+            return (0, "key", 0) if ch == "{" else None
+        if phase == "key":
+            literal = f'"{self.fields[idx][0]}"'
+            if ch != literal[detail]:
+                return None
+            return (idx, "colon", None) if detail + 1 == len(literal) else (idx, "key", detail + 1)
+        if phase == "colon":
+            return (idx, "value", None) if ch == ":" else None
+        if phase == "value":
+            return self._start_value(idx, ch)
+        if phase == "str":
+            length, blank = detail
+            if ch == '"':
+                return None if blank else (idx, "after", None)
+            return (idx, "str", (length + 1, blank and ch.isspace())) if self._string_char(length, ch) else None
+        if phase == "list_str":
+            items, length, blank = detail
+            if ch == '"':
+                return None if blank else (idx, "list_after", items)
+            if not self._string_char(length, ch):
+                return None
+            return (idx, "list_str", (items, length + 1, blank and ch.isspace()))
+        if phase == "null":
+            if ch != "null"[detail]:
+                return None
+            return (idx, "after", None) if detail + 1 == 4 else (idx, "null", detail + 1)
+        if phase == "num":
+            return self._step_number(idx, detail, ch)
+        if phase == "list_open":
+            if ch == "]":
+                return (idx, "after", None)
+            return (idx, "list_str", (1, 0, True)) if ch == '"' else None
+        if phase == "list_next":
+            return (idx, "list_str", (detail + 1, 0, True)) if ch == '"' else None
+        if phase == "list_after":
+            if ch == "]":
+                return (idx, "after", None)
+            return (idx, "list_next", detail) if ch == "," and detail < self.max_items else None
+        if phase == "after":
+            if idx == len(self.fields) - 1:
+                return (idx, "done", None) if ch == "}" else None
+            return (idx + 1, "key", 0) if ch == "," else None
+        return None
+
+    def _start_value(self, idx: int, ch: str) -> Optional[State]:
+        kind = self.fields[idx][1]
+        if kind in {"str", "Optional[str]"} and ch == '"':
+            return (idx, "str", (0, True))
+        if kind == "Optional[str]" and ch == "n":
+            return (idx, "null", 1)
+        if kind == "List[str]" and ch == "[":
+            return (idx, "list_open", None)
+        if kind == "float" and ch in "01":
+            return (idx, "num", ch)
+        return None
+
+    def _string_char(self, length: int, ch: str) -> bool:
+        return length < self.max_string and ch != "\\" and ord(ch) >= 0x20
+
+    def _step_number(self, idx: int, detail: str, ch: str) -> Optional[State]:
+        if _NUMBER_PREFIX.fullmatch(detail + ch):
+            return (idx, "num", detail + ch)
+        if not _NUMBER.fullmatch(detail):
+            return None
+        after = (idx, "after", None)
+        if ch.isspace():
+            return after
+        return self._settle_then_step(after, ch)
+
+    def _settle_then_step(self, state: State, ch: str) -> Optional[State]:
+        return self._step(self._settle(state), ch)
+
+
+class SchemaLogitsProcessor(LogitsProcessor):
+    """Mask every token that would take the decoded text outside ``SchemaGrammar``.
+
+    Candidates are checked in score order: up to ``top_k`` of them, and the whole
+    vocabulary only when none of those are valid, so greedy decoding stays exact
+    without a full-vocabulary scan per step. End-of-sequence is only allowed once
+    the object is complete, and is the only option from then on.
+
+    With ``max_new_tokens`` set, a row whose remaining steps barely cover
+    ``SchemaGrammar.remaining`` only gets tokens that shorten the way to the
+    end (closing the current string or list, say), so the object is complete
+    before generation runs out instead of being cut off mid-value.
+    """
+
+    def __init__(
+        self, tokenizer: Any, grammar: SchemaGrammar, top_k: int = 64, max_new_tokens: Optional[int] = None
+    ) -> None:
+        self.grammar = grammar
+        self.top_k = top_k
+        self.max_new_tokens = max_new_tokens
+        self.eos_token_id = tokenizer.eos_token_id
+        self.pad_token_id = getattr(tokenizer, "pad_token_id", None)
+        special = set(tokenizer.all_special_ids)
+        self.token_text: Dict[int, str] = {}
+        for token, idx in tokenizer.get_vocab().items():
+            if idx in special or (token.startswith("<") and token.endswith(">")):
+                continue
+            self.token_text[idx] = token.replace("▁", " ")
+        self._states: Dict[Tuple[int, ...], Optional[State]] = {(): grammar.initial()}
+
+    @classmethod
+    def for_schema(
+        cls, tokenizer: Any, schema_prompt: str, top_k: int = 64, max_new_tokens: Optional[int] = None
+    ) -> "SchemaLogitsProcessor":
+        producible = set("".join(tokenizer.get_vocab()))
+        implicit = "".join(ch for ch in "{}" if ch not in producible)
+        grammar = SchemaGrammar(schema_fields(schema_prompt), implicit=implicit)
+        return cls(tokenizer, grammar, top_k=top_k, max_new_tokens=max_new_tokens)
+
+    def reset(self) -> None:
+        self._states = {(): self.grammar.initial()}
+
+    def fresh(self) -> "SchemaLogitsProcessor":
+        """A processor sharing this one's vocabulary table but with its own prefix states.
+
+        Take one per ``generate`` call so concurrent calls never share states.
+        """
+        processor = copy.copy(self)
+        processor.reset()
+        return processor
+
+    def state(self, token_ids: Sequence[int]) -> Optional[State]:
+        """Grammar state after the generated ``token_ids``, or None once they left the grammar."""
+        return self._state(tuple(token_ids))
+
+    def text(self, token_ids: Sequence[int]) -> str:
+        return "".join(self.token_text.get(idx, "") for idx in token_ids)
+
+    def render(self, token_ids: Sequence[int]) -> Optional[str]:
+        return self.grammar.render(self.text(token_ids))
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        mask = torch.full_like(scores, float("-inf"))
+        for row, ids in enumerate(input_ids.tolist()):
+            # The first decoder position is the start token, not generated text.
+            state = self._state(tuple(ids[1:]))
+            for token_id in self._allowed(state, scores[row], self._closing(state, len(ids) - 1)):
+                mask[row, token_id] = 0.0
+        return scores + mask
+
+    def _state(self, prefix: Tuple[int, ...]) -> Optional[State]:
+        if prefix not in self._states:
+            parent = self._state(prefix[:-1])
+            # Tokens without text (never allowed when constraining) leave the state as it was.
+            text = self.token_text.get(prefix[-1], "")
+            self._states[prefix] = None if parent is None else self.grammar.advance(parent, text)
+        return self._states[prefix]
+
+    def _closing(self, state: Optional[State], steps: int) -> bool:
+        """Whether the steps left are about to run out before the object can be completed."""
+        if self.max_new_tokens is None or state is None:
+            return False
+        # One spare step for the end-of-sequence token a trailing number needs.
+        return self.max_new_tokens - steps <= self.grammar.remaining(state) + 1
+
+    def _allowed(self, state: Optional[State], row_scores: torch.FloatTensor, closing: bool = False) -> List[int]:
+        if state is None or self.grammar.is_done(state):
+            return [self.eos_token_id]
+        can_end = self.grammar.can_end(state)
+        if closing and can_end:
+            return [self.eos_token_id]
+        allowed: List[int] = []
+        if closing:
+            allowed = self._candidates(state, row_scores, self._closer, walk=True)
+        if not allowed:
+            # Also when closing but no token shortens the way: any valid one will do.
+            allowed = self._candidates(state, row_scores, self._valid, walk=not can_end)
+        if can_end:
+            allowed.insert(0, self.eos_token_id)
+        return allowed or [self.eos_token_id]
+
+    def _candidates(self, state: State, row_scores: torch.FloatTensor, accept: Any, walk: bool) -> List[int]:
+        top_k = min(self.top_k, row_scores.numel())
+        candidates = torch.topk(row_scores, top_k).indices.tolist()
+        allowed = [idx for idx in candidates if idx != self.eos_token_id and accept(state, idx)]
+        if not allowed and walk:
+            # Nothing near the top fits: walk the rest of the vocabulary in score order.
+            rest = torch.argsort(row_scores, descending=True)[top_k:].tolist()
+            allowed = next(([idx] for idx in rest if idx != self.eos_token_id and accept(state, idx)), [])
+        return allowed
+
+    def _valid(self, state: State, token_id: int) -> bool:
+        text = self.token_text.get(token_id)
+        return bool(text) and self.grammar.advance(state, text) is not None
+
+    def _closer(self, state: State, token_id: int) -> bool:
+        text = self.token_text.get(token_id)
+        after = self.grammar.advance(state, text) if text else None
+        return after is not None and self.grammar.remaining(after) < self.grammar.remaining(state)
+
+
+class SchemaStop(StoppingCriteria):
+    """Stop each row as soon as its text completes the schema object.
+
+    Rows are followed through ``processor``'s prefix states, which a
+    constraining processor has mostly computed already. A generated pad token
+    also ends a row: t5 only emits one when it has nothing to say, and then
+    repeats it until ``max_length``.
+    """
+
+    def __init__(self, processor: SchemaLogitsProcessor) -> None:
+        self.processor = processor
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs: Any) -> torch.BoolTensor:
+        done = []
+        for ids in input_ids.tolist():
+            # The first decoder position is the start token, not generated text.
+            state = self.processor.state(ids[1:])
+            ended = len(ids) > 1 and ids[-1] == self.processor.pad_token_id
+            done.append(ended or (state is not None and self.processor.grammar.is_done(state)))
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
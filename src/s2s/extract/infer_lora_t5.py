@@ -1,18 +1,29 @@
 from __future__ import annotations
 
+import copy
 import json
+import os
 import re
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from transformers import (
+    AutoModelForSeq2SeqLM,
+    AutoTokenizer,
+    LogitsProcessorList,
+    StoppingCriteriaList,
+)
 from peft import PeftModel
-import dateparser
 
 from s2s.schemas import AssignmentRecord
+from s2s.extract.constrained import SchemaLogitsProcessor, SchemaStop
+from s2s.extract.parsed import DEFAULT_DUE, HEADER_KEYWORDS, ParsedDocument, ParsedLine, as_parsed, coerce_date
 from s2s.extract.validate import normalize_assignment
-from s2s.utils import log_interaction
+from s2s.generation_cache import GenerationCache
+from s2s.utils import hash_file, hash_text, log_interaction
 
 
 SCHEMA_PROMPT = (
@@ -28,9 +39,50 @@ SCHEMA_PROMPT = (
     '}'
 )
 
+EXTRACTION_MODES = ("rules", "model", "cascade")
+
+# Rule-based candidates scoring below this are re-extracted by the model in cascade mode.
+CASCADE_THRESHOLD = 0.7
+
+
+def extraction_mode_kwargs(mode: str) -> Dict[str, Any]:
+    """``AssignmentExtractor`` arguments for an extraction mode name."""
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode '{mode}'; expected one of {', '.join(EXTRACTION_MODES)}")
+    if mode == "rules":
+        return {"force_rule_based": True}
+    return {"cascade": True} if mode == "cascade" else {}
+
+
+def generated_steps(outputs: torch.LongTensor, eos_token_id: Optional[int]) -> int:
+    """Decode steps taken for the rows of ``outputs``, each counted up to and including its first EOS.
+
+    The leading decoder start token is not a step. Padding before EOS (t5 emits
+    pad when it has nothing to say) was still decoded, so it counts.
+    """
+    generated = outputs[:, 1:]
+    steps = torch.full((generated.shape[0],), generated.shape[1], dtype=torch.long)
+    if eos_token_id is not None and generated.numel():
+        is_eos = (generated == eos_token_id).cpu()
+        ended = is_eos.any(dim=1)
+        steps = torch.where(ended, is_eos.int().argmax(dim=1) + 1, steps)
+    return int(steps.sum())
+
 
 class AssignmentExtractor:
-    """Wrapper that loads a LoRA-adapted t5-small or falls back to heuristics."""
+    """Wrapper that loads a LoRA-adapted t5-small or falls back to heuristics.
+
+    ``optimize_cpu`` merges the LoRA adapter into the base weights and switches to
+    greedy decoding, which ends a row as soon as its text completes the schema
+    object (or the model falls to padding); ``quantize_int8`` additionally
+    applies dynamic int8 quantization to the Linear layers on CPU. ``constrained``
+    masks decoding to JSON matching ``SCHEMA_PROMPT`` so the output always parses.
+
+    ``cascade`` runs the rules first and scores each section's candidates for
+    completeness; only sections scoring below ``cascade_threshold`` (or with a
+    due cue the rules missed) are sent to the model, ``cascade_batch_size``
+    prompts per ``generate`` call.
+    """
 
     def __init__(
         self,
@@ -38,23 +90,84 @@ class AssignmentExtractor:
         adapter_dir: Path = Path("models/s2s_lora_t5"),
         force_rule_based: bool = False,
         device: Optional[str] = None,
+        generation_cache: Union[GenerationCache, bool, None] = None,
+        optimize_cpu: bool = False,
+        quantize_int8: bool = False,
+        num_threads: Optional[int] = None,
+        greedy: Optional[bool] = None,
+        constrained: bool = False,
+        cascade: bool = False,
+        cascade_threshold: float = CASCADE_THRESHOLD,
+        cascade_batch_size: int = 8,
     ) -> None:
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.base_model_name = base_model
         self.adapter_dir = Path(adapter_dir)
         self.force_rule_based = force_rule_based
+        self.cascade = cascade
+        self.cascade_threshold = cascade_threshold
+        self.cascade_batch_size = max(1, cascade_batch_size)
         self.tokenizer = AutoTokenizer.from_pretrained(self.base_model_name)
         self.model = None
+        self.adapter_hash: Optional[str] = None
+        self.optimize_cpu = optimize_cpu
+        self.quantize_int8 = quantize_int8 and self.device == "cpu"
+        self.greedy = optimize_cpu if greedy is None else greedy
+        if self.greedy:
+            self.generation_kwargs: Dict[str, Any] = {"max_length": 512, "num_beams": 1, "do_sample": False}
+        else:
+            self.generation_kwargs = {"max_length": 512, "num_beams": 4, "early_stopping": True}
+        self.constrained = constrained
+        self.schema_processor: Optional[SchemaLogitsProcessor] = None
+        self.generation_cache: Optional[GenerationCache] = None
+        self.stats: Dict[str, float] = {
+            "generate_calls": 0,
+            "generated_tokens": 0,
+            "generate_seconds": 0.0,
+            "model_extractions": 0,
+            "json_failures": 0,
+            "rule_fallbacks": 0,
+            "sections_scanned": 0,
+            "sections_reused": 0,
+            "cascade_documents": 0,
+            "cascade_escalated_documents": 0,
+            "cascade_sections": 0,
+            "cascade_escalated_sections": 0,
+            "cascade_chars": 0,
+            "cascade_escalated_chars": 0,
+        }
+        # Pipelines share one extractor across their extract threads.
+        self._stats_lock = threading.Lock()
+
+        threads = num_threads or int(os.getenv("S2S_EXTRACTOR_THREADS", "0"))
+        if threads > 0:
+            torch.set_num_threads(threads)
 
         if not self.force_rule_based:
             try:
                 base = AutoModelForSeq2SeqLM.from_pretrained(self.base_model_name)
                 if (self.adapter_dir / "adapter_config.json").exists():
                     self.model = PeftModel.from_pretrained(base, str(self.adapter_dir))
+                    weights = self.adapter_dir / "adapter_model.safetensors"
+                    self.adapter_hash = hash_file(weights) if weights.exists() else None
+                    if self.optimize_cpu:
+                        # Folding the LoRA deltas into the base weights removes the
+                        # extra adapter matmuls from every attention projection.
+                        self.model = self.model.merge_and_unload()
                 else:
                     self.model = base
                 self.model.to(self.device)
                 self.model.eval()
+                if self.quantize_int8:
+                    self.model = torch.ao.quantization.quantize_dynamic(
+                        self.model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                if constrained or self.greedy:
+                    # Greedy decoding only uses the grammar to tell when the object is complete.
+                    # ``max_length`` counts the decoder start token.
+                    self.schema_processor = SchemaLogitsProcessor.for_schema(
+                        self.tokenizer, SCHEMA_PROMPT, max_new_tokens=self.generation_kwargs["max_length"] - 1
+                    )
             except Exception as exc:  # pragma: no cover
                 self.force_rule_based = True
                 log_interaction(
@@ -63,55 +176,274 @@ class AssignmentExtractor:
                     response=str(exc),
                     metadata={"adapter_dir": str(self.adapter_dir)},
                 )
+        if self.model is not None:
+            self.generation_cache = GenerationCache.resolve(generation_cache)
+
+    def share(self) -> "AssignmentExtractor":
+        """An extractor over this one's tokenizer, weights and generation cache, with its own stats.
 
-    def extract(self, text: str, source_doc: str) -> AssignmentRecord:
+        Pipelines running side by side each take one, so one warm model serves
+        them all while their counters stay separate.
+        """
+        shared = copy.copy(self)
+        shared.stats = {key: type(value)() for key, value in self.stats.items()}
+        shared._stats_lock = threading.Lock()
+        return shared
+
+    def extract(self, text: Union[str, ParsedDocument], source_doc: str) -> AssignmentRecord:
         """Generate a primary AssignmentRecord from raw text."""
-        records = self.extract_many(text, source_doc)
+        parsed = as_parsed(text)
+        records = self.extract_many(parsed, source_doc)
         if records:
             return records[0]
-        raw = self._rule_based_single(text)
+        raw = self._rule_based_single(parsed)
         record, _ = normalize_assignment(raw, source_doc)
         return record
 
-    def extract_many(self, text: str, source_doc: str) -> List[AssignmentRecord]:
-        """Return one or more AssignmentRecords extracted from the document."""
+    def extract_many(
+        self, text: Union[str, ParsedDocument], source_doc: str, sections: Optional[Dict[str, Any]] = None
+    ) -> List[AssignmentRecord]:
+        """Return one or more AssignmentRecords extracted from the document.
+
+        ``text`` may already be a ``ParsedDocument``. ``sections`` holds the
+        rule-based scan of a previous version of the document (start with
+        ``{}``); only sections whose text or context changed are rescanned,
+        and the dict is updated for the next call.
+        """
+        parsed = as_parsed(text)
         if self.force_rule_based or self.model is None:
-            records = self._rule_based_many(text, source_doc)
+            records = self._rule_based_many(parsed, source_doc, sections)
             if records:
                 return records
-            raw = self._rule_based_single(text)
+            raw = self._rule_based_single(parsed)
             record, _ = normalize_assignment(raw, source_doc)
             return [record]
+        if self.cascade:
+            return self._cascade_many([parsed], [source_doc], [sections], self.cascade_batch_size)[0]
+
+        self._count("model_extractions")
+        decoded = self._generate(self._prompt(parsed.text))
+        return self._records_from_output(decoded, parsed, source_doc)
 
-        prompt = (
+    def extract_batch(
+        self, texts: Sequence[str], source_docs: Sequence[str], batch_size: int = 8
+    ) -> List[List[AssignmentRecord]]:
+        """``extract_many`` over several documents, decoding model prompts ``batch_size`` at a time."""
+        if self.force_rule_based or self.model is None:
+            return [self.extract_many(text, source_doc) for text, source_doc in zip(texts, source_docs)]
+        if self.cascade:
+            parsed = [ParsedDocument(text) for text in texts]
+            return self._cascade_many(parsed, list(source_docs), [None] * len(texts), batch_size)
+        self._count("model_extractions", len(texts))
+        outputs = self._generate_many([self._prompt(text) for text in texts], batch_size=batch_size)
+        return [
+            self._records_from_output(decoded, ParsedDocument(text), source_doc)
+            for decoded, text, source_doc in zip(outputs, texts, source_docs)
+        ]
+
+    def _cascade_many(
+        self,
+        parsed_docs: List[ParsedDocument],
+        source_docs: List[str],
+        sections: List[Optional[Dict[str, Any]]],
+        batch_size: int,
+    ) -> List[List[AssignmentRecord]]:
+        """Rule-based extraction, with low-scoring sections of every document re-extracted by the model.
+
+        Escalated sections are decoded together, ``batch_size`` at a time.
+        A section keeps its rule candidates when the model returns nothing usable.
+        """
+        prompts: List[str] = []
+        owners: List[Tuple[int, int]] = []
+        for doc_idx, parsed in enumerate(parsed_docs):
+            parsed.candidates = self._scan_sections(parsed, {} if sections[doc_idx] is None else sections[doc_idx])
+            escalated = 0
+            for section_idx, (start, end, candidates) in enumerate(parsed.sections or []):
+                chars = sum(len(line.raw) + 1 for line in parsed.lines[start:end])
+                self._count("cascade_sections")
+                self._count("cascade_chars", chars)
+                score = section_score(parsed.lines[start:end], candidates)
+                if score is None or score >= self.cascade_threshold:
+                    continue
+                # The lookback lines carry the heading a section's entries belong to.
+                context = parsed.lines[max(0, start - _LOOKBACK) : end]
+                prompts.append(self._prompt("\n".join(line.raw for line in context)))
+                owners.append((doc_idx, section_idx))
+                escalated += 1
+                self._count("cascade_escalated_sections")
+                self._count("cascade_escalated_chars", chars)
+            self._count("cascade_documents")
+            self._count("cascade_escalated_documents", int(escalated > 0))
+
+        self._count("model_extractions", len(prompts))
+        replaced: Dict[Tuple[int, int], List[AssignmentRecord]] = {}
+        for owner, decoded in zip(owners, self._generate_many(prompts, batch_size=batch_size) if prompts else []):
+            doc_idx, _ = owner
+            found = self._model_records(decoded, parsed_docs[doc_idx], source_docs[doc_idx])
+            if found:
+                replaced[owner] = found
+            else:
+                self._count("rule_fallbacks")
+
+        results: List[List[AssignmentRecord]] = []
+        for doc_idx, (parsed, source_doc) in enumerate(zip(parsed_docs, source_docs)):
+            kept: List[Dict[str, Any]] = []
+            model_records: List[AssignmentRecord] = []
+            for section_idx, (_, _, candidates) in enumerate(parsed.sections or []):
+                if (doc_idx, section_idx) in replaced:
+                    model_records.extend(replaced[(doc_idx, section_idx)])
+                else:
+                    kept.extend(candidates)
+            records = _merge_candidates(kept, parsed.course, source_doc, scored=True)
+            seen = {(record.assignment_title.lower(), record.due_datetime_iso) for record in records}
+            for record in model_records:
+                key = (record.assignment_title.lower(), record.due_datetime_iso)
+                if key not in seen:
+                    seen.add(key)
+                    records.append(record)
+            if not records:
+                record, _ = normalize_assignment(self._rule_based_single(parsed), source_doc)
+                records = [record]
+            log_interaction(
+                "cascade_extract_many",
+                parsed.text[:1200],
+                json.dumps([record.dict_for_storage() for record in records]),
+                {"escalated_sections": sum(1 for owner in owners if owner[0] == doc_idx)},
+            )
+            results.append(records)
+        return results
+
+    def _model_records(self, decoded: str, parsed: ParsedDocument, source_doc: str) -> List[AssignmentRecord]:
+        """Records the model produced; unparseable or placeholder output counts as nothing."""
+        data = self._repair_json(decoded)
+        records: List[AssignmentRecord] = []
+        for item in data if isinstance(data, list) else [data]:
+            title = item.get("assignment_title")
+            if not isinstance(title, str) or title.strip() in ("", "Untitled Assignment"):
+                continue
+            if not item.get("course"):
+                item["course"] = parsed.course
+            try:
+                record, _ = normalize_assignment(item, source_doc)
+            except Exception:
+                continue
+            records.append(record)
+        return records
+
+    def cascade_rates(self) -> Dict[str, float]:
+        """Share of text, sections and documents the cascade sent to the model."""
+        stats = self.stats
+        return {
+            "escalated_text_share": stats["cascade_escalated_chars"] / max(stats["cascade_chars"], 1),
+            "escalated_section_share": stats["cascade_escalated_sections"] / max(stats["cascade_sections"], 1),
+            "model_free_document_share": 1.0
+            - stats["cascade_escalated_documents"] / max(stats["cascade_documents"], 1),
+        }
+
+    def _prompt(self, text: str) -> str:
+        return (
             "Extract JSON with schema: "
             f"{SCHEMA_PROMPT}. "
             "Only output valid JSON. "
             "Input:\n"
             f"{text.strip()}"
         )
-        inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True, max_length=768).to(self.device)
+
+    def _records_from_output(self, decoded: str, parsed: ParsedDocument, source_doc: str) -> List[AssignmentRecord]:
+        """Model records for a whole document, or the rule-based extraction when the model gave nothing usable."""
+        records = self._model_records(decoded, parsed, source_doc)
+        if records:
+            return records
+        self._count("rule_fallbacks")
+        records = self._rule_based_many(parsed, source_doc)
+        if records:
+            return records
+        record, _ = normalize_assignment(self._rule_based_single(parsed), source_doc)
+        return [record]
+
+    def _generate(self, prompt: str) -> str:
+        """Decode the model output for prompt, consulting the generation cache first."""
+        return self._generate_many([prompt])[0]
+
+    def _generate_many(self, prompts: List[str], batch_size: int = 1) -> List[str]:
+        """Decode uncached prompts in padded batches; cached outputs are reused."""
+        keys: List[Optional[str]] = [None] * len(prompts)
+        outputs: List[Optional[str]] = [None] * len(prompts)
+        if self.generation_cache is not None:
+            params = dict(
+                self.generation_kwargs,
+                input_max_length=768,
+                device=self.device,
+                int8=self.quantize_int8,
+                stop_on_schema=self.schema_processor is not None,
+                constrained=self.constrained,
+            )
+            keys = [GenerationCache.make_key(self.base_model_name, self.adapter_hash, params, p) for p in prompts]
+            cached = self.generation_cache.get_many(keys)
+            outputs = [cached.get(key) for key in keys]
+        pending = [idx for idx, output in enumerate(outputs) if output is None]
+        size = max(1, batch_size)
+        fresh: Dict[str, str] = {}
+        for begin in range(0, len(pending), size):
+            chunk = pending[begin : begin + size]
+            for idx, decoded in zip(chunk, self._decode_batch([prompts[idx] for idx in chunk])):
+                outputs[idx] = decoded
+                log_interaction("assignment_prompt", prompts[idx], decoded)
+                if keys[idx] is not None:
+                    fresh[keys[idx]] = decoded
+        if fresh and self.generation_cache is not None:
+            self.generation_cache.put_many(fresh, model=self.base_model_name)
+        return [output or "" for output in outputs]
+
+    def _decode_batch(self, prompts: List[str]) -> List[str]:
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True, max_length=768).to(
+            self.device
+        )
+        logits_processor = None
+        stopping_criteria = None
+        # A processor per call: its prefix states must not mix with another thread's batch.
+        schema_processor = self.schema_processor.fresh() if self.schema_processor is not None else None
+        if schema_processor is not None:
+            stopping_criteria = StoppingCriteriaList([SchemaStop(schema_processor)])
+            if self.constrained:
+                logits_processor = LogitsProcessorList([schema_processor])
+        started = time.perf_counter()
         with torch.no_grad():
             outputs = self.model.generate(
                 **inputs,
-                max_length=512,
-                num_beams=4,
-                early_stopping=True,
+                **self.generation_kwargs,
+                stopping_criteria=stopping_criteria,
+                logits_processor=logits_processor,
             )
-        decoded = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-        log_interaction("assignment_prompt", prompt, decoded)
-        data = self._repair_json(decoded)
-        parsed_items = data if isinstance(data, list) else [data]
-        records: List[AssignmentRecord] = []
-        for item in parsed_items:
-            try:
-                record, _ = normalize_assignment(item, source_doc)
-                records.append(record)
-            except Exception:
-                continue
-        if records:
-            return records
-        return self._rule_based_many(text, source_doc)
+        self._count("generate_seconds", time.perf_counter() - started)
+        self._count("generate_calls")
+        self._count("generated_tokens", generated_steps(outputs, self.tokenizer.eos_token_id))
+        decoded = []
+        for row in outputs:
+            text = self.tokenizer.decode(row, skip_special_tokens=True)
+            if schema_processor is not None:
+                # Render from the validated token text so implicit braces are restored.
+                text = schema_processor.render(row.tolist()) or text
+            decoded.append(text)
+        return decoded
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def tokens_per_second(self) -> float:
+        seconds = self.stats["generate_seconds"]
+        return self.stats["generated_tokens"] / seconds if seconds else 0.0
+
+    def fallback_rates(self) -> Dict[str, float]:
+        """Share of model extractions whose output failed to parse or needed the rule-based pass."""
+        total = self.stats["model_extractions"]
+        if not total:
+            return {"json_failure_rate": 0.0, "rule_fallback_rate": 0.0}
+        return {
+            "json_failure_rate": self.stats["json_failures"] / total,
+            "rule_fallback_rate": self.stats["rule_fallbacks"] / total,
+        }
 
     def _repair_json(self, candidate: str) -> Dict[str, Any]:
         candidate = candidate.strip()
@@ -124,6 +456,8 @@ class AssignmentExtractor:
             parsed = json.loads(candidate)
         except json.JSONDecodeError:
             parsed = {}
+        if not parsed:
+            self._count("json_failures")
         return self._normalize_parsed(parsed)
 
     def _normalize_parsed(self, parsed: Any) -> Any:
@@ -132,32 +466,18 @@ class AssignmentExtractor:
         if not isinstance(parsed, dict):
             parsed = {}
         if "due_datetime_iso" in parsed:
-            parsed["due_datetime_iso"] = self._coerce_date(parsed["due_datetime_iso"])
+            parsed["due_datetime_iso"] = coerce_date(parsed["due_datetime_iso"])
         if "deliverables" in parsed and isinstance(parsed["deliverables"], str):
             parsed["deliverables"] = [parsed["deliverables"]]
         parsed.setdefault("deliverables", [])
         parsed.setdefault("evidence_spans", [])
         parsed.setdefault("assignment_title", "Untitled Assignment")
         parsed.setdefault("confidence", 0.55)
-        parsed.setdefault("due_datetime_iso", self._coerce_date("next friday at 11:59 pm"))
+        parsed.setdefault("due_datetime_iso", coerce_date("next friday at 11:59 pm"))
         return parsed
 
-    def _coerce_date(self, text: str) -> str:
-        if not text:
-            return "1970-01-01T00:00:00"
-        cleaned = text.strip()
-        cleaned = cleaned.lstrip("•-–—* ").strip()
-        match = re.search(r"due[^:]*:\s*(.+)", cleaned, flags=re.IGNORECASE)
-        if match:
-            cleaned = match.group(1)
-        cleaned = re.sub(r"^[A-Za-z\s]*[:\-]\s*", "", cleaned, flags=re.IGNORECASE)
-        parsed = dateparser.parse(cleaned)
-        if not parsed:
-            return "1970-01-01T00:00:00"
-        return parsed.replace(microsecond=0).isoformat()
-
-    def _rule_based_single(self, text: str) -> Dict[str, Any]:
-        records = self._rule_based_many(text, "")
+    def _rule_based_single(self, parsed: ParsedDocument) -> Dict[str, Any]:
+        records = self._rule_based_many(parsed, "")
         if records:
             data = records[0].dict_for_storage()
             data["source_doc"] = ""
@@ -165,7 +485,7 @@ class AssignmentExtractor:
         return {
             "course": None,
             "assignment_title": "Untitled Assignment",
-            "due_datetime_iso": self._coerce_date("next friday at 11:59 pm"),
+            "due_datetime_iso": coerce_date("next friday at 11:59 pm"),
             "deliverables": ["Submission per instructions"],
             "points_or_weight": None,
             "source_doc": "",
@@ -173,120 +493,80 @@ class AssignmentExtractor:
             "confidence": 0.35,
         }
 
-    def _rule_based_many(self, text: str, source_doc: str) -> List[AssignmentRecord]:
-        default_due = "1970-01-01T00:00:00"
-        lines: List[Dict[str, str]] = []
-        for raw in text.splitlines():
-            clean = re.sub(r"\s+", " ", raw.strip().lstrip("•*-–— ")).strip()
-            lines.append({"raw": raw, "clean": clean, "lower": clean.lower()})
-
-        course = None
-        for info in lines:
-            clean = info["clean"]
-            lower = info["lower"]
-            if not clean:
-                continue
-            if "course:" in lower:
-                course = clean.split(":", 1)[-1].strip()
-                break
-        if course is None:
-            for info in lines:
-                if info["clean"]:
-                    course = info["clean"]
-                    break
-
-        header_keywords = {
-            "assignment",
-            "milestone",
-            "project",
-            "homework",
-            "lab",
-            "quiz",
-            "peer",
-            "final",
-            "midterm",
-            "design",
-            "reflection",
-            "task",
-            "deliverable",
-            "report",
-            "proposal",
-            "presentation",
-            "brief",
-            "showcase",
-        }
-        header_suffixes = (
-            "assignment",
-            "project",
-            "homework",
-            "report",
-            "proposal",
-            "presentation",
-            "forms",
-            "packet",
-            "guide",
-            "brief",
-            "critique",
-            "journal",
-            "deliverables",
-            "reflection",
+    def _rule_based_many(
+        self, parsed: ParsedDocument, source_doc: str, sections: Optional[Dict[str, Any]] = None
+    ) -> List[AssignmentRecord]:
+        # The candidates do not depend on source_doc, so a second pass reuses them.
+        if sections is not None:
+            parsed.candidates = self._scan_sections(parsed, sections)
+        elif parsed.candidates is None:
+            parsed.candidates, _ = self._scan_lines(parsed, 0, len(parsed.lines), None)
+        assignments = _merge_candidates(parsed.candidates, parsed.course, source_doc)
+        log_interaction(
+            "rule_based_extract_many",
+            parsed.text[:1200],
+            json.dumps([record.dict_for_storage() for record in assignments]),
         )
-        due_keywords = {
-            "due",
-            "deadline",
-            "submission",
-            "submit",
-            "report",
-            "presentation",
-            "demo",
-            "meeting",
-            "session",
-            "exam",
-            "quiz",
-            "review",
-            "showcase",
-        }
-        forbid_due = {"assigned", "release", "opens"}
-        deliverable_keywords = {"deliverable", "deliverables", "submission", "submit"}
-        weight_keywords = {"weight", "worth", "points", "percent", "%", "counts"}
+        return assignments
 
-        def is_header(clean: str, lower: str) -> bool:
-            if not clean:
-                return False
-            if re.match(r"^\d+[\).]\s*", clean):
-                return True
-            if ":" in clean:
-                prefix = clean.split(":", 1)[0].lower()
-                base = prefix.split()[0]
-                if prefix in header_keywords or base in header_keywords:
-                    return True
-            if clean.isupper() and len(clean) <= 40:
-                return True
-            return False
-
-        def strip_title(title: str) -> str:
-            cleaned = re.sub(r"^\d+[\).]\s*", "", title).strip(":-• ")
-            parts = cleaned.split(":", 1)
-            if len(parts) == 2 and parts[0].lower() in header_keywords:
-                cleaned = parts[1].strip()
-            return cleaned or title.strip()
-
-        assignments: List[AssignmentRecord] = []
-        seen: Dict[tuple, int] = {}
-        current_title: Optional[str] = None
-
-        for idx, info in enumerate(lines):
-            clean = info["clean"]
-            lower = info["lower"]
+    def _scan_sections(self, parsed: ParsedDocument, sections: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Scan section by section, reusing results whose inputs are unchanged.
+
+        A section's candidates and outgoing title depend only on the incoming
+        title, its own lines and the lookback/lookahead lines around it, so
+        those form the key and a reused entry equals a fresh scan. ``sections``
+        is rewritten to hold just this text's entries, retiring stale ones.
+        """
+        candidates: List[Dict[str, Any]] = []
+        live: Dict[str, Any] = {}
+        title: Optional[str] = None
+        lines = parsed.lines
+        parsed.sections = []
+        for start, end in _section_bounds(lines):
+            key = hash_text(
+                json.dumps(
+                    [
+                        title,
+                        [line.clean for line in lines[max(0, start - _LOOKBACK) : start]],
+                        [line.clean for line in lines[start:end]],
+                        [line.clean for line in lines[end : end + _LOOKAHEAD]],
+                    ]
+                )
+            )
+            entry = sections.get(key)
+            if entry is None:
+                found, exit_title = self._scan_lines(parsed, start, end, title)
+                entry = {"title": exit_title, "candidates": found}
+                self._count("sections_scanned")
+            else:
+                self._count("sections_reused")
+            live[key] = entry
+            parsed.sections.append((start, end, entry["candidates"]))
+            candidates.extend(entry["candidates"])
+            title = entry["title"]
+        sections.clear()
+        sections.update(live)
+        return candidates
+
+    def _scan_lines(
+        self, parsed: ParsedDocument, start: int, end: int, current_title: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Due-date candidates of ``parsed.lines[start:end]`` in order, plus the title in effect after them."""
+        lines = parsed.lines
+        candidates: List[Dict[str, Any]] = []
+        for idx in range(start, end):
+            line = lines[idx]
+            clean = line.clean
+            lower = line.lower
             if not clean:
                 continue
 
-            due_iso = self._coerce_date(clean)
+            due_iso = parsed.due(clean)
             if (
-                due_iso != default_due
-                and not any(forbidden in lower for forbidden in forbid_due)
+                due_iso != DEFAULT_DUE
+                and not any(forbidden in lower for forbidden in _FORBID_DUE)
                 and (
-                    any(keyword in lower for keyword in due_keywords)
+                    any(keyword in lower for keyword in _DUE_KEYWORDS)
                     or re.search(r"\b(at|by)\b", lower)
                 )
             ):
@@ -297,24 +577,22 @@ class AssignmentExtractor:
                 if "demo date" in lower and "submission" not in lower:
                     continue
 
-                title = strip_title(current_title or clean)
+                title = _strip_title(current_title or clean)
 
                 deliverables: List[str] = []
                 points: Optional[str] = None
 
-                for j in range(idx + 1, min(len(lines), idx + 6)):
+                for j in range(idx + 1, min(len(lines), idx + 1 + _LOOKAHEAD)):
                     nxt = lines[j]
-                    nxt_clean = nxt["clean"]
-                    nxt_lower = nxt["lower"]
+                    nxt_clean = nxt.clean
+                    nxt_lower = nxt.lower
                     if not nxt_clean:
                         break
-                    if is_header(nxt_clean, nxt_lower):
+                    if nxt.header:
                         break
-                    if self._coerce_date(nxt_clean) != default_due and any(
-                        keyword in nxt_lower for keyword in due_keywords
-                    ):
+                    if parsed.due(nxt_clean) != DEFAULT_DUE and any(keyword in nxt_lower for keyword in _DUE_KEYWORDS):
                         break
-                    if any(keyword in nxt_lower for keyword in deliverable_keywords):
+                    if any(keyword in nxt_lower for keyword in _DELIVERABLE_KEYWORDS):
                         value = re.sub(
                             r"^[A-Za-z\s]+:\s*",
                             "",
@@ -323,60 +601,33 @@ class AssignmentExtractor:
                         ).strip()
                         if value:
                             deliverables.append(value)
-                    if points is None and any(keyword in nxt_lower for keyword in weight_keywords):
+                    if points is None and any(keyword in nxt_lower for keyword in _WEIGHT_KEYWORDS):
                         points = nxt_clean
 
                 if points is None:
-                    for j in range(idx - 1, idx - 4, -1):
+                    for j in range(idx - 1, idx - 1 - _LOOKBACK, -1):
                         if j < 0:
                             break
-                        prev_clean = lines[j]["clean"]
-                        prev_lower = lines[j]["lower"]
-                        if any(keyword in prev_lower for keyword in weight_keywords):
+                        prev_clean = lines[j].clean
+                        prev_lower = lines[j].lower
+                        if any(keyword in prev_lower for keyword in _WEIGHT_KEYWORDS):
                             points = prev_clean
                             break
 
                 if not deliverables:
                     deliverables = ["Submission per instructions"]
 
-                key = (title.lower(), due_iso)
-                if key in seen:
-                    idx_existing = seen[key]
-                    existing = assignments[idx_existing]
-                    updates: Dict[str, Any] = {}
-                    if existing.points_or_weight is None and points:
-                        updates["points_or_weight"] = points
-                    if (
-                        existing.deliverables == ["Submission per instructions"]
-                        and deliverables != ["Submission per instructions"]
-                    ):
-                        updates["deliverables"] = deliverables
-                    if updates:
-                        assignments[idx_existing] = existing.copy(update=updates)
-                    continue
-
-                raw = {
-                    "course": course,
-                    "assignment_title": title,
-                    "due_datetime_iso": due_iso,
-                    "deliverables": deliverables,
-                    "points_or_weight": points,
-                    "source_doc": source_doc,
-                    "evidence_spans": [clean],
-                    "confidence": 0.35,
-                }
-                record, _ = normalize_assignment(raw, source_doc or "rule_based")
-                assignments.append(record)
-                seen[key] = len(assignments) - 1
-
+                candidates.append(
+                    {"title": title, "due": due_iso, "deliverables": deliverables, "points": points, "evidence": clean}
+                )
                 continue
 
-            if is_header(clean, lower):
-                current_title = strip_title(clean)
+            if line.header:
+                current_title = _strip_title(clean)
                 continue
 
-            if clean and any(clean.lower().endswith(suffix) for suffix in header_suffixes):
-                current_title = strip_title(clean)
+            if clean and any(clean.lower().endswith(suffix) for suffix in _HEADER_SUFFIXES):
+                current_title = _strip_title(clean)
                 continue
 
             elif (
@@ -388,11 +639,136 @@ class AssignmentExtractor:
                 and len(clean.split()) <= 8
                 and not lower.startswith(("course", "instructor", "notes", "semester", "policies"))
             ):
-                current_title = strip_title(clean)
-
-        log_interaction(
-            "rule_based_extract_many",
-            text[:1200],
-            json.dumps([record.dict_for_storage() for record in assignments]),
-        )
-        return assignments
+                current_title = _strip_title(clean)
+
+        return candidates, current_title
+
+
+_HEADER_SUFFIXES = (
+    "assignment",
+    "project",
+    "homework",
+    "report",
+    "proposal",
+    "presentation",
+    "forms",
+    "packet",
+    "guide",
+    "brief",
+    "critique",
+    "journal",
+    "deliverables",
+    "reflection",
+)
+_DUE_KEYWORDS = {
+    "due",
+    "deadline",
+    "submission",
+    "submit",
+    "report",
+    "presentation",
+    "demo",
+    "meeting",
+    "session",
+    "exam",
+    "quiz",
+    "review",
+    "showcase",
+}
+_FORBID_DUE = {"assigned", "release", "opens"}
+_DELIVERABLE_KEYWORDS = {"deliverable", "deliverables", "submission", "submit"}
+_WEIGHT_KEYWORDS = {"weight", "worth", "points", "percent", "%", "counts"}
+_DUE_CUE = re.compile(r"\b(due|deadline)\b")
+
+# Lines a due line looks at before (for weights) and after (for deliverables).
+_LOOKBACK = 3
+_LOOKAHEAD = 5
+SECTION_MAX_LINES = 40
+
+
+def _section_bounds(lines: List[ParsedLine], max_lines: int = SECTION_MAX_LINES) -> List[Tuple[int, int]]:
+    """Split lines into paragraphs ending at a blank line, at most ``max_lines`` long."""
+    bounds: List[Tuple[int, int]] = []
+    start = 0
+    for idx, line in enumerate(lines):
+        if not line.clean or idx + 1 - start >= max_lines:
+            bounds.append((start, idx + 1))
+            start = idx + 1
+    if start < len(lines):
+        bounds.append((start, len(lines)))
+    return bounds
+
+
+def _strip_title(title: str) -> str:
+    cleaned = re.sub(r"^\d+[\).]\s*", "", title).strip(":-• ")
+    parts = cleaned.split(":", 1)
+    if len(parts) == 2 and parts[0].lower() in HEADER_KEYWORDS:
+        cleaned = parts[1].strip()
+    return cleaned or title.strip()
+
+
+def candidate_score(candidate: Dict[str, Any]) -> float:
+    """Completeness of a rule-based candidate: its due date, plus a heading title, deliverables and a weight."""
+    score = 0.4
+    if candidate["title"] != _strip_title(candidate["evidence"]):
+        score += 0.3  # titled by a heading rather than by the due line itself
+    if candidate["deliverables"] != ["Submission per instructions"]:
+        score += 0.15
+    if candidate["points"]:
+        score += 0.15
+    return round(score, 2)
+
+
+def section_score(lines: Sequence[ParsedLine], candidates: List[Dict[str, Any]]) -> Optional[float]:
+    """Lowest candidate score in a section; 0 when a due cue yielded no candidate, None when there is nothing to extract."""
+    if candidates:
+        return min(candidate_score(candidate) for candidate in candidates)
+    if any(_DUE_CUE.search(line.lower) and any(char.isdigit() for char in line.clean) for line in lines):
+        return 0.0
+    return None
+
+
+def _merge_candidates(
+    candidates: List[Dict[str, Any]], course: Optional[str], source_doc: str, scored: bool = False
+) -> List[AssignmentRecord]:
+    """Turn candidates into records, folding repeats of a (title, due) pair into the first.
+
+    ``scored`` sets each record's confidence to its ``candidate_score``.
+    """
+    assignments: List[AssignmentRecord] = []
+    seen: Dict[tuple, int] = {}
+    for candidate in candidates:
+        title = candidate["title"]
+        due_iso = candidate["due"]
+        deliverables = candidate["deliverables"]
+        points = candidate["points"]
+        key = (title.lower(), due_iso)
+        if key in seen:
+            idx_existing = seen[key]
+            existing = assignments[idx_existing]
+            updates: Dict[str, Any] = {}
+            if existing.points_or_weight is None and points:
+                updates["points_or_weight"] = points
+            if (
+                existing.deliverables == ["Submission per instructions"]
+                and deliverables != ["Submission per instructions"]
+            ):
+                updates["deliverables"] = deliverables
+            if updates:
+                assignments[idx_existing] = existing.copy(update=updates)
+            continue
+
+        raw = {
+            "course": course,
+            "assignment_title": title,
+            "due_datetime_iso": due_iso,
+            "deliverables": list(deliverables),
+            "points_or_weight": points,
+            "source_doc": source_doc,
+            "evidence_spans": [candidate["evidence"]],
+            "confidence": candidate_score(candidate) if scored else 0.35,
+        }
+        record, _ = normalize_assignment(raw, source_doc or "rule_based")
+        assignments.append(record)
+        seen[key] = len(assignments) - 1
+    return assignments
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import dateparser
+
+DEFAULT_DUE = "1970-01-01T00:00:00"
+
+HEADER_KEYWORDS = {
+    "assignment",
+    "milestone",
+    "project",
+    "homework",
+    "lab",
+    "quiz",
+    "peer",
+    "final",
+    "midterm",
+    "design",
+    "reflection",
+    "task",
+    "deliverable",
+    "report",
+    "proposal",
+    "presentation",
+    "brief",
+    "showcase",
+}
+
+
+def coerce_date(text: str) -> str:
+    """ISO datetime parsed from a line (the part after ``Due:`` when present), else ``DEFAULT_DUE``."""
+    if not text:
+        return DEFAULT_DUE
+    cleaned = text.strip()
+    cleaned = cleaned.lstrip("•-–—* ").strip()
+    match = re.search(r"due[^:]*:\s*(.+)", cleaned, flags=re.IGNORECASE)
+    if match:
+        cleaned = match.group(1)
+    cleaned = re.sub(r"^[A-Za-z\s]*[:\-]\s*", "", cleaned, flags=re.IGNORECASE)
+    parsed = dateparser.parse(cleaned)
+    if not parsed:
+        return DEFAULT_DUE
+    return parsed.replace(microsecond=0).isoformat()
+
+
+def is_header(clean: str, lower: str) -> bool:
+    if not clean:
+        return False
+    if re.match(r"^\d+[\).]\s*", clean):
+        return True
+    if ":" in clean:
+        prefix = clean.split(":", 1)[0].lower()
+        base = prefix.split()[0]
+        if prefix in HEADER_KEYWORDS or base in HEADER_KEYWORDS:
+            return True
+    if clean.isupper() and len(clean) <= 40:
+        return True
+    return False
+
+
+@dataclass(frozen=True)
+class ParsedLine:
+    raw: str
+    clean: str
+    lower: str
+    header: bool
+
+
+class ParsedDocument:
+    """A document split into cleaned lines, classified and date-parsed once.
+
+    Every extraction strategy (rule-based scan, model prompt, rule fallback)
+    works from the same instance. Dates are parsed lazily, at most once per
+    distinct line, and the rule-based candidates are kept after the first
+    scan, so falling back from one strategy to another never re-parses.
+    """
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.lines: List[ParsedLine] = []
+        for raw in text.splitlines():
+            clean = re.sub(r"\s+", " ", raw.strip().lstrip("•*-–— ")).strip()
+            lower = clean.lower()
+            self.lines.append(ParsedLine(raw=raw, clean=clean, lower=lower, header=is_header(clean, lower)))
+        self.course = self._course()
+        self.candidates: Optional[List[Dict[str, Any]]] = None
+        # (start, end, candidates) of each section after a section-by-section scan.
+        self.sections: Optional[List[Tuple[int, int, List[Dict[str, Any]]]]] = None
+        self.date_parses = 0
+        self._dates: Dict[str, str] = {}
+
+    def due(self, clean: str) -> str:
+        """``coerce_date`` of a line's clean text, memoized."""
+        if clean not in self._dates:
+            self._dates[clean] = coerce_date(clean)
+            self.date_parses += 1
+        return self._dates[clean]
+
+    def _course(self) -> Optional[str]:
+        for line in self.lines:
+            if line.clean and "course:" in line.lower:
+                return line.clean.split(":", 1)[-1].strip()
+        return next((line.clean for line in self.lines if line.clean), None)
+
+
+def as_parsed(text: Union[str, ParsedDocument]) -> ParsedDocument:
+    return text if isinstance(text, ParsedDocument) else ParsedDocument(text)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from s2s.utils import ensure_dir, hash_text
+
+DISABLED_VALUES = {"0", "off", "false", "no"}
+
+
+def default_cache_path() -> Path:
+    return Path(os.getenv("S2S_DATA_DIR", "data")) / "processed" / "generation_cache.sqlite"
+
+
+class GenerationCache:
+    """Persistent prompt -> decoded output memo shared by the extractor and planner models.
+
+    Entries are keyed by model id, adapter hash, generation parameters and prompt
+    hash, stored in sqlite, and evicted least-recently-used once ``max_entries``
+    is exceeded.
+    """
+
+    _shared: Dict[str, "GenerationCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: Optional[Path] = None, max_entries: Optional[int] = None) -> None:
+        self.path = Path(path or default_cache_path())
+        self.max_entries = max_entries or int(os.getenv("S2S_GENERATION_CACHE_SIZE", "20000"))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        ensure_dir(self.path.parent)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS generations (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                last_used REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS generations_last_used ON generations (last_used)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM generations").fetchone()[0]
+
+    @classmethod
+    def shared(cls, path: Optional[Path] = None) -> "GenerationCache":
+        """Process-wide instance per cache file so every model shares one connection."""
+        resolved = str(Path(path or default_cache_path()).resolve())
+        with cls._shared_lock:
+            if resolved not in cls._shared:
+                cls._shared[resolved] = cls(Path(resolved))
+            return cls._shared[resolved]
+
+    @classmethod
+    def resolve(cls, setting: Union["GenerationCache", bool, None]) -> Optional["GenerationCache"]:
+        """Map a constructor argument to a cache: an instance, the shared cache, or None when disabled."""
+        if isinstance(setting, GenerationCache):
+            return setting
+        if setting is False or os.getenv("S2S_GENERATION_CACHE", "1").lower() in DISABLED_VALUES:
+            return None
+        return cls.shared()
+
+    @classmethod
+    def report(cls) -> Optional[str]:
+        """Hit rate across shared caches that saw lookups in this process."""
+        hits = sum(cache.hits for cache in cls._shared.values())
+        total = hits + sum(cache.misses for cache in cls._shared.values())
+        if not total:
+            return None
+        return f"generation cache hits {hits}/{total} ({hits / total:.0%})"
+
+    @staticmethod
+    def make_key(model_id: str, adapter_hash: Optional[str], params: Dict[str, Any], prompt: str) -> str:
+        return hash_text(json.dumps([model_id, adapter_hash, params, hash_text(prompt)], sort_keys=True))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, str] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                marks = ",".join("?" for _ in batch)
+                rows = self._conn.execute(
+                    f"SELECT key, response FROM generations WHERE key IN ({marks})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE generations SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[str]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, str], model: str = "") -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO generations (key, model, response, last_used) VALUES (?, ?, ?, ?)",
+                [(key, model, response, now) for key, response in items.items()],
+            )
+            self._count += self._conn.total_changes - before
+            if self._count > self.max_entries:
+                excess = self._count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM generations WHERE key IN "
+                    "(SELECT key FROM generations ORDER BY last_used ASC LIMIT ?)",
+                    (excess,),
+                )
+                self._count -= excess
+            self._conn.commit()
+
+    def put(self, key: str, response: str, model: str = "") -> None:
+        self.put_many({key: response}, model=model)
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM generations").rowcount
+            self._conn.commit()
+            self._count = 0
+        return removed
+
+    def size(self) -> int:
+        return self._count
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT key FROM generations ORDER BY last_used")]
@@ -2,26 +2,37 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence
 
 from s2s.utils import hash_text
 
 
 @dataclass
 class Document:
-    """Normalized document used across the pipeline."""
+    """Normalized document used across the pipeline.
+
+    Readers build documents from in-memory strings; documents loaded from a
+    project's text store are ``s2s.ingest.store.StoredDocument`` views.
+    """
 
     id: str
     path: str
     text: str
-    pages: List[str]
+    pages: Sequence[str]
+
+    def content_hash(self) -> str:
+        return hash_text(self.text)
+
+    def page_starts(self) -> Optional[List[int]]:
+        """Start offset of each page in ``text``, when known without searching for the pages."""
+        return None
 
     def to_dict(self) -> Dict[str, str]:
         return {
             "id": self.id,
             "path": self.path,
             "text": self.text,
-            "pages": self.pages,
+            "pages": list(self.pages),
         }
 
     @staticmethod
@@ -1,19 +1,337 @@
 from __future__ import annotations
 
+import codecs
+import os
+import re
+from html.parser import HTMLParser
 from pathlib import Path
-
-from bs4 import BeautifulSoup
+from typing import Dict, List, Optional, Tuple
 
 from s2s.ingest import Document
 
+HTML_PARSERS = ("auto", "lxml", "stdlib")
+
+CHUNK_SIZE = 1 << 16
+
+# Elements whose content is never syllabus text: scripts, styles and LMS chrome.
+BOILERPLATE_TAGS = {
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "iframe",
+    "nav",
+    "aside",
+    "footer",
+    "button",
+    "select",
+}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "menu", "menubar"}
+
+BLOCK_TAGS = {
+    "address",
+    "article",
+    "blockquote",
+    "body",
+    "dd",
+    "details",
+    "div",
+    "dl",
+    "dt",
+    "fieldset",
+    "figcaption",
+    "figure",
+    "form",
+    "header",
+    "hr",
+    "html",
+    "li",
+    "main",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "summary",
+    "table",
+    "title",
+    "ul",
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+
+_SPACES = re.compile(r"\s+")
+
+
+class _Table:
+    def __init__(self) -> None:
+        self.headers: List[str] = []
+        self.cells: List[str] = []
+        self.header_row = True
+        self.cell: Optional[List[str]] = None
+
+
+class HTMLTextBuilder:
+    """Turn a stream of start/end/data events into structured text lines.
+
+    Scripts, styles, navigation and other LMS chrome are dropped. Headings,
+    paragraphs and list items each become a line, with ``- `` or ``1. ``
+    markers on list items and a blank line before each heading, so the
+    rule-based extractor sees the same layout as a plain-text syllabus.
+    Table rows become one ``cell | cell`` line, or, when the table has a
+    ``<th>`` header row, a block of ``Header: value`` lines per row (``Due:
+    March 3``), which the extractor reads like any other assignment entry.
+
+    The same builder backs the lxml parser target and the stdlib
+    ``HTMLParser`` fallback, so both backends produce identical text.
+    """
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self._fragments: List[str] = []
+        self._prefix = ""
+        self._stack: List[Tuple[str, bool]] = []
+        self._skip = 0
+        self._pre = 0
+        self._lists: List[List[int]] = []
+        self._tables: List[_Table] = []
+
+    # Parser target interface (lxml calls these directly).
+    def start(self, tag: str, attrib: Dict[str, Optional[str]]) -> None:
+        tag = tag.lower()
+        if tag in VOID_TAGS:
+            if not self._skip:
+                self._void(tag)
+            return
+        skip = tag in BOILERPLATE_TAGS or _hidden(attrib)
+        self._stack.append((tag, skip))
+        if skip:
+            self._skip += 1
+        if self._skip:
+            return
+        table = self._tables[-1] if self._tables else None
+        if tag == "table":
+            self._break()
+            self._tables.append(_Table())
+        elif table is not None and tag == "tr":
+            self._end_cell(table)
+            if table.cells:  # previous row left open
+                self._row(table)
+            table.header_row = True
+        elif table is not None and tag in {"td", "th"}:
+            self._end_cell(table)
+            table.cell = []
+            table.header_row = table.header_row and tag == "th"
+        elif table is not None and table.cell is not None:
+            if tag in BLOCK_TAGS or tag in HEADING_TAGS:
+                table.cell.append(" ")
+        elif tag in HEADING_TAGS:
+            self._break()
+            self._blank()
+        elif tag in {"ul", "ol"}:
+            self._break()
+            self._lists.append([0 if tag == "ol" else -1])
+        elif tag == "li":
+            self._break()
+            self._prefix = self._item_marker()
+        elif tag == "pre":
+            self._break()
+            self._pre += 1
+        elif tag in BLOCK_TAGS:
+            self._break()
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower()
+        if tag in VOID_TAGS or not any(name == tag for name, _ in self._stack):
+            return  # void element, or a stray end tag the parser never opened
+        while self._stack:
+            name, skip = self._stack.pop()
+            if skip:
+                self._skip -= 1
+            elif not self._skip:
+                self._close(name)
+            if name == tag:
+                break
+
+    def data(self, text: str) -> None:
+        if self._skip or not text:
+            return
+        if self._tables and self._tables[-1].cell is not None:
+            self._tables[-1].cell.append(text)
+        elif self._pre:
+            head, *rest = text.split("\n")
+            self._fragments.append(head)
+            for part in rest:
+                self._break()
+                self._fragments.append(part)
+        else:
+            self._fragments.append(text)
+
+    def comment(self, text: str) -> None:
+        return None
+
+    def close(self) -> str:
+        while self._stack:
+            self.end(self._stack[-1][0])
+        self._break()
+        while self.lines and not self.lines[-1]:
+            self.lines.pop()
+        return "\n".join(self.lines)
+
+    # Helpers
+    def _close(self, tag: str) -> None:
+        table = self._tables[-1] if self._tables else None
+        if tag == "table" and table is not None:
+            self._end_cell(table)
+            if table.cells:
+                self._row(table)
+            self._tables.pop()
+            self._break()
+        elif table is not None and tag in {"td", "th"}:
+            self._end_cell(table)
+        elif table is not None and tag == "tr":
+            self._end_cell(table)
+            self._row(table)
+        elif table is not None and table.cell is not None:
+            if tag in BLOCK_TAGS or tag in HEADING_TAGS:
+                table.cell.append(" ")
+        elif tag in {"ul", "ol"}:
+            self._break()
+            if self._lists:
+                self._lists.pop()
+        elif tag == "pre":
+            self._break()
+            self._pre = max(0, self._pre - 1)
+        elif tag in BLOCK_TAGS or tag in HEADING_TAGS:
+            self._break()
+
+    def _void(self, tag: str) -> None:
+        if self._tables and self._tables[-1].cell is not None:
+            self._tables[-1].cell.append(" ")
+        elif tag in {"br", "hr"}:
+            self._break()
+
+    def _end_cell(self, table: _Table) -> None:
+        if table.cell is not None:
+            table.cells.append(_collapse("".join(table.cell)))
+            table.cell = None
+
+    def _row(self, table: _Table) -> None:
+        cells = table.cells
+        table.cells = []
+        if not any(cells):
+            return
+        if table.header_row and not table.headers:
+            table.headers = cells
+            return
+        if table.headers:
+            self._blank()
+            for header, cell in zip(table.headers, cells):
+                if cell:
+                    self._emit(f"{header}: {cell}" if header else cell)
+            for cell in cells[len(table.headers) :]:
+                if cell:
+                    self._emit(cell)
+        else:
+            self._emit(" | ".join(cell for cell in cells if cell))
 
-def read_html_or_text(path: Path) -> Document:
+    def _item_marker(self) -> str:
+        if not self._lists:
+            return "- "
+        counter = self._lists[-1]
+        if counter[0] < 0:
+            return "- "
+        counter[0] += 1
+        return f"{counter[0]}. "
+
+    def _break(self) -> None:
+        """End the current line, if it has any text."""
+        if self._fragments:
+            line = "".join(self._fragments) if self._pre else _collapse("".join(self._fragments))
+            self._fragments = []
+            if line.strip():
+                self._emit(self._prefix + line)
+                self._prefix = ""
+
+    def _blank(self) -> None:
+        if self.lines and self.lines[-1]:
+            self.lines.append("")
+
+    def _emit(self, line: str) -> None:
+        self.lines.append(line.rstrip())
+
+
+class _StdlibParser(HTMLParser):
+    """Pure-Python fallback forwarding ``html.parser`` events to the builder."""
+
+    def __init__(self, builder: HTMLTextBuilder) -> None:
+        super().__init__(convert_charrefs=True)
+        self.builder = builder
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.builder.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        self.builder.start(tag, dict(attrs))
+        self.builder.end(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        self.builder.end(tag)
+
+    def handle_data(self, data: str) -> None:
+        self.builder.data(data)
+
+
+def html_parser_backend(name: Optional[str] = None) -> str:
+    """HTML parser to use (``S2S_HTML_PARSER``, default auto: lxml when installed)."""
+    name = (name or os.getenv("S2S_HTML_PARSER") or "auto").lower()
+    if name not in HTML_PARSERS:
+        raise ValueError(f"Unknown HTML parser '{name}'; expected one of {', '.join(HTML_PARSERS)}")
+    if name == "auto":
+        try:
+            import lxml.etree  # noqa: F401
+        except ImportError:
+            return "stdlib"
+        return "lxml"
+    return name
+
+
+def html_to_text(path: Path, parser: Optional[str] = None, chunk_size: int = CHUNK_SIZE) -> str:
+    """Structured text of an HTML file, parsed incrementally in ``chunk_size`` byte chunks."""
+    backend = html_parser_backend(parser)
+    builder = HTMLTextBuilder()
+    with Path(path).open("rb") as handle:
+        if backend == "lxml":
+            from lxml import etree
+
+            feed = etree.HTMLParser(target=builder, encoding="utf-8", remove_comments=True)
+            for chunk in iter(lambda: handle.read(chunk_size), b""):
+                feed.feed(chunk)
+            return feed.close()
+        stdlib = _StdlibParser(builder)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            stdlib.feed(decoder.decode(chunk))
+        stdlib.feed(decoder.decode(b"", final=True))
+        stdlib.close()
+        return builder.close()
+
+
+def read_html_or_text(path: Path, parser: Optional[str] = None) -> Document:
     """Parse HTML or plaintext announcements into Document objects."""
-    raw = path.read_text(encoding="utf-8")
     if path.suffix.lower() in {".html", ".htm"}:
-        soup = BeautifulSoup(raw, "html.parser")
-        text = soup.get_text(separator="\n")
+        text = html_to_text(path, parser)
     else:
-        text = raw
+        text = path.read_text(encoding="utf-8")
     doc_id = Document.make_id(path, text)
     return Document(id=doc_id, path=str(path), text=text, pages=[text])
+
+
+def _collapse(text: str) -> str:
+    return _SPACES.sub(" ", text).strip()
+
+
+def _hidden(attrib: Dict[str, Optional[str]]) -> bool:
+    if "hidden" in attrib or (attrib.get("aria-hidden") or "").lower() == "true":
+        return True
+    return (attrib.get("role") or "").lower() in BOILERPLATE_ROLES
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional
+
+from s2s.ingest import Document
+from s2s.ingest.html_reader import read_html_or_text
+from s2s.ingest.pdf_reader import read_pdf
+
+SUPPORTED_SUFFIXES = {".pdf", ".html", ".htm", ".txt"}
+
+
+def discover_sources(root: Path) -> List[Path]:
+    """Return supported source files under root in a stable order."""
+    return [
+        file_path
+        for file_path in sorted(Path(root).rglob("*"))
+        if file_path.is_file() and file_path.suffix.lower() in SUPPORTED_SUFFIXES
+    ]
+
+
+def load_document(path: Path) -> Optional[Document]:
+    """Dispatch a source file to the matching reader."""
+    suffix = path.suffix.lower()
+    if suffix == ".pdf":
+        return read_pdf(path)
+    if suffix in {".html", ".htm", ".txt"}:
+        return read_html_or_text(path)
+    return None
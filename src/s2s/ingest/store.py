@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from s2s.ingest import Document
+from s2s.utils import ensure_dir, hash_text, write_jsonl
+
+Span = Tuple[int, int]
+
+
+def text_store_path(documents_path: Path) -> Path:
+    """The blob holding the texts indexed by a ``<project>_documents.jsonl`` file."""
+    return Path(documents_path).with_suffix(".bin")
+
+
+def page_offsets(text: str, pages: Optional[Sequence[str]]) -> List[int]:
+    """Start offset of each page within ``text`` (pages appear in order)."""
+    starts: List[int] = []
+    cursor = 0
+    for page in pages or [text]:
+        found = text.find(page, cursor) if page else -1
+        start = found if found >= 0 else cursor
+        starts.append(start)
+        cursor = start + len(page)
+    return starts
+
+
+class TextStore:
+    """Document texts in one UTF-8 blob, read through a memory map.
+
+    Slices are decoded straight from the mapped pages, so only the documents
+    being read are resident. The map is re-opened when a read reaches past it,
+    which lets a ``DocumentWriter`` hand out documents while it is still
+    appending to the blob.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def read(self, start: int, end: int) -> str:
+        if end <= start:
+            return ""
+        buffer = self._mapped(end)
+        with memoryview(buffer) as view:
+            return str(view[start:end], "utf-8")
+
+    def _mapped(self, end: int) -> mmap.mmap:
+        current = self._map
+        if current is not None and len(current) >= end:
+            return current
+        with self._lock:
+            if self._map is None or len(self._map) < end:
+                # Earlier maps are left to the GC: other threads may still be decoding from them.
+                with self.path.open("rb") as handle:
+                    self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+
+
+class StoredPages(Sequence[str]):
+    """Lazy page list of a ``StoredDocument``; each page is decoded when indexed."""
+
+    def __init__(self, store: TextStore, spans: List[Span]) -> None:
+        self._store = store
+        self._spans = spans
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self._store.read(*span) for span in self._spans[index]]
+        return self._store.read(*self._spans[index])
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._store.read(*span) for span in self._spans)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, tuple, StoredPages)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"StoredPages({len(self)} pages)"
+
+
+class StoredDocument(Document):
+    """A ``Document`` whose ``text`` and ``pages`` are views into a ``TextStore``.
+
+    Only ids and offsets (as tuples) stay in memory; each access decodes the
+    slice again. Pickling (e.g. to a process pool) sends a plain ``Document``.
+    """
+
+    def __init__(
+        self,
+        store: TextStore,
+        id: str,
+        path: str,
+        sha1: str,
+        span: Span,
+        page_spans: Tuple[Span, ...],
+        starts: Tuple[int, ...],
+    ) -> None:
+        self.id = id
+        self.path = path
+        self.store = store
+        self.sha1 = sha1
+        self.span = span
+        self.page_spans = page_spans
+        self.starts = starts
+
+    @classmethod
+    def from_entry(cls, store: TextStore, entry: Dict[str, Any]) -> "StoredDocument":
+        return cls(
+            store,
+            entry["id"],
+            entry["path"],
+            entry["sha1"],
+            tuple(entry["text"]),
+            tuple(tuple(span) for span in entry["pages"]),
+            tuple(entry["page_starts"]),
+        )
+
+    @property
+    def entry(self) -> Dict[str, Any]:
+        """The document's row in the offset table."""
+        return {
+            "id": self.id,
+            "path": self.path,
+            "sha1": self.sha1,
+            "text": list(self.span),
+            "pages": [list(span) for span in self.page_spans],
+            "page_starts": list(self.starts),
+        }
+
+    @property
+    def text(self) -> str:  # type: ignore[override]
+        return self.store.read(*self.span)
+
+    @property
+    def pages(self) -> StoredPages:  # type: ignore[override]
+        return StoredPages(self.store, list(self.page_spans))
+
+    def content_hash(self) -> str:
+        return self.sha1
+
+    def page_starts(self) -> List[int]:
+        return list(self.starts)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return Document, (self.id, self.path, self.text, list(self.pages))
+
+    def __repr__(self) -> str:
+        return f"StoredDocument(id={self.id!r}, path={self.path!r}, span={self.span!r})"
+
+
+class DocumentWriter:
+    """Stream documents into a new text blob and offset table.
+
+    ``add`` appends a document's text (and any page that is not a slice of it)
+    and returns a ``StoredDocument`` over the new blob, so callers can drop the
+    in-memory strings. A document already in a store is copied byte for byte
+    without decoding. ``close`` swaps the blob into place and writes the JSONL
+    offset table; documents read from the previous blob stay readable.
+    """
+
+    def __init__(self, documents_path: Path) -> None:
+        self.documents_path = Path(documents_path)
+        self.blob_path = text_store_path(self.documents_path)
+        ensure_dir(self.blob_path.parent)
+        self._partial = self.blob_path.with_name(self.blob_path.name + ".partial")
+        self._handle = self._partial.open("wb")
+        self._size = 0
+        self.store = TextStore(self._partial)
+        self.documents: List[StoredDocument] = []
+
+    def add(self, doc: Document) -> StoredDocument:
+        if isinstance(doc, StoredDocument):
+            entry = self._copy(doc)
+        else:
+            entry = self._append(doc)
+        self._handle.flush()
+        stored = StoredDocument.from_entry(self.store, entry)
+        self.documents.append(stored)
+        return stored
+
+    def close(self, docs: Optional[Iterable[StoredDocument]] = None) -> None:
+        """Publish the blob and offset table, listing ``docs`` (default: every added document) in order."""
+        self._handle.close()
+        os.replace(self._partial, self.blob_path)
+        self.store.path = self.blob_path
+        write_jsonl(self.documents_path, (doc.entry for doc in (self.documents if docs is None else docs)))
+
+    def discard(self) -> None:
+        self._handle.close()
+        self._partial.unlink(missing_ok=True)
+
+    def __enter__(self) -> "DocumentWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def _write(self, data: bytes) -> Span:
+        start = self._size
+        self._handle.write(data)
+        self._size += len(data)
+        return start, self._size
+
+    def _append(self, doc: Document) -> Dict[str, Any]:
+        text = doc.text
+        pages = list(doc.pages)
+        starts = page_offsets(text, pages)
+        text_span = self._write(text.encode("utf-8"))
+        page_spans: List[Span] = []
+        char_cursor, byte_cursor = 0, text_span[0]
+        for page, start in zip(pages, starts):
+            if text.startswith(page, start):
+                byte_cursor += len(text[char_cursor:start].encode("utf-8"))
+                char_cursor = start
+                end = byte_cursor + len(page.encode("utf-8"))
+                page_spans.append((byte_cursor, end))
+            else:
+                page_spans.append(self._write(page.encode("utf-8")))
+        return {
+            "id": doc.id,
+            "path": doc.path,
+            "sha1": hash_text(text),
+            "text": list(text_span),
+            "pages": [list(span) for span in page_spans],
+            "page_starts": starts,
+        }
+
+    def _copy(self, doc: StoredDocument) -> Dict[str, Any]:
+        spans = [doc.span, *doc.page_spans]
+        first = min(start for start, _ in spans)
+        last = max(end for _, end in spans)
+        offset = self._size - first
+        if last > first:
+            with memoryview(doc.store._mapped(last)) as view:
+                self._write(view[first:last])
+        entry = doc.entry
+        entry["text"] = [start + offset for start in entry["text"]]
+        entry["pages"] = [[start + offset, end + offset] for start, end in entry["pages"]]
+        return entry
+
+
+def write_documents(documents_path: Path, docs: Iterable[Document]) -> List[StoredDocument]:
+    """Store ``docs`` as the project's text blob and offset table."""
+    with DocumentWriter(documents_path) as writer:
+        return [writer.add(doc) for doc in docs]
+
+
+def read_documents(documents_path: Path) -> List[Document]:
+    """Documents of a project, backed by its memory-mapped text blob.
+
+    Rows written before the blob existed carry their text inline and load as
+    plain ``Document`` objects.
+    """
+    store = TextStore(text_store_path(documents_path))
+    docs: List[Document] = []
+    if not Path(documents_path).exists():
+        return docs
+    # Row by row, so the parsed JSON of the whole table is never held at once.
+    with Path(documents_path).open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            inline = isinstance(row.get("text"), str)
+            docs.append(Document.from_dict(row) if inline else StoredDocument.from_entry(store, row))
+    return docs
@@ -0,0 +1,21 @@
+"""Pipeline orchestration exports."""
+
+from .batch import BatchProject, BatchResult, BatchRunner, ProjectSummary, load_manifest, write_summary
+from .orchestrator import PipelineOrchestrator, PipelineResult
+from .watch import ChangeSet, PollingWatcher, ProjectWatcher, WatchEvent, make_watcher
+
+__all__ = [
+    "BatchProject",
+    "BatchResult",
+    "BatchRunner",
+    "ChangeSet",
+    "PipelineOrchestrator",
+    "PipelineResult",
+    "PollingWatcher",
+    "ProjectSummary",
+    "ProjectWatcher",
+    "WatchEvent",
+    "load_manifest",
+    "make_watcher",
+    "write_summary",
+]
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from s2s.execute.deadlines import due_key
+from s2s.schemas import AssignmentRecord, Task
+from s2s.utils import ensure_dir, hash_text
+
+ARTIFACT_FORMATS = {"json": ".json", "parquet": ".parquet", "arrow": ".arrow"}
+
+ASSIGNMENT_FIELDS = [
+    "course",
+    "assignment_title",
+    "due_datetime_iso",
+    "deliverables",
+    "points_or_weight",
+    "source_doc",
+    "evidence_spans",
+    "confidence",
+]
+TASK_FIELDS = ["title", "hours_estimate", "earliest_start_iso", "due_iso", "depends_on"]
+
+
+def data_dir() -> Path:
+    return Path(os.getenv("S2S_DATA_DIR", "data"))
+
+
+def artifact_format(name: Optional[str] = None) -> str:
+    """Storage format of the assignment and plan artifacts (``S2S_ARTIFACT_FORMAT``, default json)."""
+    name = (name or os.getenv("S2S_ARTIFACT_FORMAT") or "json").lower()
+    if name not in ARTIFACT_FORMATS:
+        raise ValueError(f"Unknown artifact format '{name}'; expected one of {', '.join(ARTIFACT_FORMATS)}")
+    return name
+
+
+def project_paths(project: str, fmt: Optional[str] = None) -> Dict[str, Path]:
+    """Locations of every on-disk artifact produced for a project.
+
+    Exports go to ``out/<project>/`` so projects never overwrite each other.
+    The assignment and plan suffixes follow ``artifact_format``.
+    """
+    processed = ensure_dir(data_dir() / "processed")
+    out_dir = ensure_dir(Path("out"))
+    export_dir = out_dir / project
+    suffix = ARTIFACT_FORMATS[artifact_format(fmt)]
+    return {
+        "documents": processed / f"{project}_documents.jsonl",
+        "assignments": out_dir / f"{project}_assignments{suffix}",
+        "plan": out_dir / f"{project}_plan{suffix}",
+        "exports": export_dir,
+        "ics": export_dir / "calendar.ics",
+        "csv": export_dir / "tasks.csv",
+        "sqlite": export_dir / "tasks.db",
+        "deadlines": processed / "deadlines.sqlite",
+    }
+
+
+def plan_key(record: AssignmentRecord, idx: int) -> str:
+    """Key joining a JSON plan entry back to its assignment."""
+    return _plan_key(record.assignment_title, record.source_doc, idx)
+
+
+def _plan_key(title: str, source_doc: str, idx: int) -> str:
+    return f"{title}::{Path(source_doc).name}::{idx}"
+
+
+def assignment_ids(items: Sequence[Dict[str, Any]]) -> List[str]:
+    """Stable ids for extracted assignments.
+
+    An id hashes the source file name, title and due date, plus a counter for
+    exact repeats, so it survives reordering and changes in other documents.
+    """
+    seen: Dict[Tuple[str, str, str], int] = defaultdict(int)
+    ids = []
+    for item in items:
+        identity = (Path(item["source_doc"]).name, item["assignment_title"], item["due_datetime_iso"])
+        ids.append(hash_text(json.dumps([*identity, seen[identity]]))[:16])
+        seen[identity] += 1
+    return ids
+
+
+def is_columnar(path: Path) -> bool:
+    return path.suffix in (ARTIFACT_FORMATS["parquet"], ARTIFACT_FORMATS["arrow"])
+
+
+def write_assignments(path: Path, assignments: List[Dict[str, Any]]) -> None:
+    ensure_dir(path.parent)
+    if is_columnar(path):
+        _write_table(path, _assignments_table(assignments))
+        return
+    path.write_text(json.dumps(assignments, indent=2), encoding="utf-8")
+
+
+def load_assignments(path: Path) -> List[AssignmentRecord]:
+    if is_columnar(path):
+        return [AssignmentRecord(**row) for row in table_rows(read_table(path, ASSIGNMENT_FIELDS))]
+    return [AssignmentRecord(**item) for item in json.loads(path.read_text())]
+
+
+def write_plan(
+    path: Path, plans: Dict[str, List[Dict[str, Any]]], records: Optional[List[AssignmentRecord]] = None
+) -> None:
+    """Write the plans keyed by ``plan_key``.
+
+    The columnar formats store one row per task, linked to its assignment by
+    ``assignment_id``, and so need the ``records`` the plans were made for.
+    """
+    ensure_dir(path.parent)
+    if is_columnar(path):
+        if records is None:
+            raise ValueError("Columnar plan artifacts need the planned assignment records")
+        _write_table(path, _plan_table(plans, records))
+        return
+    path.write_text(json.dumps(plans, indent=2), encoding="utf-8")
+
+
+def load_paired(paths: Dict[str, Path]) -> List[Tuple[AssignmentRecord, List[Task]]]:
+    """Rebuild (assignment, tasks) pairs from the assignment and plan artifacts."""
+    return list(iter_paired(paths))
+
+
+def iter_paired(paths: Dict[str, Path]) -> Iterator[Tuple[AssignmentRecord, List[Task]]]:
+    """Yield (assignment, tasks) pairs in artifact order, building each record only when it is reached.
+
+    Exports feed these straight into their sinks, so validation overlaps with
+    writing and the records are never all held at once.
+    """
+    if not is_columnar(paths["plan"]):
+        if is_columnar(paths["assignments"]):
+            items = table_rows(read_table(paths["assignments"], ASSIGNMENT_FIELDS))
+        else:
+            items = json.loads(paths["assignments"].read_text())
+        plans_data = json.loads(paths["plan"].read_text())
+        for idx, item in enumerate(items):
+            assignment = AssignmentRecord(**item)
+            yield assignment, [Task(**task) for task in plans_data.get(plan_key(assignment, idx), [])]
+        return
+    rows = table_rows(read_table(paths["assignments"], ["assignment_id"] + ASSIGNMENT_FIELDS))
+    tasks: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for task in table_rows(read_table(paths["plan"], ["assignment_id"] + TASK_FIELDS)):
+        tasks[task.pop("assignment_id")].append(task)
+    for row in rows:
+        assignment_id = row.pop("assignment_id")
+        yield AssignmentRecord(**row), [Task(**task) for task in tasks.get(assignment_id, [])]
+
+
+def pair_plans(
+    assignments: List[AssignmentRecord], plans: Dict[str, List[Dict[str, Any]]]
+) -> List[Tuple[AssignmentRecord, List[Task]]]:
+    return [
+        (assignment, [Task(**task) for task in plans.get(plan_key(assignment, idx), [])])
+        for idx, assignment in enumerate(assignments)
+    ]
+
+
+def plan_rows(
+    paths: Dict[str, Path], assignment_fields: Sequence[str], task_fields: Sequence[str]
+) -> List[Dict[str, Any]]:
+    """One dict per planned task holding only the requested assignment and task fields.
+
+    Columnar artifacts are read column by column, so unused fields (evidence
+    spans, deliverables, dependencies) are never loaded.
+    """
+    if is_columnar(paths["plan"]):
+        assignments = table_rows(read_table(paths["assignments"], ["assignment_id", *assignment_fields]))
+        by_id = {row.pop("assignment_id"): row for row in assignments}
+        rows = []
+        for task in table_rows(read_table(paths["plan"], ["assignment_id", *task_fields])):
+            assignment = by_id.get(task.pop("assignment_id"))
+            if assignment is not None:
+                rows.append({**assignment, **task})
+        return rows
+    items = json.loads(paths["assignments"].read_text())
+    plans = json.loads(paths["plan"].read_text())
+    rows = []
+    for idx, item in enumerate(items):
+        for task in plans.get(_plan_key(item["assignment_title"], item["source_doc"], idx), []):
+            rows.append(
+                {
+                    **{name: item.get(name) for name in assignment_fields},
+                    **{name: task.get(name) for name in task_fields},
+                }
+            )
+    return rows
+
+
+def read_table(path: Path, columns: Optional[Sequence[str]] = None) -> Any:
+    """A ``pyarrow.Table`` of ``columns`` from a columnar artifact, memory-mapped.
+
+    Arrow IPC files are uncompressed, so their columns are zero-copy views of
+    the mapped file; Parquet columns are decoded from the mapped pages.
+    """
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    columns = list(columns) if columns is not None else None
+    if path.suffix == ARTIFACT_FORMATS["arrow"]:
+        return feather.read_table(str(path), columns=columns, memory_map=True)
+    return pq.read_table(str(path), columns=columns, memory_map=True)
+
+
+def table_rows(table: Any) -> List[Dict[str, Any]]:
+    """Rows of a table as dicts, converted column by column."""
+    columns = {name: _column_values(table.column(name)) for name in table.column_names}
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+def _column_values(column: Any) -> List[Any]:
+    # NumPy conversion is several times faster than ``to_pylist`` for flat columns.
+    import pyarrow as pa
+
+    column = column.combine_chunks() if isinstance(column, pa.ChunkedArray) else column
+    if pa.types.is_list(column.type):
+        values = _column_values(column.values)
+        offsets = column.offsets.to_numpy().tolist()
+        return [values[begin:end] for begin, end in zip(offsets, offsets[1:])]
+    return column.to_numpy(zero_copy_only=False).tolist()
+
+
+def _write_table(path: Path, table: Any) -> None:
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    if path.suffix == ARTIFACT_FORMATS["arrow"]:
+        feather.write_feather(table, str(path), compression="uncompressed")
+    else:
+        pq.write_table(table, str(path), compression="zstd")
+
+
+def _due_at(values: Sequence[Optional[str]]) -> List[Optional[datetime]]:
+    return [datetime.fromisoformat(due_key(value)) if value else None for value in values]
+
+
+def _assignments_table(items: List[Dict[str, Any]]) -> Any:
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [
+            ("assignment_id", pa.string()),
+            ("course", pa.string()),
+            ("assignment_title", pa.string()),
+            ("due_datetime_iso", pa.string()),
+            ("due_at", pa.timestamp("s", tz="UTC")),
+            ("deliverables", pa.list_(pa.string())),
+            ("points_or_weight", pa.string()),
+            ("source_doc", pa.string()),
+            ("evidence_spans", pa.list_(pa.string())),
+            ("confidence", pa.float64()),
+        ]
+    )
+    columns = {name: [item.get(name) for item in items] for name in ASSIGNMENT_FIELDS}
+    columns["assignment_id"] = assignment_ids(items)
+    columns["due_at"] = _due_at(columns["due_datetime_iso"])
+    for name in ("deliverables", "evidence_spans"):
+        columns[name] = [value or [] for value in columns[name]]
+    return pa.table(columns, schema=schema)
+
+
+def _plan_table(plans: Dict[str, List[Dict[str, Any]]], records: List[AssignmentRecord]) -> Any:
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [
+            ("assignment_id", pa.string()),
+            ("task_index", pa.int16()),
+            ("title", pa.string()),
+            ("hours_estimate", pa.float64()),
+            ("earliest_start_iso", pa.string()),
+            ("due_iso", pa.string()),
+            ("due_at", pa.timestamp("s", tz="UTC")),
+            ("depends_on", pa.list_(pa.string())),
+        ]
+    )
+    ids = assignment_ids([record.dict_for_storage() for record in records])
+    columns: Dict[str, List[Any]] = {name: [] for name in schema.names}
+    for idx, (record, assignment_id) in enumerate(zip(records, ids)):
+        for position, task in enumerate(plans.get(plan_key(record, idx), [])):
+            columns["assignment_id"].append(assignment_id)
+            columns["task_index"].append(position)
+            for name in TASK_FIELDS:
+                columns[name].append(task.get(name))
+    columns["due_at"] = _due_at(columns["due_iso"])
+    columns["depends_on"] = [value or [] for value in columns["depends_on"]]
+    return pa.table(columns, schema=schema)
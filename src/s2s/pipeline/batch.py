@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from s2s.execute import export_formats
+from s2s.extract import AssignmentExtractor
+from s2s.pipeline.artifacts import project_paths
+from s2s.pipeline.cache import StageCache
+from s2s.pipeline.orchestrator import EXECUTOR_KINDS, PipelineOrchestrator
+from s2s.plan import TaskPlanner
+from s2s.rag import RAGIndex
+from s2s.utils import ensure_dir, log_interaction, read_jsonl
+
+
+@dataclass
+class BatchProject:
+    """One manifest entry: a project name and the directory holding its sources."""
+
+    project: str
+    source: Path
+
+
+@dataclass
+class ProjectSummary:
+    project: str
+    source: str
+    status: str = "ok"
+    seconds: float = 0.0
+    documents: int = 0
+    chunks: int = 0
+    assignments: int = 0
+    plans: int = 0
+    exported: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+    extractor_stats: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    """Per-project outcomes plus wall-clock time for the whole batch."""
+
+    projects: List[ProjectSummary] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def failed(self) -> List[ProjectSummary]:
+        return [item for item in self.projects if item.status != "ok"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        busy = sum(item.seconds for item in self.projects)
+        return {
+            "projects": [asdict(item) for item in self.projects],
+            "totals": {
+                "projects": len(self.projects),
+                "failed": len(self.failed),
+                "documents": sum(item.documents for item in self.projects),
+                "assignments": sum(item.assignments for item in self.projects),
+                "wall_seconds": self.seconds,
+                "project_seconds": busy,
+            },
+        }
+
+
+def load_manifest(path: Path) -> List[BatchProject]:
+    """Read ``[{"project": ..., "source": ...}]`` from JSON (a list or ``{"projects": [...]}``) or JSONL.
+
+    Relative source directories are resolved against the manifest's folder.
+    """
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        entries = read_jsonl(path)
+    else:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        entries = data.get("projects", []) if isinstance(data, dict) else data
+    projects: List[BatchProject] = []
+    seen = set()
+    for entry in entries:
+        name = entry.get("project")
+        if not name or "source" not in entry:
+            raise ValueError(f"Manifest entry needs 'project' and 'source': {entry}")
+        if name in seen:
+            raise ValueError(f"Duplicate project '{name}' in manifest")
+        seen.add(name)
+        source = Path(entry["source"])
+        projects.append(BatchProject(project=name, source=source if source.is_absolute() else path.parent / source))
+    return projects
+
+
+class BatchRunner:
+    """Run many projects through ``PipelineOrchestrator`` concurrently.
+
+    At most ``workers`` projects are in flight. All of them share one model,
+    one planner, one vector backend (Chroma client) and embedder, and one set
+    of stage pools; the single index thread serialises Chroma writes. Each
+    project extracts through its own ``AssignmentExtractor.share()`` view of
+    the model, so its ``extractor_stats`` count only its own documents. Every
+    project keeps its own artifacts, exports and stage cache, and a failing
+    project is recorded in the summary without stopping the others.
+    """
+
+    def __init__(
+        self,
+        projects: List[BatchProject],
+        workers: int = 4,
+        stage_workers: int = 2,
+        queue_size: int = 4,
+        ingest_executor: str = "process",
+        extract_executor: str = "thread",
+        index: bool = True,
+        extractor_kwargs: Optional[Dict[str, Any]] = None,
+        planner_kwargs: Optional[Dict[str, Any]] = None,
+        force: bool = False,
+        persist_root: Path = Path("data/processed/indices"),
+        vector_backend: Optional[str] = None,
+        formats: Optional[Sequence[str]] = None,
+    ) -> None:
+        for kind in (ingest_executor, extract_executor):
+            if kind not in EXECUTOR_KINDS:
+                raise ValueError(f"Unknown executor '{kind}', expected one of {EXECUTOR_KINDS}")
+        self.formats = export_formats(formats)
+        self.projects = projects
+        self.workers = max(1, workers)
+        self.stage_workers = max(1, stage_workers)
+        self.queue_size = queue_size
+        self.ingest_executor = ingest_executor
+        self.extract_executor = extract_executor
+        self.index = index
+        self.extractor_kwargs = extractor_kwargs or {"force_rule_based": True}
+        self.planner_kwargs = planner_kwargs or {}
+        self.force = force
+        self.persist_root = persist_root
+        self.vector_backend = vector_backend
+        self._rag_shared: Optional[Dict[str, Any]] = None
+        self._rag_lock = threading.Lock()
+
+    def run_sync(self) -> BatchResult:
+        return asyncio.run(self.run())
+
+    async def run(self) -> BatchResult:
+        started = time.perf_counter()
+        extractor = AssignmentExtractor(**self.extractor_kwargs) if self.extract_executor == "thread" else None
+        planner = TaskPlanner(**self.planner_kwargs)
+        size = self.workers * self.stage_workers
+        pools: Dict[str, Executor] = {
+            "ingest": self._make_executor(self.ingest_executor, size),
+            "extract": self._make_executor(self.extract_executor, size),
+            "index": ThreadPoolExecutor(max_workers=1, thread_name_prefix="s2s-index"),
+        }
+        slots = asyncio.Semaphore(self.workers)
+
+        async def run_project(entry: BatchProject) -> ProjectSummary:
+            async with slots:
+                return await self._run_project(entry, extractor, planner, pools)
+
+        try:
+            summaries = await asyncio.gather(*(run_project(entry) for entry in self.projects))
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        result = BatchResult(projects=list(summaries), seconds=time.perf_counter() - started)
+        log_interaction(
+            "batch_run",
+            f"{len(self.projects)} projects",
+            f"{len(result.failed)} failed",
+            result.to_dict()["totals"],
+        )
+        return result
+
+    async def _run_project(
+        self,
+        entry: BatchProject,
+        extractor: Optional[AssignmentExtractor],
+        planner: TaskPlanner,
+        pools: Dict[str, Executor],
+    ) -> ProjectSummary:
+        summary = ProjectSummary(project=entry.project, source=str(entry.source))
+        started = time.perf_counter()
+        try:
+            if not entry.source.is_dir():
+                raise FileNotFoundError(f"Source directory not found: {entry.source}")
+            paths = project_paths(entry.project)
+            project_extractor = extractor.share() if extractor is not None else None
+            orchestrator = PipelineOrchestrator(
+                project=entry.project,
+                paths=paths,
+                source_dir=entry.source,
+                queue_size=self.queue_size,
+                workers=self.stage_workers,
+                ingest_executor=self.ingest_executor,
+                extract_executor=self.extract_executor,
+                index=self.index,
+                extractor_kwargs=self.extractor_kwargs,
+                planner_kwargs=self.planner_kwargs,
+                cache=StageCache.for_project(paths, enabled=not self.force),
+                extractor=project_extractor,
+                planner=planner,
+                rag_index_factory=self._rag_index,
+                pools=pools,
+                formats=self.formats,
+            )
+            result = await orchestrator.run()
+        except Exception as exc:  # one bad project must not sink the batch
+            summary.status = "failed"
+            summary.error = f"{type(exc).__name__}: {exc}"
+        else:
+            summary.documents = result.documents
+            summary.chunks = result.chunks
+            summary.assignments = result.assignments
+            summary.plans = result.plans
+            summary.exported = result.exported
+            summary.timings = result.timings
+            if project_extractor is not None:
+                summary.extractor_stats = dict(project_extractor.stats)
+        summary.seconds = time.perf_counter() - started
+        return summary
+
+    def _rag_index(self, project: str) -> RAGIndex:
+        """Project index backed by the batch's single vector backend and embedder."""
+        with self._rag_lock:
+            if self._rag_shared is None:
+                first = RAGIndex(project=project, persist_root=self.persist_root, backend=self.vector_backend)
+                self._rag_shared = {"backend": first.backend, "embedder": first.embedder}
+                return first
+        return RAGIndex(project=project, persist_root=self.persist_root, **self._rag_shared)
+
+    @staticmethod
+    def _make_executor(kind: str, size: int) -> Executor:
+        if kind == "process":
+            return ProcessPoolExecutor(max_workers=size)
+        return ThreadPoolExecutor(max_workers=size, thread_name_prefix="s2s-batch")
+
+
+def write_summary(result: BatchResult, path: Path) -> Path:
+    ensure_dir(Path(path).parent)
+    Path(path).write_text(json.dumps(result.to_dict(), indent=2), encoding="utf-8")
+    return Path(path)
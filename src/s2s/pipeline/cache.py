@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import importlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from s2s import __version__
+from s2s.utils import ensure_dir, hash_file, hash_text
+
+CACHE_VERSION = 1
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable digest of JSON-serialisable inputs."""
+    return hash_text(json.dumps(parts, sort_keys=True, default=str))
+
+
+def code_version(*modules: str) -> str:
+    """Digest of the package version plus the source of the given modules."""
+    digests = [__version__]
+    for name in modules:
+        module = importlib.import_module(name)
+        source = getattr(module, "__file__", None)
+        digests.append(hash_file(Path(source)) if source else name)
+    return fingerprint(*digests)
+
+
+def file_fingerprint(path: Path) -> str:
+    """Cheap change detector for source files (size + mtime)."""
+    stat = path.stat()
+    return fingerprint(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+class StageCache:
+    """Per-project manifest recording the input fingerprints behind each stage output.
+
+    Entries are grouped by stage and keyed by a unit of work (a source file, a
+    document, an assignment). A lookup only hits when the stored fingerprint
+    matches, so a stage can recompute just the units whose inputs changed.
+    """
+
+    def __init__(self, path: Path, enabled: bool = True) -> None:
+        self.path = Path(path)
+        self.enabled = enabled
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._stages: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                data = {}
+            if data.get("version") == CACHE_VERSION:
+                self._stages = data.get("stages", {})
+
+    @classmethod
+    def for_project(cls, paths: Dict[str, Path], enabled: bool = True) -> "StageCache":
+        documents = paths["documents"]
+        return cls(documents.with_name(documents.name.replace("_documents.jsonl", "_stages.json")), enabled=enabled)
+
+    def lookup(self, stage: str, key: str, stage_fingerprint: str) -> Optional[Any]:
+        counters = self.stats.setdefault(stage, {"hits": 0, "misses": 0})
+        entry = self._stages.get(stage, {}).get(key) if self.enabled else None
+        if entry is None or entry.get("fingerprint") != stage_fingerprint:
+            counters["misses"] += 1
+            return None
+        counters["hits"] += 1
+        return entry.get("value")
+
+    def store(self, stage: str, key: str, stage_fingerprint: str, value: Any = True) -> None:
+        self._stages.setdefault(stage, {})[key] = {"fingerprint": stage_fingerprint, "value": value}
+
+    def keys(self, stage: str) -> Iterable[str]:
+        return list(self._stages.get(stage, {}))
+
+    def prune(self, stage: str, live_keys: Iterable[str]) -> list:
+        """Drop entries whose unit of work no longer exists; return the dropped keys."""
+        live = set(live_keys)
+        entries = self._stages.get(stage, {})
+        stale = [key for key in entries if key not in live]
+        for key in stale:
+            del entries[key]
+        return stale
+
+    def save(self) -> None:
+        ensure_dir(self.path.parent)
+        payload = {"version": CACHE_VERSION, "stages": self._stages}
+        self.path.write_text(json.dumps(payload), encoding="utf-8")
+
+    def summary(self, stage: str) -> str:
+        counters = self.stats.get(stage, {"hits": 0, "misses": 0})
+        total = counters["hits"] + counters["misses"]
+        return f"{counters['hits']}/{total} reused"
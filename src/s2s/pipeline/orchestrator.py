@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from s2s.execute import export_formats
+from s2s.extract import AssignmentExtractor
+from s2s.ingest import Document
+from s2s.ingest.loader import discover_sources, load_document
+from s2s.ingest.store import DocumentWriter, read_documents
+from s2s.pipeline.artifacts import load_assignments, write_assignments, write_plan
+from s2s.pipeline.cache import StageCache
+from s2s.pipeline.stages import (
+    export_fingerprint,
+    export_outputs,
+    export_paths,
+    extract_cache_key,
+    extract_document,
+    extract_document_in_worker,
+    extractor_fingerprint,
+    index_documents,
+    ingest_fingerprint,
+    plan_assignments,
+    previous_sections,
+    update_deadline_index,
+)
+from s2s.plan import TaskPlanner
+from s2s.rag import RAGIndex
+from s2s.utils import log_interaction
+
+EXECUTOR_KINDS = ("thread", "process")
+_DONE = object()
+
+
+@dataclass
+class PipelineResult:
+    """Counts and timings of an orchestrated run.
+
+    Overlapping stages (ingest, extract, index) report seconds elapsed since the
+    run started when they finished; plan and export report their own duration.
+    """
+
+    documents: int = 0
+    chunks: int = 0
+    assignments: int = 0
+    plans: int = 0
+    exported: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+    cache: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+
+@dataclass
+class _RunState:
+    """Mutable state shared by the stage coroutines of one run."""
+
+    loop: asyncio.AbstractEventLoop
+    started: float
+    result: PipelineResult
+    extractor_fp: str
+    writer: DocumentWriter
+    previous: Dict[str, Document] = field(default_factory=dict)
+    documents: Dict[int, Document] = field(default_factory=dict)
+    extracted: Dict[int, List[Dict[str, Any]]] = field(default_factory=dict)
+    kept: List[Document] = field(default_factory=list)
+
+    def mark(self, stage: str) -> None:
+        self.result.timings[stage] = time.perf_counter() - self.started
+
+
+class PipelineOrchestrator:
+    """Stream documents through bounded queues so ingest, index and extract overlap.
+
+    Parsed documents fan out to an extraction queue and an indexing queue; a full
+    queue blocks the readers, which keeps at most ``queue_size`` documents buffered
+    per stage. Planning and export run once extraction has drained, and every
+    artifact is written to the same paths the individual subcommands use.
+    Units of work whose fingerprints match the stage cache are skipped.
+    ``formats`` selects the export sinks (default ICS, CSV and SQLite).
+
+    ``extractor``, ``planner``, ``rag_index_factory`` and ``pools`` (keyed by
+    ``ingest``/``extract``/``index``) inject warm models and executors shared
+    with other orchestrators; injected pools are left running after the run.
+
+    ``files`` lists the source files added, edited or removed since the last
+    run. Every other previously stored document then keeps its text, records
+    and index entries without being read again, and the exports are updated
+    in place for just the listed files where the sink supports it.
+    """
+
+    def __init__(
+        self,
+        project: str,
+        paths: Dict[str, Path],
+        source_dir: Path = Path("data/raw"),
+        queue_size: int = 4,
+        workers: int = 2,
+        ingest_executor: str = "process",
+        extract_executor: str = "thread",
+        index: bool = True,
+        extractor_kwargs: Optional[Dict[str, Any]] = None,
+        planner_kwargs: Optional[Dict[str, Any]] = None,
+        cache: Optional[StageCache] = None,
+        extractor: Optional[AssignmentExtractor] = None,
+        planner: Optional[TaskPlanner] = None,
+        rag_index_factory: Optional[Callable[[str], RAGIndex]] = None,
+        pools: Optional[Dict[str, Executor]] = None,
+        formats: Optional[Sequence[str]] = None,
+        files: Optional[Sequence[Path]] = None,
+    ) -> None:
+        for kind in (ingest_executor, extract_executor):
+            if kind not in EXECUTOR_KINDS:
+                raise ValueError(f"Unknown executor '{kind}', expected one of {EXECUTOR_KINDS}")
+        self.formats = export_formats(formats)
+        self.project = project
+        self.paths = paths
+        self.source_dir = Path(source_dir)
+        self.queue_size = max(1, queue_size)
+        self.workers = max(1, workers)
+        self.ingest_executor = ingest_executor
+        self.extract_executor = extract_executor
+        self.index = index
+        self.extractor_kwargs = extractor_kwargs or {"force_rule_based": True}
+        self.planner_kwargs = planner_kwargs or {}
+        self.cache = cache or StageCache.for_project(paths, enabled=False)
+        self.planner = planner
+        self.rag_index_factory = rag_index_factory or (lambda name: RAGIndex(project=name))
+        self.pools = pools or {}
+        self.files = None if files is None else [Path(path) for path in files]
+        self._extractor = extractor
+        self._extractor_lock = threading.Lock()
+
+    def run_sync(self) -> PipelineResult:
+        return asyncio.run(self.run())
+
+    async def run(self) -> PipelineResult:
+        state = _RunState(
+            loop=asyncio.get_running_loop(),
+            started=time.perf_counter(),
+            result=PipelineResult(),
+            extractor_fp=extractor_fingerprint(self.extractor_kwargs),
+            writer=DocumentWriter(self.paths["documents"]),
+        )
+        result = state.result
+        sources = discover_sources(self.source_dir)
+        if self.cache.enabled:
+            state.previous = {doc.path: doc for doc in read_documents(self.paths["documents"])}
+        pending = list(enumerate(sources))
+        export_sources: Optional[Set[str]] = None
+        kept = self._previous_records() if self.files is not None and state.previous else None
+        if kept is not None:
+            # Watchers may report absolute paths for a relative source directory.
+            touched = {path.absolute() for path in self.files or []}
+            exports_current = self._exports_current()
+            pending = []
+            for seq, path in enumerate(sources):
+                doc = state.previous.get(str(path))
+                if doc is None or path.absolute() in touched:
+                    pending.append((seq, path))
+                    continue
+                state.documents[seq] = state.writer.add(doc)
+                state.extracted[seq] = kept.get(doc.path, [])
+                state.kept.append(doc)
+            if exports_current:
+                live = {str(path) for path in sources}
+                export_sources = {str(path) for _, path in pending} | {key for key in state.previous if key not in live}
+
+        extract_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        queues = [extract_queue]
+        index_queue: Optional[asyncio.Queue] = None
+        if self.index:
+            index_queue = asyncio.Queue(maxsize=self.queue_size)
+            queues.append(index_queue)
+
+        owned: List[Executor] = []
+        ingest_pool = self._pool("ingest", lambda: self._make_executor(self.ingest_executor), owned)
+        extract_pool = self._pool("extract", lambda: self._make_executor(self.extract_executor), owned)
+        index_pool = self._pool(
+            "index", lambda: ThreadPoolExecutor(max_workers=1, thread_name_prefix="s2s-index"), owned
+        )
+        try:
+            stages = [asyncio.create_task(self._ingest(state, ingest_pool, pending, queues))]
+            stages.extend(
+                asyncio.create_task(self._extract_worker(state, extract_pool, extract_queue))
+                for _ in range(self.workers)
+            )
+            if index_queue is not None:
+                stages.append(asyncio.create_task(self._index_worker(state, index_pool, index_queue)))
+            await self._supervise(stages)
+        except BaseException:
+            state.writer.discard()
+            raise
+        finally:
+            for pool in owned:
+                pool.shutdown(wait=True)
+
+        ordered = sorted(state.documents)
+        self.cache.prune("ingest", [str(path) for path in sources])
+        live = [state.documents[seq].path for seq in ordered]
+        self.cache.prune("extract", live)
+        self.cache.prune("extract_sections", live)
+        state.writer.close(state.documents[seq] for seq in ordered)
+        assignments = [item for seq in ordered for item in state.extracted.get(seq, [])]
+        write_assignments(self.paths["assignments"], assignments)
+        result.documents = len(ordered)
+        result.assignments = len(assignments)
+
+        stage_start = time.perf_counter()
+        plans = await state.loop.run_in_executor(None, self._plan_stage)
+        result.plans = len(plans)
+        result.timings["plan"] = time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        result.exported = await state.loop.run_in_executor(
+            None, export_outputs, self.paths, self.cache, self.formats, export_sources
+        )
+        result.timings["export"] = time.perf_counter() - stage_start
+        state.mark("total")
+        self.cache.save()
+        result.cache = self.cache.stats
+
+        log_interaction(
+            "pipeline_run",
+            str(self.source_dir),
+            f"{result.documents} documents, {result.assignments} assignments",
+            {"project": self.project, "timings": result.timings},
+        )
+        return result
+
+    async def _ingest(
+        self,
+        state: _RunState,
+        pool: Executor,
+        sources: List[Tuple[int, Path]],
+        queues: List[asyncio.Queue],
+    ) -> None:
+        slots = asyncio.Semaphore(self.workers)
+
+        async def load(seq: int, path: Path) -> None:
+            # Hold the slot until the document is queued so a stalled consumer
+            # stops further reads instead of buffering parsed documents.
+            async with slots:
+                key, stage_fp = str(path), ingest_fingerprint(path)
+                if self.cache.lookup("ingest", key, stage_fp) is not None and key in state.previous:
+                    doc: Optional[Document] = state.previous[key]
+                else:
+                    doc = await state.loop.run_in_executor(pool, load_document, path)
+                    if doc is None:
+                        return
+                    self.cache.store("ingest", key, stage_fp)
+                # Only the stored view stays in the run state; the parsed strings
+                # are released once the extract and index stages are done with them.
+                state.documents[seq] = state.writer.add(doc)
+                for queue in queues:
+                    await queue.put((seq, doc))
+
+        await asyncio.gather(*(load(seq, path) for seq, path in sources))
+        state.mark("ingest")
+        for queue in queues:
+            consumers = self.workers if queue is queues[0] else 1
+            for _ in range(consumers):
+                await queue.put(_DONE)
+
+    async def _supervise(self, stages: List["asyncio.Task[None]"]) -> None:
+        """Wait for every stage; a failing stage cancels the rest instead of deadlocking them."""
+        done, pending = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
+
+    async def _extract_worker(self, state: _RunState, pool: Executor, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                state.mark("extract")
+                return
+            seq, doc = item
+            key, stage_fp = extract_cache_key(doc, state.extractor_fp)
+            records = self.cache.lookup("extract", key, stage_fp)
+            if records is None:
+                sections = previous_sections(self.cache, doc, state.extractor_fp)
+                if self.extract_executor == "process":
+                    records, sections = await state.loop.run_in_executor(
+                        pool, extract_document_in_worker, doc, self.extractor_kwargs, sections
+                    )
+                else:
+                    records = await state.loop.run_in_executor(pool, self._extract_in_thread, doc, sections)
+                self.cache.store("extract", key, stage_fp, records)
+                self.cache.store("extract_sections", doc.path, state.extractor_fp, sections)
+            state.extracted[seq] = records
+
+    def _extract_in_thread(self, doc: Document, sections: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._extractor_lock:
+            if self._extractor is None:
+                self._extractor = AssignmentExtractor(**self.extractor_kwargs)
+        return extract_document(self._extractor, doc, sections)
+
+    async def _index_worker(self, state: _RunState, pool: Executor, queue: asyncio.Queue) -> None:
+        loop = state.loop
+        rag_index = await loop.run_in_executor(pool, self.rag_index_factory, self.project)
+        reindex = await loop.run_in_executor(pool, lambda: rag_index.count() == 0)
+        # Documents kept from the last run are only re-embedded into an emptied index.
+        batch: List[Document] = list(state.kept) if reindex else []
+        seen: List[str] = [doc.id for doc in state.kept]
+        while True:
+            item = await queue.get()
+            if item is not _DONE:
+                batch.append(item[1])
+                seen.append(item[1].id)
+            if batch and (item is _DONE or len(batch) >= self.queue_size):
+                state.result.chunks += await loop.run_in_executor(
+                    pool, index_documents, rag_index, list(batch), self.cache, False, reindex
+                )
+                batch.clear()
+            if item is _DONE:
+                stale = self.cache.prune("index", seen)
+                await loop.run_in_executor(pool, rag_index.delete_documents, stale)
+                state.mark("index")
+                return
+
+    def _previous_records(self) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """The last run's records grouped by source document, or None when its artifacts are missing."""
+        if not (self.paths["assignments"].exists() and self.paths["plan"].exists()):
+            return None
+        records: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for record in load_assignments(self.paths["assignments"]):
+            records[record.source_doc].append(record.dict_for_storage())
+        return records
+
+    def _exports_current(self) -> bool:
+        """Whether the exports were last written from the artifacts as they are now."""
+        outputs = export_paths(self.paths, self.formats)
+        if not all(path.exists() for path in outputs.values()):
+            return False
+        return self.cache.lookup("export", "outputs", export_fingerprint(self.paths, self.formats)) is not None
+
+    def _plan_stage(self) -> Dict[str, List[Dict[str, Any]]]:
+        records = load_assignments(self.paths["assignments"])
+        plans = plan_assignments(self.planner, records, self.cache, self.planner_kwargs)
+        write_plan(self.paths["plan"], plans, records)
+        update_deadline_index(self.project, self.paths, records, plans)
+        return plans
+
+    def _pool(self, stage: str, factory: Callable[[], Executor], owned: List[Executor]) -> Executor:
+        if stage in self.pools:
+            return self.pools[stage]
+        pool = factory()
+        owned.append(pool)
+        return pool
+
+    def _make_executor(self, kind: str) -> Executor:
+        if kind == "process":
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="s2s-stage")
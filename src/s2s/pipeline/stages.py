@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
+
+from s2s.execute import EXPORTERS, DeadlineIndex, export_formats, make_exporter, run_exporters
+from s2s.extract import AssignmentExtractor
+from s2s.extract.infer_lora_t5 import CASCADE_THRESHOLD
+from s2s.ingest import Document
+from s2s.ingest.loader import load_document
+from s2s.pipeline.artifacts import iter_paired, pair_plans, plan_key
+from s2s.pipeline.cache import StageCache, code_version, file_fingerprint, fingerprint
+from s2s.plan import TaskPlanner
+from s2s.rag import RAGIndex
+from s2s.rag.scope import SCOPE_CONTEXT_LINES, SCOPE_TOP_K, retrieve_scope
+from s2s.schemas import AssignmentRecord
+from s2s.utils import hash_file
+
+_WORKER_EXTRACTORS: Dict[Tuple[Tuple[str, Any], ...], AssignmentExtractor] = {}
+
+STAGE_MODULES = {
+    "ingest": (
+        "s2s.ingest",
+        "s2s.ingest.loader",
+        "s2s.ingest.pdf_reader",
+        "s2s.ingest.html_reader",
+        "s2s.ingest.store",
+    ),
+    "index": ("s2s.rag.index", "s2s.rag.chunking", "s2s.utils"),
+    "extract": ("s2s.extract.infer_lora_t5", "s2s.extract.parsed", "s2s.extract.validate", "s2s.schemas"),
+    "plan": ("s2s.plan.planner", "s2s.schemas"),
+    "export": ("s2s.execute.exporters", "s2s.execute.text_exporters", "s2s.pipeline.artifacts"),
+}
+
+
+@lru_cache(maxsize=None)
+def stage_code_version(stage: str) -> str:
+    return code_version(*STAGE_MODULES[stage])
+
+
+def document_hash(doc: Document) -> str:
+    return doc.content_hash()
+
+
+def extractor_fingerprint(extractor_kwargs: Dict[str, Any]) -> str:
+    """Extractor mode, base model and adapter weights that determine extraction output."""
+    rule_based = bool(extractor_kwargs.get("force_rule_based", False))
+    base_model = extractor_kwargs.get("base_model", "t5-small")
+    adapter_hash = None
+    if not rule_based:
+        weights = Path(extractor_kwargs.get("adapter_dir", "models/s2s_lora_t5")) / "adapter_model.safetensors"
+        adapter_hash = hash_file(weights) if weights.exists() else None
+    cascade = bool(extractor_kwargs.get("cascade", False))
+    mode = "rule_based" if rule_based else "cascade" if cascade else "model"
+    options = {}
+    if not rule_based:
+        options = {
+            name: extractor_kwargs.get(name)
+            for name in ("optimize_cpu", "quantize_int8", "greedy", "constrained")
+            if extractor_kwargs.get(name) is not None
+        }
+        if cascade:
+            options["cascade_threshold"] = extractor_kwargs.get("cascade_threshold", CASCADE_THRESHOLD)
+    return fingerprint(mode, base_model, adapter_hash, options, stage_code_version("extract"))
+
+
+def planner_fingerprint(model_name: Optional[str] = None) -> str:
+    return fingerprint(model_name or os.getenv("S2S_PLANNER_MODEL") or "heuristic", stage_code_version("plan"))
+
+
+def ingest_fingerprint(path: Path) -> str:
+    return fingerprint(file_fingerprint(path), stage_code_version("ingest"))
+
+
+def ingest_document(path: Path, cache: StageCache, previous: Dict[str, Document]) -> Optional[Document]:
+    """Reuse the previously ingested Document when the source file is unchanged."""
+    key = str(path)
+    stage_fp = ingest_fingerprint(path)
+    if cache.lookup("ingest", key, stage_fp) is not None and key in previous:
+        return previous[key]
+    doc = load_document(path)
+    if doc is not None:
+        cache.store("ingest", key, stage_fp)
+    return doc
+
+
+def extract_document(
+    extractor: AssignmentExtractor, doc: Document, sections: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Extract storage-ready assignment dicts from a single document.
+
+    ``sections`` is the document's rule-based section cache, updated in place.
+    """
+    return [record.dict_for_storage() for record in extractor.extract_many(doc.text, doc.path, sections)]
+
+
+def extract_document_in_worker(
+    doc: Document, extractor_kwargs: Dict[str, Any], sections: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Process-pool entry point; each worker keeps one warm extractor.
+
+    Returns the records and the updated section cache, which cannot be
+    updated in place across processes.
+    """
+    key = tuple(sorted(extractor_kwargs.items()))
+    extractor = _WORKER_EXTRACTORS.get(key)
+    if extractor is None:
+        extractor = AssignmentExtractor(**extractor_kwargs)
+        _WORKER_EXTRACTORS[key] = extractor
+    return extract_document(extractor, doc, sections), sections
+
+
+def extract_cache_key(doc: Document, extractor_fp: str) -> Tuple[str, str]:
+    return doc.path, fingerprint(extractor_fp, document_hash(doc))
+
+
+def extract_documents(
+    docs: List[Document],
+    extractor_kwargs: Dict[str, Any],
+    cache: StageCache,
+) -> List[Dict[str, Any]]:
+    """Extract every document, re-running the extractor only for changed ones.
+
+    An edited document is rescanned only in the sections whose text (or
+    surrounding lines) changed, using the section cache from its last extraction.
+    """
+    extractor_fp = extractor_fingerprint(extractor_kwargs)
+    extractor: Optional[AssignmentExtractor] = None
+    assignments: List[Dict[str, Any]] = []
+    for doc in docs:
+        key, stage_fp = extract_cache_key(doc, extractor_fp)
+        records = cache.lookup("extract", key, stage_fp)
+        if records is None:
+            if extractor is None:
+                extractor = AssignmentExtractor(**extractor_kwargs)
+            sections = previous_sections(cache, doc, extractor_fp)
+            records = extract_document(extractor, doc, sections)
+            cache.store("extract", key, stage_fp, records)
+            cache.store("extract_sections", doc.path, extractor_fp, sections)
+        assignments.extend(records)
+    live = [doc.path for doc in docs]
+    cache.prune("extract", live)
+    cache.prune("extract_sections", live)
+    return assignments
+
+
+def extract_scoped_documents(
+    docs: List[Document],
+    extractor_kwargs: Dict[str, Any],
+    rag_index: RAGIndex,
+    cache: StageCache,
+    top_k: int = SCOPE_TOP_K,
+    context_lines: int = SCOPE_CONTEXT_LINES,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Extract from each document's retrieved deadline chunks (plus context lines) instead of every line.
+
+    The chunks are the ``top_k`` nearest to the deadline queries and every
+    chunk containing a deadline word (see ``s2s.rag.scope``).
+
+    Documents with no chunks in the index, or whose chunks were cut from
+    another version of their text, are scanned in full. Also returns
+    line counts: ``scanned`` of ``total`` lines over the re-extracted
+    documents, and how many of them fell back to a full scan.
+    """
+    extractor_fp = fingerprint(
+        extractor_fingerprint(extractor_kwargs),
+        "retrieval",
+        top_k,
+        context_lines,
+        code_version("s2s.rag.scope"),
+        rag_index.embedder_name,
+        rag_index.layout,
+    )
+    extractor: Optional[AssignmentExtractor] = None
+    assignments: List[Dict[str, Any]] = []
+    coverage = {"scanned": 0, "total": 0, "full_scans": 0}
+    for doc in docs:
+        key, stage_fp = extract_cache_key(doc, extractor_fp)
+        records = cache.lookup("extract", key, stage_fp)
+        if records is None:
+            if extractor is None:
+                extractor = AssignmentExtractor(**extractor_kwargs)
+            text = doc.text
+            scope = retrieve_scope(rag_index, doc, k=top_k, context_lines=context_lines, text=text)
+            if scope is None:
+                lines = text.count("\n") + 1
+                coverage["full_scans"] += 1
+                coverage["scanned"] += lines
+                coverage["total"] += lines
+                scoped_text = text
+            else:
+                coverage["scanned"] += scope.lines
+                coverage["total"] += scope.total_lines
+                scoped_text = scope.text
+            records = [record.dict_for_storage() for record in extractor.extract_many(scoped_text, doc.path)]
+            cache.store("extract", key, stage_fp, records)
+        assignments.extend(records)
+    live = [doc.path for doc in docs]
+    cache.prune("extract", live)
+    cache.prune("extract_sections", live)
+    return assignments, coverage
+
+
+def previous_sections(cache: StageCache, doc: Document, extractor_fp: str) -> Dict[str, Any]:
+    """Section cache left by the document's previous extraction under the same extractor, else empty."""
+    return cache.lookup("extract_sections", doc.path, extractor_fp) or {}
+
+
+def index_documents(
+    rag_index: RAGIndex,
+    docs: List[Document],
+    cache: StageCache,
+    prune: bool = True,
+    reindex: Optional[bool] = None,
+) -> int:
+    """Embed only new or edited documents and drop chunks of removed ones.
+
+    An empty collection (e.g. a deleted index directory) forces a full reindex
+    regardless of what the cache recorded. Collections are compacted once
+    enough chunks have been deleted.
+    """
+    stage_fp = fingerprint(rag_index.embedder_name, rag_index.layout, stage_code_version("index"))
+    if reindex is None:
+        reindex = rag_index.count() == 0
+    changed = [
+        doc
+        for doc in docs
+        if cache.lookup("index", doc.id, fingerprint(stage_fp, document_hash(doc))) is None or reindex
+    ]
+    stale = cache.prune("index", [doc.id for doc in docs]) if prune else []
+    rag_index.delete_documents([doc.id for doc in changed] + stale)
+    chunks = rag_index.ingest_documents(changed)
+    for doc in changed:
+        cache.store("index", doc.id, fingerprint(stage_fp, document_hash(doc)))
+    rag_index.maybe_compact()
+    return chunks
+
+
+def plan_assignments(
+    planner: Optional[TaskPlanner],
+    records: List[AssignmentRecord],
+    cache: Optional[StageCache] = None,
+    planner_kwargs: Optional[Dict[str, Any]] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Plan every assignment, keyed for the plan artifact.
+
+    With a cache, tasks are reused for assignments whose content and planner are
+    unchanged; the rest go through ``TaskPlanner.plan_many`` in one batch and the
+    planner is only constructed when something needs planning.
+    """
+    stage_fp = planner_fingerprint(planner.model_name if planner else None)
+    record_keys = [fingerprint(record.dict_for_storage()) for record in records]
+    planned: List[Optional[List[Dict[str, Any]]]] = [
+        cache.lookup("plan", key, stage_fp) if cache else None for key in record_keys
+    ]
+    missing = [idx for idx, tasks in enumerate(planned) if tasks is None]
+    if missing:
+        if planner is None:
+            planner = TaskPlanner(**(planner_kwargs or {}))
+        for idx, tasks in zip(missing, planner.plan_many([records[idx] for idx in missing])):
+            planned[idx] = [task.dict_for_storage() for task in tasks]
+            if cache:
+                cache.store("plan", record_keys[idx], stage_fp, planned[idx])
+    if cache:
+        cache.prune("plan", record_keys)
+    return {plan_key(record, idx): planned[idx] or [] for idx, record in enumerate(records)}
+
+
+def update_deadline_index(
+    project: str,
+    paths: Dict[str, Path],
+    records: List[AssignmentRecord],
+    plans: Dict[str, List[Dict[str, Any]]],
+) -> Optional[int]:
+    """Replace the project's rows in the cross-project deadline index, when paths name one."""
+    if "deadlines" not in paths:
+        return None
+    index = DeadlineIndex(paths["deadlines"])
+    try:
+        return index.replace_project(project, pair_plans(records, plans))
+    finally:
+        index.close()
+
+
+def export_paths(paths: Dict[str, Path], formats: Optional[Sequence[str]] = None) -> Dict[str, Path]:
+    """Output file of each selected export format.
+
+    ``ics``, ``csv`` and ``sqlite`` keep their paths from ``paths``; other
+    formats write their exporter's ``filename`` into the export directory.
+    """
+    export_dir = paths.get("exports", paths["ics"].parent)
+    return {name: paths.get(name, export_dir / EXPORTERS[name].filename) for name in export_formats(formats)}
+
+
+def export_fingerprint(paths: Dict[str, Path], formats: Optional[Sequence[str]] = None) -> str:
+    """Digest of the assignment and plan artifacts and the export targets they are written to."""
+    outputs = export_paths(paths, formats)
+    return fingerprint(
+        hash_file(paths["assignments"]),
+        hash_file(paths["plan"]),
+        {name: str(path) for name, path in outputs.items()},
+        stage_code_version("export"),
+    )
+
+
+def export_outputs(
+    paths: Dict[str, Path],
+    cache: Optional[StageCache] = None,
+    formats: Optional[Sequence[str]] = None,
+    sources: Optional[Collection[str]] = None,
+) -> bool:
+    """Write the selected exports (default ICS/CSV/SQLite) from the assignment and plan artifacts.
+
+    The artifacts are read once and every sink is fed concurrently from the
+    same stream of pairs. Returns False when the cache shows the exports are
+    already up to date.
+
+    ``sources`` says the exports matched the artifacts until the records of
+    these source documents changed: sinks that can update in place (ICS,
+    SQLite) then only replace those documents' events and rows, and the
+    others are rewritten.
+    """
+    outputs = export_paths(paths, formats)
+    stage_fp = export_fingerprint(paths, formats)
+    if cache and all(path.exists() for path in outputs.values()) and cache.lookup("export", "outputs", stage_fp):
+        return False
+    exporters = [make_exporter(name, path) for name, path in outputs.items()]
+    if sources is not None:
+        sources = set(sources)
+        changed = [pair for pair in iter_paired(paths) if pair[0].source_doc in sources]
+        exporters = [exporter for exporter in exporters if not exporter.update(changed, sources)]
+    if exporters:
+        run_exporters(iter_paired(paths), exporters)
+    if cache:
+        cache.store("export", "outputs", stage_fp)
+    return True
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from s2s.execute import export_formats
+from s2s.extract import AssignmentExtractor
+from s2s.ingest.loader import SUPPORTED_SUFFIXES, discover_sources
+from s2s.pipeline.cache import StageCache
+from s2s.pipeline.orchestrator import PipelineOrchestrator, PipelineResult
+from s2s.plan import TaskPlanner
+from s2s.rag import RAGIndex
+from s2s.utils import log_interaction
+
+WATCH_BACKENDS = ("auto", "poll", "watchfiles")
+
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+def snapshot(root: Path) -> Snapshot:
+    """(mtime_ns, size) of every supported source file under ``root``."""
+    entries: Snapshot = {}
+    for path in discover_sources(root):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:  # removed between listing and stat
+            continue
+        entries[path] = (stat.st_mtime_ns, stat.st_size)
+    return entries
+
+
+@dataclass
+class ChangeSet:
+    """Source files added or modified, and removed, in one debounced burst."""
+
+    changed: List[Path] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+    detected_at: float = field(default_factory=time.time)
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.removed)
+
+    def first_change(self) -> float:
+        """Wall-clock time of the earliest write in the burst (detection time for removals)."""
+        times = [self.detected_at]
+        for path in self.changed:
+            try:
+                times.append(path.stat().st_mtime)
+            except FileNotFoundError:
+                continue
+        return min(times)
+
+
+class PollingWatcher:
+    """Detect source changes by comparing mtime/size snapshots every ``interval`` seconds.
+
+    A burst is reported once no further change has been seen for ``debounce``
+    seconds, so a file still being written (or a folder being copied in) is
+    processed once, after it settles.
+    """
+
+    def __init__(self, root: Path, interval: float = 0.5, debounce: float = 1.0) -> None:
+        self.root = Path(root)
+        self.interval = interval
+        self.debounce = debounce
+        self._baseline = snapshot(self.root)
+        self._latest = self._baseline
+        self._last_change: Optional[float] = None
+        self._detected_at: Optional[float] = None
+
+    def check(self, now: float) -> Optional[ChangeSet]:
+        """Take one snapshot at monotonic time ``now``; return the burst once it has settled."""
+        current = snapshot(self.root)
+        if current != self._latest:
+            self._latest = current
+            self._last_change = now
+            if self._detected_at is None:
+                self._detected_at = time.time()
+        if self._last_change is None or now - self._last_change < self.debounce:
+            return None
+        changes = ChangeSet(
+            changed=sorted(path for path, stat in current.items() if self._baseline.get(path) != stat),
+            removed=sorted(path for path in self._baseline if path not in current),
+            detected_at=self._detected_at or time.time(),
+        )
+        self._baseline = current
+        self._last_change = None
+        self._detected_at = None
+        return changes or None
+
+    def changes(self, stop: Optional[threading.Event] = None) -> Iterator[ChangeSet]:
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            found = self.check(time.monotonic())
+            if found:
+                yield found
+            stop.wait(self.interval)
+
+
+class WatchfilesWatcher:
+    """inotify/FSEvents notifications through the optional ``watchfiles`` package."""
+
+    def __init__(self, root: Path, interval: float = 0.5, debounce: float = 1.0) -> None:
+        import watchfiles  # noqa: F401  (fail at construction when missing)
+
+        self.root = Path(root)
+        self.interval = interval
+        self.debounce = debounce
+
+    def changes(self, stop: Optional[threading.Event] = None) -> Iterator[ChangeSet]:
+        from watchfiles import Change, watch
+
+        # watchfiles yields after ``step`` ms without events, grouping for at most ``debounce`` ms.
+        quiet_ms = max(1, int(self.debounce * 1000))
+        for batch in watch(self.root, debounce=max(1600, quiet_ms * 4), step=quiet_ms, stop_event=stop):
+            changes = ChangeSet()
+            for kind, name in sorted(batch, key=lambda item: item[1]):
+                path = Path(name)
+                if path.suffix.lower() not in SUPPORTED_SUFFIXES:
+                    continue
+                target = changes.removed if kind == Change.deleted and not path.exists() else changes.changed
+                if path not in target:
+                    target.append(path)
+            if changes:
+                yield changes
+
+
+def make_watcher(root: Path, backend: str = "auto", interval: float = 0.5, debounce: float = 1.0) -> Any:
+    """``watchfiles`` notifications when requested or (for ``auto``) installed, else polling."""
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(f"Unknown watch backend '{backend}', expected one of {WATCH_BACKENDS}")
+    if backend != "poll":
+        try:
+            return WatchfilesWatcher(root, interval, debounce)
+        except ImportError:
+            if backend == "watchfiles":
+                raise
+    return PollingWatcher(root, interval, debounce)
+
+
+@dataclass
+class WatchEvent:
+    """One processed burst: what changed, what the pipeline did, and how long the calendar lagged."""
+
+    changes: ChangeSet
+    result: PipelineResult
+    seconds: float
+    latency: float
+
+    def reprocessed(self) -> int:
+        counts = self.result.cache.get("extract", {})
+        return counts.get("misses", 0)
+
+
+class ProjectWatcher:
+    """Keep one project's artifacts and exports in step with a source directory.
+
+    The extractor, planner, vector index and stage pools are created once and
+    reused for every burst. Each burst hands the orchestrator the files it
+    changed or removed, so only those are read, indexed and extracted; every
+    other document keeps its stored records, and the ICS and SQLite exports
+    swap just the affected documents' events and rows.
+    """
+
+    def __init__(
+        self,
+        project: str,
+        paths: Dict[str, Path],
+        source_dir: Path,
+        watcher: Any = None,
+        workers: int = 2,
+        index: bool = True,
+        extractor_kwargs: Optional[Dict[str, Any]] = None,
+        planner_kwargs: Optional[Dict[str, Any]] = None,
+        rag_index_factory: Optional[Callable[[str], RAGIndex]] = None,
+        formats: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.project = project
+        self.paths = paths
+        self.source_dir = Path(source_dir)
+        self.watcher = watcher or PollingWatcher(self.source_dir)
+        self.workers = max(1, workers)
+        self.index = index
+        self.extractor_kwargs = extractor_kwargs or {"force_rule_based": True}
+        self.planner_kwargs = planner_kwargs or {}
+        self.formats = export_formats(formats)
+        self._rag_index_factory = rag_index_factory or (lambda name: RAGIndex(project=name))
+        self._rag_index: Optional[RAGIndex] = None
+        self._extractor: Optional[AssignmentExtractor] = None
+        self._planner: Optional[TaskPlanner] = None
+        self._pools: Dict[str, Executor] = {}
+
+    def sync(self, files: Optional[Sequence[Path]] = None) -> PipelineResult:
+        """Bring the project up to date with the source directory.
+
+        ``files`` limits the work to those added, edited or removed files
+        (see ``PipelineOrchestrator``); by default every source is checked.
+        """
+        if self._extractor is None:
+            self._extractor = AssignmentExtractor(**self.extractor_kwargs)
+            self._planner = TaskPlanner(**self.planner_kwargs)
+            self._pools = {
+                "ingest": ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="s2s-watch"),
+                "extract": ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="s2s-watch"),
+                "index": ThreadPoolExecutor(max_workers=1, thread_name_prefix="s2s-index"),
+            }
+        orchestrator = PipelineOrchestrator(
+            project=self.project,
+            paths=self.paths,
+            source_dir=self.source_dir,
+            workers=self.workers,
+            ingest_executor="thread",
+            extract_executor="thread",
+            index=self.index,
+            extractor_kwargs=self.extractor_kwargs,
+            planner_kwargs=self.planner_kwargs,
+            cache=StageCache.for_project(self.paths),
+            extractor=self._extractor,
+            planner=self._planner,
+            rag_index_factory=self._shared_index,
+            pools=self._pools,
+            formats=self.formats,
+            files=files,
+        )
+        return orchestrator.run_sync()
+
+    def handle(self, changes: ChangeSet) -> WatchEvent:
+        started = time.perf_counter()
+        result = self.sync(changes.changed + changes.removed)
+        event = WatchEvent(
+            changes=changes,
+            result=result,
+            seconds=time.perf_counter() - started,
+            latency=time.time() - changes.first_change(),
+        )
+        log_interaction(
+            "watch_update",
+            str(self.source_dir),
+            f"{len(changes.changed)} changed, {len(changes.removed)} removed",
+            {"project": self.project, "latency": event.latency, "seconds": event.seconds},
+        )
+        return event
+
+    def run(
+        self,
+        on_event: Callable[[WatchEvent], None],
+        max_batches: Optional[int] = None,
+        stop: Optional[threading.Event] = None,
+    ) -> int:
+        """Process bursts until ``stop`` is set or ``max_batches`` have been handled."""
+        handled = 0
+        try:
+            for changes in self.watcher.changes(stop):
+                on_event(self.handle(changes))
+                handled += 1
+                if max_batches and handled >= max_batches:
+                    break
+        finally:
+            self.close()
+        return handled
+
+    def close(self) -> None:
+        for pool in self._pools.values():
+            pool.shutdown(wait=True)
+        self._pools = {}
+        self._extractor = None
+
+    def _shared_index(self, project: str) -> RAGIndex:
+        if self._rag_index is None:
+            self._rag_index = self._rag_index_factory(project)
+        return self._rag_index
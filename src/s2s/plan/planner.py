@@ -3,10 +3,11 @@ from __future__ import annotations
 import json
 import os
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from transformers import pipeline
 
+from s2s.generation_cache import GenerationCache
 from s2s.schemas import AssignmentRecord, Task
 from s2s.utils import log_interaction
 
@@ -14,25 +15,44 @@ from s2s.utils import log_interaction
 class TaskPlanner:
     """Generate milestone tasks for an assignment."""
 
-    def __init__(self, planner_model: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        planner_model: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        generation_cache: Union[GenerationCache, bool, None] = None,
+    ) -> None:
         model_name = planner_model or os.getenv("S2S_PLANNER_MODEL")
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size or int(os.getenv("S2S_PLANNER_BATCH_SIZE", "16")))
+        self.generation_kwargs: Dict[str, Any] = {"max_length": 256}
         if model_name:
             self.generator = pipeline("text2text-generation", model=model_name)
+            self.generation_cache = GenerationCache.resolve(generation_cache)
         else:
             self.generator = None
+            self.generation_cache = None
 
     def plan(self, assignment: AssignmentRecord) -> List[Task]:
-        due = assignment.due_datetime()
-        hours = self._estimate_hours(assignment)
-        tasks = self._llm_plan(assignment, hours) if self.generator else self._heuristic_plan(assignment, hours)
-        tasks = self._ensure_schedule(tasks, due)
-        log_interaction(
-            tag="planner_plan",
-            prompt=json.dumps(assignment.dict_for_storage()),
-            response=json.dumps([t.dict_for_storage() for t in tasks]),
-            metadata={"hours": hours},
-        )
-        return tasks
+        return self.plan_many([assignment])[0]
+
+    def plan_many(self, assignments: List[AssignmentRecord]) -> List[List[Task]]:
+        """Plan several assignments, sending LLM prompts through the pipeline in batches."""
+        hours = [self._estimate_hours(assignment) for assignment in assignments]
+        if self.generator:
+            drafts = self._llm_plan_many(assignments, hours)
+        else:
+            drafts = [self._heuristic_plan(assignment, h) for assignment, h in zip(assignments, hours)]
+        plans: List[List[Task]] = []
+        for assignment, h, tasks in zip(assignments, hours, drafts):
+            tasks = self._ensure_schedule(tasks, assignment.due_datetime())
+            log_interaction(
+                tag="planner_plan",
+                prompt=json.dumps(assignment.dict_for_storage()),
+                response=json.dumps([t.dict_for_storage() for t in tasks]),
+                metadata={"hours": h},
+            )
+            plans.append(tasks)
+        return plans
 
     def _estimate_hours(self, assignment: AssignmentRecord) -> float:
         base = 6.0
@@ -79,15 +99,64 @@ class TaskPlanner:
             tasks[-1].hours_estimate = round(tasks[-1].hours_estimate + adjustment, 1)
         return tasks
 
-    def _llm_plan(self, assignment: AssignmentRecord, hours: float) -> List[Task]:  # pragma: no cover
-        prompt = (
+    def _llm_plan(self, assignment: AssignmentRecord, hours: float) -> List[Task]:
+        return self._llm_plan_many([assignment], [hours])[0]
+
+    def _llm_plan_many(self, assignments: List[AssignmentRecord], hours: List[float]) -> List[List[Task]]:
+        prompts = [self._llm_prompt(assignment, h) for assignment, h in zip(assignments, hours)]
+        if not prompts:
+            return []
+        raws = self._generate_many(prompts)
+        plans: List[List[Task]] = []
+        for assignment, h, raw in zip(assignments, hours, raws):
+            tasks = self._parse_llm_tasks(raw, assignment, h)
+            plans.append(tasks if tasks else self._heuristic_plan(assignment, h))
+        return plans
+
+    def _generate_many(self, prompts: List[str]) -> List[str]:
+        """Run uncached prompts through the pipeline in batches; cached ones are reused."""
+        keys: List[Optional[str]] = [None] * len(prompts)
+        raws: List[Optional[str]] = [None] * len(prompts)
+        if self.generation_cache is not None:
+            keys = [
+                GenerationCache.make_key(self.model_name, None, self.generation_kwargs, prompt) for prompt in prompts
+            ]
+            cached = self.generation_cache.get_many(keys)
+            raws = [cached.get(key) for key in keys]
+        pending = [idx for idx, raw in enumerate(raws) if raw is None]
+        if pending:
+            outputs = self.generator(
+                [prompts[idx] for idx in pending], batch_size=self.batch_size, **self.generation_kwargs
+            )
+            fresh: Dict[str, str] = {}
+            for idx, output in zip(pending, outputs):
+                if isinstance(output, list):
+                    output = output[0]
+                raws[idx] = output["generated_text"]
+                log_interaction("planner_llm_prompt", prompts[idx], raws[idx])
+                if keys[idx] is not None:
+                    fresh[keys[idx]] = raws[idx]
+            if self.generation_cache is not None:
+                self.generation_cache.put_many(fresh, model=self.model_name or "")
+        return [raw or "" for raw in raws]
+
+    def _llm_prompt(self, assignment: AssignmentRecord, hours: float) -> str:
+        # Only the fields that shape a plan; evidence spans and source paths just burn context.
+        summary: Dict[str, Any] = {
+            "title": assignment.assignment_title,
+            "course": assignment.course,
+            "due": assignment.due_datetime_iso,
+            "deliverables": assignment.deliverables,
+            "weight": assignment.points_or_weight,
+        }
+        return (
             "Create 3-5 milestone tasks for this assignment. "
             "Respond as JSON list with objects {title,hours_estimate,depends_on}. "
             f"Total hours should be about {hours:.1f}.\n"
-            f"Assignment: {json.dumps(assignment.dict_for_storage())}"
+            f"Assignment: {json.dumps({k: v for k, v in summary.items() if v}, separators=(',', ':'))}"
         )
-        raw = self.generator(prompt, max_length=256)[0]["generated_text"]
-        log_interaction("planner_llm_prompt", prompt, raw)
+
+    def _parse_llm_tasks(self, raw: str, assignment: AssignmentRecord, hours: float) -> Optional[List[Task]]:
         try:
             data = json.loads(raw)
             tasks: List[Task] = []
@@ -100,9 +169,9 @@ class TaskPlanner:
                         depends_on=item.get("depends_on", []),
                     )
                 )
-            return tasks
+            return tasks or None
         except Exception:
-            return self._heuristic_plan(assignment, hours)
+            return None
 
     def _ensure_schedule(self, tasks: List[Task], due: datetime) -> List[Task]:
         scheduled: List[Task] = []
@@ -1,5 +1,30 @@
 """RAG package exports."""
 
+from .backends import (
+    BACKENDS,
+    QUANTIZATIONS,
+    ChromaBackend,
+    HNSWParams,
+    NumpyBackend,
+    VectorBackend,
+    make_backend,
+    quantize,
+)
+from .embedding import EMBEDDING_RUNTIMES, Embedder, EmbeddingOptions, export_onnx
 from .index import RAGIndex
 
-__all__ = ["RAGIndex"]
+__all__ = [
+    "BACKENDS",
+    "QUANTIZATIONS",
+    "ChromaBackend",
+    "EMBEDDING_RUNTIMES",
+    "Embedder",
+    "EmbeddingOptions",
+    "HNSWParams",
+    "NumpyBackend",
+    "RAGIndex",
+    "VectorBackend",
+    "export_onnx",
+    "make_backend",
+    "quantize",
+]
@@ -0,0 +1,650 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import shutil
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from s2s.utils import ensure_dir
+
+BACKENDS = ("chroma", "numpy")
+QUANTIZATIONS = ("float32", "int8", "binary")
+COMPACT_PAGE_SIZE = 512
+SCAN_BLOCK = 65536
+SCRATCH_SUFFIX = "_compact"
+SIDECAR = "chunks.jsonl"
+
+
+@dataclass(frozen=True)
+class HNSWParams:
+    """HNSW settings written into each Chroma collection's metadata.
+
+    Chroma reads them when a collection is created, so changing them only
+    affects existing collections after ``RAGIndex.compact`` rebuilds them.
+    Defaults come from ``training/bench_rag_index.py`` on 20k vectors:
+    ``search_ef=64`` lifts recall@10 from ~0.85 (Chroma's default of 10) to 1.0
+    at about the same query latency, while larger ``M`` or ``construction_ef``
+    only slowed the build.
+    """
+
+    M: int = 16
+    construction_ef: int = 100
+    search_ef: int = 64
+    space: str = "cosine"
+
+    @classmethod
+    def from_env(cls) -> "HNSWParams":
+        return cls(
+            M=int(os.getenv("S2S_HNSW_M", cls.M)),
+            construction_ef=int(os.getenv("S2S_HNSW_EF_CONSTRUCTION", cls.construction_ef)),
+            search_ef=int(os.getenv("S2S_HNSW_EF_SEARCH", cls.search_ef)),
+        )
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "hnsw:space": self.space,
+            "hnsw:M": self.M,
+            "hnsw:construction_ef": self.construction_ef,
+            "hnsw:search_ef": self.search_ef,
+        }
+
+
+class VectorBackend(ABC):
+    """Named collections of chunk embeddings, text and metadata.
+
+    Hits are dicts with ``id``, ``text``, ``metadata`` and a cosine
+    ``distance`` (smaller is closer), whatever the storage underneath.
+    """
+
+    name: str
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def count(self, collection: str) -> int:
+        ...
+
+    @abstractmethod
+    def upsert(
+        self,
+        collection: str,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def query(
+        self,
+        collection: str,
+        embedding: np.ndarray,
+        k: int,
+        doc_ids: Optional[Sequence[str]] = None,
+        contains: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """The ``k`` nearest chunks, only among those of ``doc_ids`` when given.
+
+        ``contains`` keeps only chunks whose text holds one of the terms
+        (lowercase; matched case-insensitively).
+        """
+
+    @abstractmethod
+    def delete_documents(self, collection: str, doc_ids: Iterable[str]) -> int:
+        """Remove the chunks of ``doc_ids``; returns how many were removed."""
+
+    @abstractmethod
+    def drop(self, collection: str) -> None:
+        ...
+
+    @abstractmethod
+    def compact(self, collection: str) -> int:
+        """Rewrite the collection without deleted chunks; returns how many were kept."""
+
+
+def make_backend(
+    kind: Optional[str],
+    persist_root: Path,
+    hnsw: Optional[HNSWParams] = None,
+    quantization: Optional[str] = None,
+) -> VectorBackend:
+    """Backend named by ``kind`` (or ``S2S_VECTOR_BACKEND``, default ``chroma``) under ``persist_root``.
+
+    ``quantization`` (or ``S2S_VECTOR_QUANTIZATION``) only applies to the NumPy
+    backend; Chroma always stores float32.
+    """
+    kind = kind or os.getenv("S2S_VECTOR_BACKEND", "chroma")
+    quantization = quantization or os.getenv("S2S_VECTOR_QUANTIZATION", "float32")
+    if kind == "chroma":
+        if quantization != "float32":
+            raise ValueError("Quantized embeddings need the numpy vector backend")
+        return ChromaBackend(persist_root, hnsw=hnsw)
+    if kind == "numpy":
+        keep_float = os.getenv("S2S_VECTOR_KEEP_FLOAT", "0") == "1"
+        return NumpyBackend(persist_root, quantization=quantization, keep_float=keep_float)
+    raise ValueError(f"Unknown vector backend '{kind}', expected one of {BACKENDS}")
+
+
+def _chromadb() -> Any:
+    import pydantic  # ensure compatibility with chromadb on pydantic<2
+
+    if not hasattr(pydantic, "field_validator"):  # pragma: no cover - compatibility shim
+        from pydantic import validator as _validator  # type: ignore
+
+        def _compat_field_validator(*fields, mode=None, **kwargs):  # type: ignore
+            if mode == "before":
+                kwargs["pre"] = True
+            return _validator(*fields, **kwargs)
+
+        setattr(pydantic, "field_validator", _compat_field_validator)
+
+    import chromadb
+
+    return chromadb
+
+
+class ChromaBackend(VectorBackend):
+    """Chroma ``PersistentClient`` collections with tuned HNSW parameters.
+
+    Chroma 0.4 only accepts embeddings as nested Python lists, so this is the
+    one place arrays are converted with ``tolist()``.
+    """
+
+    name = "chroma"
+
+    def __init__(self, persist_root: Path, client: Optional[Any] = None, hnsw: Optional[HNSWParams] = None) -> None:
+        self.persist_root = ensure_dir(Path(persist_root))
+        self.client = client or _chromadb().PersistentClient(path=str(self.persist_root))
+        self.hnsw = hnsw or HNSWParams.from_env()
+        self._collections: Dict[str, Any] = {}
+
+    def list_collections(self) -> List[str]:
+        # Compaction copies carry SCRATCH_SUFFIX and are never real collections.
+        return [item.name for item in self.client.list_collections() if not item.name.endswith(SCRATCH_SUFFIX)]
+
+    def count(self, collection: str) -> int:
+        return self._collection(collection).count()
+
+    def upsert(
+        self,
+        collection: str,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+    ) -> None:
+        self._collection(collection).upsert(
+            ids=list(ids),
+            embeddings=np.asarray(embeddings).tolist(),
+            documents=list(documents),
+            metadatas=list(metadatas),
+        )
+
+    def query(
+        self,
+        collection: str,
+        embedding: np.ndarray,
+        k: int,
+        doc_ids: Optional[Sequence[str]] = None,
+        contains: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        target = self._collection(collection)
+        size = target.count()
+        if not size:
+            return []
+        where = None
+        where_document = None
+        if doc_ids is not None:
+            where = {"doc_id": {"$in": list(doc_ids)}}
+        if contains:
+            # $contains is case-sensitive: match the lower, title and upper case spellings.
+            variants = sorted({form for term in contains for form in (term, term.title(), term.upper())})
+            clauses = [{"$contains": form} for form in variants]
+            where_document = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+        # Chroma trims n_results to the chunks the filters let through.
+        result = target.query(
+            query_embeddings=[np.asarray(embedding).tolist()],
+            n_results=min(k, size),
+            where=where,
+            where_document=where_document,
+        )
+        return [
+            {"id": idx, "text": text, "metadata": meta, "distance": distance}
+            for idx, text, meta, distance in zip(
+                result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+    def delete_documents(self, collection: str, doc_ids: Iterable[str]) -> int:
+        target = self._collection(collection)
+        ids = target.get(where={"doc_id": {"$in": list(doc_ids)}}, include=[])["ids"]
+        if ids:
+            target.delete(ids=ids)
+        return len(ids)
+
+    def drop(self, collection: str) -> None:
+        self._collections.pop(collection, None)
+        if collection in {item.name for item in self.client.list_collections()}:
+            self.client.delete_collection(collection)
+
+    def compact(self, collection: str) -> int:
+        """Copy live chunks page by page into a fresh collection that then takes over the name.
+
+        Memory stays bounded by ``COMPACT_PAGE_SIZE`` and the new HNSW graph is
+        built with the current parameters.
+        """
+        source = self._collection(collection)
+        scratch = self._scratch_name(collection)
+        self.drop(scratch)
+        target = self.client.create_collection(name=scratch, metadata=self.hnsw.metadata())
+        offset = 0
+        while True:
+            page = source.get(limit=COMPACT_PAGE_SIZE, offset=offset, include=["embeddings", "documents", "metadatas"])
+            if not page["ids"]:
+                break
+            target.add(
+                ids=page["ids"],
+                embeddings=page["embeddings"],
+                documents=page["documents"],
+                metadatas=page["metadatas"],
+            )
+            offset += len(page["ids"])
+        self.client.delete_collection(collection)
+        target.modify(name=collection)
+        self._collections[collection] = target
+        return offset
+
+    def _collection(self, name: str) -> Any:
+        if name not in self._collections:
+            scratch = self._scratch_name(name)
+            existing = {item.name for item in self.client.list_collections()}
+            if name not in existing and scratch in existing:
+                # A compaction stopped between dropping the original and renaming its copy.
+                self.client.get_collection(scratch).modify(name=name)
+            self._collections[name] = self.client.get_or_create_collection(name=name, metadata=self.hnsw.metadata())
+        return self._collections[name]
+
+    @staticmethod
+    def _scratch_name(name: str) -> str:
+        return f"{name[: 63 - len(SCRATCH_SUFFIX)]}{SCRATCH_SUFFIX}"
+
+
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def quantize(vectors: np.ndarray, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Storage codes for unit vectors plus per-row scales (int8 only).
+
+    float32 is stored as is, int8 maps each row's largest component to 127
+    (``row ~= codes * scale``), and binary packs the sign bits.
+    """
+    if quantization == "float32":
+        return np.ascontiguousarray(vectors, dtype=np.float32), None
+    if quantization == "int8":
+        peak = np.abs(vectors).max(axis=1, keepdims=True)
+        scales = np.where(peak == 0, 1.0, peak / 127.0).astype(np.float32)
+        return np.rint(vectors / scales).astype(np.int8), scales.ravel()
+    if quantization == "binary":
+        return np.packbits(vectors > 0, axis=1), None
+    raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+
+
+@dataclass
+class _NumpyCollection:
+    codes: np.ndarray
+    ids: List[str] = field(default_factory=list)
+    documents: List[str] = field(default_factory=list)
+    metadatas: List[Dict[str, Any]] = field(default_factory=list)
+    live: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    floats: Optional[np.ndarray] = None
+    scales: Optional[np.ndarray] = None
+    doc_rows: Optional[Dict[str, List[int]]] = None  # built on the first query filtered by document
+
+
+class NumpyBackend(VectorBackend):
+    """Exact or quantized search over memory-mapped ``.npy`` embeddings.
+
+    Each collection is a folder under ``<persist_root>/<name>`` holding the
+    embeddings (``vectors.npy``, or ``codes.npy`` when quantized) and a
+    ``chunks.jsonl`` sidecar with a line per chunk (id, text, metadata) and
+    a line per deletion. Opening one replays the sidecar and maps the
+    arrays; a query is one matrix-vector product plus ``argpartition``.
+    Upserts append rows to the arrays in place and lines to the sidecar,
+    and deletes append a line, so a write costs what it adds; ``compact``
+    rewrites the files without the deleted rows. Arrays longer than the
+    sidecar (a write cut short) are read, and later appended to, only up to
+    its last chunk.
+
+    ``quantization`` picks the code format: ``float32`` unit vectors, ``int8``
+    with a per-row scale (4x smaller, scored against the float query) or ``binary`` sign bits (32x
+    smaller, shortlisted by Hamming distance and rescored against the float
+    query). With ``keep_float`` a float32 copy stays on disk and only the
+    ``rescore_multiplier * k`` shortlisted rows are read from it, giving exact
+    distances while scans touch just the codes.
+    """
+
+    def __init__(
+        self,
+        persist_root: Path,
+        quantization: str = "float32",
+        rescore_multiplier: int = 4,
+        keep_float: bool = False,
+    ) -> None:
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+        self.quantization = quantization
+        self.rescore_multiplier = max(1, rescore_multiplier)
+        self.keep_float = keep_float and quantization != "float32"
+        self.name = "numpy" if quantization == "float32" else f"numpy-{quantization}"
+        self.root = ensure_dir(Path(persist_root) / self.name)
+        self._collections: Dict[str, _NumpyCollection] = {}
+
+    def list_collections(self) -> List[str]:
+        return sorted(path.name for path in self.root.iterdir() if (path / SIDECAR).exists())
+
+    def count(self, collection: str) -> int:
+        return int(self._load(collection).live.sum())
+
+    def nbytes(self, collection: str) -> int:
+        """Size of the codes and scales, i.e. what a full scan reads."""
+        state = self._load(collection)
+        return int(state.codes.nbytes + (state.scales.nbytes if state.scales is not None else 0))
+
+    def upsert(
+        self,
+        collection: str,
+        ids: Sequence[str],
+        embeddings: np.ndarray,
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+    ) -> None:
+        state = self._load(collection)
+        positions = {chunk_id: row for row, chunk_id in enumerate(state.ids)}
+        replaced = [positions[chunk_id] for chunk_id in ids if chunk_id in positions]
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        codes, scales = quantize(vectors, self.quantization)
+        rows = len(state.ids)
+        if self.keep_float and rows and state.floats is None:
+            raise ValueError(f"Collection '{collection}' was built without keep_float; compact or reset it")
+        folder = ensure_dir(self.root / collection)
+        state.codes = self._append_array(folder / self._codes_file, codes, rows)
+        if scales is not None:
+            state.scales = np.asarray(self._append_array(folder / "scales.npy", scales, rows))
+        if self.keep_float:
+            state.floats = self._append_array(folder / "vectors.npy", vectors, rows)
+        elif self.quantization != "float32":
+            state.floats = None
+            (folder / "vectors.npy").unlink(missing_ok=True)
+        state.ids.extend(ids)
+        state.documents.extend(documents)
+        state.metadatas.extend(metadatas)
+        state.doc_rows = None
+        state.live = np.concatenate([state.live, np.ones(len(ids), dtype=bool)])
+        state.live[replaced] = False
+        entries = [
+            {"id": chunk_id, "text": text, "metadata": meta} for chunk_id, text, meta in zip(ids, documents, metadatas)
+        ]
+        if replaced:
+            entries.append({"deleted": replaced})
+        self._append_sidecar(folder, entries)
+
+    def query(
+        self,
+        collection: str,
+        embedding: np.ndarray,
+        k: int,
+        doc_ids: Optional[Sequence[str]] = None,
+        contains: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        state = self._load(collection)
+        rows: Optional[np.ndarray] = None  # candidate rows; None means every row
+        if doc_ids is not None:
+            if state.doc_rows is None:
+                state.doc_rows = {}
+                for row, meta in enumerate(state.metadatas):
+                    state.doc_rows.setdefault(meta.get("doc_id"), []).append(row)
+            rows = np.array(sorted(row for doc_id in doc_ids for row in state.doc_rows.get(doc_id, [])), dtype=np.int64)
+            rows = rows[state.live[rows]]
+        if contains:
+            rows = np.flatnonzero(state.live) if rows is None else rows
+            keep = [any(term in state.documents[row].lower() for term in contains) for row in rows]
+            rows = rows[np.asarray(keep, dtype=bool)]
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query = query / (np.linalg.norm(query) or 1.0)
+        if rows is None:
+            live = int(state.live.sum())
+            if not live:
+                return []
+            scores = self._scores(state, query)
+            if live < len(scores):
+                scores[~state.live] = -np.inf
+            rows = np.arange(len(scores))
+        else:
+            # Filtered queries score only their own rows, not the whole collection.
+            live = len(rows)
+            if not live:
+                return []
+            scores = self._scores(state, query, rows)
+        k = min(k, live)
+        rescore = self.quantization == "binary" or (self.quantization == "int8" and state.floats is not None)
+        if rescore:
+            shortlist = self._top(scores, min(k * self.rescore_multiplier, live))
+            if state.floats is not None:
+                shortlist = shortlist[np.argsort(rows[shortlist])]  # ascending rows keep memmap reads sequential
+                scores[shortlist] = np.asarray(state.floats[rows[shortlist]]) @ query
+            else:
+                bits = np.unpackbits(state.codes[rows[shortlist]], axis=1, count=len(query)).astype(np.float32)
+                scores[shortlist] = (2.0 * bits - 1.0) @ query / np.sqrt(len(query))
+            top = shortlist[np.argsort(-scores[shortlist])[:k]]
+        else:
+            top = self._top(scores, k)
+        return [
+            {
+                "id": state.ids[rows[slot]],
+                "text": state.documents[rows[slot]],
+                "metadata": state.metadatas[rows[slot]],
+                "distance": float(1.0 - scores[slot]),
+            }
+            for slot in top
+        ]
+
+    def delete_documents(self, collection: str, doc_ids: Iterable[str]) -> int:
+        state = self._load(collection)
+        targets = set(doc_ids)
+        rows = [row for row, meta in enumerate(state.metadatas) if state.live[row] and meta.get("doc_id") in targets]
+        if rows:
+            state.live[rows] = False
+            self._append_sidecar(self.root / collection, [{"deleted": rows}])
+        return len(rows)
+
+    def drop(self, collection: str) -> None:
+        self._collections.pop(collection, None)
+        shutil.rmtree(self.root / collection, ignore_errors=True)
+
+    def compact(self, collection: str) -> int:
+        state = self._load(collection)
+        keep = np.flatnonzero(state.live)
+        compacted = _NumpyCollection(
+            codes=state.codes,
+            ids=[state.ids[row] for row in keep],
+            documents=[state.documents[row] for row in keep],
+            metadatas=[state.metadatas[row] for row in keep],
+            live=np.ones(len(keep), dtype=bool),
+        )
+        floats = None if state.floats is None else np.asarray(state.floats[keep])
+        scales = None if state.scales is None else np.asarray(state.scales[keep])
+        self._save(collection, compacted, np.asarray(state.codes[keep]), floats, scales)
+        return len(keep)
+
+    @property
+    def _codes_file(self) -> str:
+        # float32 codes are the vectors themselves; quantized ones may sit next to a float32 copy.
+        return "vectors.npy" if self.quantization == "float32" else "codes.npy"
+
+    def _scores(self, state: _NumpyCollection, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Similarity of every row (or of ``rows``) to ``query``, in blocks so quantized codes are never expanded at once."""
+        codes = state.codes if rows is None else state.codes[rows]
+        scales = state.scales if rows is None or state.scales is None else state.scales[rows]
+        scores = np.empty(len(codes), dtype=np.float32)
+        if self.quantization == "binary":
+            bits = np.packbits(query > 0)
+            for begin in range(0, len(codes), SCAN_BLOCK):
+                hamming = _POPCOUNT[np.bitwise_xor(codes[begin : begin + SCAN_BLOCK], bits)].sum(axis=1)
+                scores[begin : begin + SCAN_BLOCK] = 1.0 - 2.0 * hamming / len(query)
+            return scores
+        for begin in range(0, len(codes), SCAN_BLOCK):
+            block = slice(begin, begin + SCAN_BLOCK)
+            scores[block] = codes[block].astype(np.float32, copy=False) @ query
+            if scales is not None:
+                scores[block] *= scales[block]
+        return scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _load(self, collection: str) -> _NumpyCollection:
+        if collection not in self._collections:
+            folder = self.root / collection
+            if (folder / SIDECAR).exists():
+                ids: List[str] = []
+                documents: List[str] = []
+                metadatas: List[Dict[str, Any]] = []
+                deleted: List[int] = []
+                for entry in self._read_sidecar(folder):
+                    if "deleted" in entry:
+                        deleted.extend(entry["deleted"])
+                        continue
+                    ids.append(entry["id"])
+                    documents.append(entry["text"])
+                    metadatas.append(entry["metadata"])
+                rows = len(ids)
+                live = np.ones(rows, dtype=bool)
+                live[deleted] = False
+                floats = folder / "vectors.npy"
+                self._collections[collection] = _NumpyCollection(
+                    codes=np.load(folder / self._codes_file, mmap_mode="r")[:rows],
+                    ids=ids,
+                    documents=documents,
+                    metadatas=metadatas,
+                    live=live,
+                    floats=np.load(floats, mmap_mode="r")[:rows] if self.keep_float and floats.exists() else None,
+                    scales=np.load(folder / "scales.npy")[:rows] if self.quantization == "int8" else None,
+                )
+            else:
+                self._collections[collection] = _NumpyCollection(codes=np.zeros((0, 0), dtype=np.float32))
+        return self._collections[collection]
+
+    @staticmethod
+    def _read_sidecar(folder: Path) -> List[Dict[str, Any]]:
+        """Sidecar entries, truncating a last line left incomplete by an interrupted append."""
+        path = folder / SIDECAR
+        entries = []
+        offset = 0
+        with path.open("rb") as handle:
+            for line in handle:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                offset += len(line)
+        if offset < path.stat().st_size:
+            with path.open("r+b") as handle:
+                handle.truncate(offset)
+        return entries
+
+    @staticmethod
+    def _append_sidecar(folder: Path, entries: List[Dict[str, Any]]) -> None:
+        with (folder / SIDECAR).open("a", encoding="utf-8") as handle:
+            handle.write("".join(json.dumps(entry) + "\n" for entry in entries))
+
+    def _save(
+        self,
+        collection: str,
+        state: _NumpyCollection,
+        codes: np.ndarray,
+        floats: Optional[np.ndarray] = None,
+        scales: Optional[np.ndarray] = None,
+    ) -> None:
+        """Rewrite the whole collection, via temp files swapped in with ``os.replace``."""
+        folder = ensure_dir(self.root / collection)
+        state.codes = self._replace_array(folder / self._codes_file, codes)
+        if scales is not None:
+            state.scales = np.asarray(self._replace_array(folder / "scales.npy", scales))
+        if floats is not None:
+            state.floats = self._replace_array(folder / "vectors.npy", floats.astype(np.float32, copy=False))
+        elif self.quantization != "float32":
+            state.floats = None
+            (folder / "vectors.npy").unlink(missing_ok=True)
+        entries = [
+            {"id": chunk_id, "text": text, "metadata": meta}
+            for chunk_id, text, meta in zip(state.ids, state.documents, state.metadatas)
+        ]
+        deleted = np.flatnonzero(~state.live).tolist()
+        if deleted:
+            entries.append({"deleted": deleted})
+        tmp = folder / "chunks.tmp.jsonl"
+        tmp.write_text("".join(json.dumps(entry) + "\n" for entry in entries), encoding="utf-8")
+        os.replace(tmp, folder / SIDECAR)
+        self._collections[collection] = state
+
+    @classmethod
+    def _append_array(cls, path: Path, array: np.ndarray, rows: int) -> np.ndarray:
+        """Write ``array`` after the first ``rows`` rows of the ``.npy`` at ``path``, in place.
+
+        NumPy pads ``.npy`` headers so the row count can grow without moving
+        the data; files whose header has no room (or a different layout) are
+        rewritten instead. Anything past ``rows`` is overwritten.
+        """
+        array = np.ascontiguousarray(array)
+        if not rows or not path.exists():
+            return cls._replace_array(path, array)
+        fmt = np.lib.format
+        header_io = {
+            (1, 0): (fmt.read_array_header_1_0, fmt.write_array_header_1_0),
+            (2, 0): (fmt.read_array_header_2_0, fmt.write_array_header_2_0),
+        }
+        with path.open("r+b") as handle:
+            version = fmt.read_magic(handle)
+            if version in header_io:
+                read_header, write_header = header_io[version]
+                shape, fortran_order, dtype = read_header(handle)
+                offset = handle.tell()
+                header = io.BytesIO()
+                grown = (rows + len(array),) + shape[1:]
+                write_header(header, {"descr": fmt.dtype_to_descr(dtype), "fortran_order": False, "shape": grown})
+                if (
+                    not fortran_order
+                    and dtype == array.dtype
+                    and shape[1:] == array.shape[1:]
+                    and rows <= shape[0]
+                    and header.tell() == offset
+                ):
+                    handle.seek(offset + rows * dtype.itemsize * int(np.prod(shape[1:])))
+                    handle.truncate()
+                    handle.write(array.tobytes())
+                    handle.seek(0)
+                    handle.write(header.getvalue())
+                    handle.flush()
+                    return np.load(path, mmap_mode="r")
+        existing = np.load(path, mmap_mode="r")[:rows]
+        return cls._replace_array(path, np.concatenate([existing, array]))
+
+    @staticmethod
+    def _replace_array(path: Path, array: np.ndarray) -> np.ndarray:
+        tmp = path.with_suffix(".tmp.npy")
+        np.save(tmp, np.ascontiguousarray(array))
+        os.replace(tmp, path)
+        return np.load(path, mmap_mode="r")
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from s2s.ingest.store import page_offsets
+
+# Leaves headroom for [CLS]/[SEP] inside MiniLM's 256-token window.
+DEFAULT_MAX_TOKENS = 200
+DEFAULT_OVERLAP_TOKENS = 32
+# Estimated extra WordPiece every N characters of a long alphanumeric run; errs on
+# the side of over-counting so estimated chunks stay inside the real budget.
+WORDPIECE_CHARS = 7
+BLOCK_CHARS = 1 << 22
+
+SENTENCE, PARAGRAPH, HEADING = 1, 2, 3
+
+TokenCounter = Callable[[List[str]], List[int]]
+
+_HEADING = re.compile(
+    r"^[ \t]*(?:"
+    r"#{1,6}[ \t]"
+    r"|\d+(?:\.\d+)*[.)]?[ \t]+[A-Z]"
+    r"|[A-Z][A-Z0-9 &/,'()-]{2,60}[ \t]*$"
+    r"|[A-Z][^\n.!?:]{0,48}:[ \t]*$"
+    r")",
+    re.MULTILINE,
+)
+
+# Per code point: 0 = whitespace, 1 = ASCII alphanumeric, 2 = anything else, which
+# BERT emits as its own token (punctuation, CJK) or splits finely (other scripts).
+_CHAR_CLASS = np.full(0x110000, 2, dtype=np.int8)
+_CHAR_CLASS[[ord(ch) for ch in " \t\n\r\x0b\x0c\x85\xa0\u2028\u2029"]] = 0
+_CHAR_CLASS[[ord(ch) for ch in "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"]] = 1
+
+
+class ChunkSpan(NamedTuple):
+    """A chunk as ``text[start:end]`` plus the 1-based page it starts on."""
+
+    start: int
+    end: int
+    page: int
+
+
+def chunk_spans(
+    text: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    pages: Optional[Sequence[str]] = None,
+    token_counter: Optional[TokenCounter] = None,
+    page_starts: Optional[Sequence[int]] = None,
+) -> List[ChunkSpan]:
+    """Split text into token-budgeted chunks referenced by offsets into ``text``.
+
+    Chunks are packed from line and sentence segments. A heading starts a new
+    chunk once the current one holds a quarter of the budget, and a chunk that
+    runs out of budget is cut at the strongest boundary in its second half, with
+    up to ``overlap_tokens`` of trailing segments repeated in the next chunk.
+    Token counts come from a vectorized WordPiece estimate; pass
+    ``token_counter`` (e.g. ``wordpiece_counter(tokenizer)``) to re-check each
+    chunk against the real tokenizer and split any that still exceed the budget.
+    ``page_starts`` (e.g. from a stored document) saves locating ``pages`` in ``text``.
+    """
+    offsets = chunk_offsets(text, max_tokens, overlap_tokens, pages, token_counter, page_starts)
+    return [ChunkSpan(start, end, page) for start, end, page in offsets.tolist()]
+
+
+def chunk_offsets(
+    text: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    pages: Optional[Sequence[str]] = None,
+    token_counter: Optional[TokenCounter] = None,
+    page_starts: Optional[Sequence[int]] = None,
+) -> np.ndarray:
+    """``chunk_spans`` as an ``(n, 3)`` int64 array of start, end and page, for bulk callers."""
+    if not text or text.isspace():
+        return np.zeros((0, 3), dtype=np.int64)
+    segments = _scan(text)
+    spans = _pack(text, *(column.tolist() for column in segments), max_tokens, overlap_tokens)
+    if token_counter is not None:
+        spans = _enforce_budget(text, spans, max_tokens, token_counter)
+    offsets = np.zeros((len(spans), 3), dtype=np.int64)
+    if spans:
+        offsets[:, :2] = spans
+        starts = np.asarray(page_starts if page_starts is not None else page_offsets(text, pages))
+        offsets[:, 2] = np.maximum(1, np.searchsorted(starts, offsets[:, 0], side="right"))
+    return offsets
+
+
+def wordpiece_counter(tokenizer) -> TokenCounter:
+    """Exact token counts (without special tokens) from a Hugging Face tokenizer."""
+
+    def count(texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    return count
+
+
+def _blocks(text: str) -> Iterator[Tuple[int, int]]:
+    """Fixed-size windows ending on a newline (or whitespace) so no line or token straddles two."""
+    block_start = 0
+    while block_start < len(text):
+        block_end = min(block_start + BLOCK_CHARS, len(text))
+        if block_end < len(text):
+            split = text.rfind("\n", block_start, block_end)
+            if split <= block_start:
+                split = text.rfind(" ", block_start, block_end)
+            block_end = split + 1 if split > block_start else block_end
+        yield block_start, block_end
+        block_start = block_end
+
+
+def _codes(block: str) -> np.ndarray:
+    return np.frombuffer(block.encode("utf-32-le"), dtype=np.uint32)
+
+
+def _token_prefix(classes: np.ndarray) -> np.ndarray:
+    """Cumulative estimated tokens before each offset of the block (length ``n + 1``).
+
+    BERT pre-tokenization splits on whitespace and punctuation; an alphanumeric
+    run counts as one token plus one per ``WORDPIECE_CHARS`` further characters.
+    """
+    weights = (classes == 2).astype(np.int32)
+    alnum = (classes == 1).view(np.int8)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], alnum, [0]))))
+    run_starts, run_ends = edges[0::2], edges[1::2]
+    weights[run_starts] += 1 + (run_ends - run_starts - 1) // WORDPIECE_CHARS
+    return np.concatenate(([0], np.cumsum(weights, dtype=np.int64)))
+
+
+def _scan(text: str) -> Tuple[np.ndarray, ...]:
+    """Per segment boundary: offset, strength, token prefix, and trimmed head/tail offsets.
+
+    Segments start at every non-blank line and after sentence-ending punctuation
+    followed by a space; lines after a blank line are paragraph boundaries and
+    short lines matching ``_HEADING`` are heading boundaries. ``heads`` is the
+    first non-whitespace offset at or after a boundary and ``tails`` the end of
+    the last non-whitespace character before it, so chunks need no trimming.
+    The final boundary is ``len(text)``.
+    """
+    columns: List[List[np.ndarray]] = [[], [], [], [], []]
+    total = 0
+    last_ink = 0
+    for block_start, block_end in _blocks(text):
+        codes = _codes(text[block_start:block_end])
+        size = len(codes)
+        classes = _CHAR_CLASS[codes]
+        cumulative = _token_prefix(classes)
+        ink = np.flatnonzero(classes != 0)
+        newlines = np.flatnonzero(codes == 10)
+        solid = np.flatnonzero((codes != 32) & (codes != 9) & (codes != 13))
+
+        lines = np.concatenate(([0], newlines + 1))
+        lines = lines[lines < size]
+        found = np.searchsorted(solid, lines)
+        first = np.full(len(lines), size)
+        first[found < len(solid)] = solid[found[found < len(solid)]]
+        previous = np.searchsorted(solid, lines - 1) - 1
+        after_blank = (previous < 0) | (codes[solid[np.maximum(previous, 0)]] == 10) if len(solid) else lines >= 0
+        nonblank = (first < size) & (codes[np.minimum(first, size - 1)] != 10)
+        lines, first = lines[nonblank], first[nonblank]
+        line_strength = np.where(after_blank[nonblank], PARAGRAPH, SENTENCE).astype(np.int8)
+
+        found = np.searchsorted(newlines, lines)
+        line_ends = np.full(len(lines), size)
+        line_ends[found < len(newlines)] = newlines[found[found < len(newlines)]]
+        lead = codes[first]
+        short = (line_ends - lines) <= 72
+        candidates = (lead == ord("#")) | (short & (_CHAR_CLASS[lead] == 1) & ~((lead >= ord("a")) & (lead <= ord("z"))))
+        block = text[block_start:block_end]
+        for idx in np.flatnonzero(candidates).tolist():
+            if _HEADING.match(block, int(lines[idx])):
+                line_strength[idx] = HEADING
+
+        before = codes[:-2]
+        gap = codes[1:-1]
+        sentences = 2 + np.flatnonzero(
+            ((before == 46) | (before == 33) | (before == 63)) & ((gap == 32) | (gap == 9)) & (classes[2:] != 0)
+        )
+        block_starts = np.concatenate((lines, sentences))
+        block_strength = np.concatenate((line_strength, np.full(len(sentences), SENTENCE, dtype=np.int8)))
+        order = np.argsort(block_starts, kind="stable")
+        block_starts, block_strength = block_starts[order], block_strength[order]
+
+        found = np.searchsorted(ink, block_starts)
+        heads = np.where(found < len(ink), ink[np.minimum(found, len(ink) - 1)], size) if len(ink) else block_starts
+        tails = np.where(found > 0, ink[np.maximum(found - 1, 0)] + 1, 0) if len(ink) else block_starts
+        for column, values in zip(
+            columns,
+            (block_starts + block_start, block_strength, total + cumulative[block_starts], heads + block_start, tails + block_start),
+        ):
+            column.append(values)
+        total += int(cumulative[-1])
+        last_ink = block_start + int(ink[-1]) + 1 if len(ink) else last_ink
+
+    final = (len(text), HEADING, total, len(text), last_ink)
+    bounds, strength, prefix, heads, tails = (
+        np.concatenate(column + [np.array([value])]) for column, value in zip(columns, final)
+    )
+    strength[0] = HEADING
+    return bounds, strength, prefix, heads, tails
+
+
+def _pack(
+    text: str,
+    bounds: List[int],
+    strengths: List[int],
+    tokens: List[int],
+    heads: List[int],
+    tails: List[int],
+    max_tokens: int,
+    overlap_tokens: int,
+) -> List[Tuple[int, int]]:
+    spans: List[Tuple[int, int]] = []
+    count = len(bounds) - 1
+    min_tokens = max_tokens // 4
+    half = max_tokens // 2
+    i = 0
+    while i < count:
+        if tokens[i + 1] - tokens[i] > max_tokens:
+            spans.extend(_split_long(text, bounds[i], bounds[i + 1], tokens[i + 1] - tokens[i], max_tokens))
+            i += 1
+            continue
+        j = i + 1
+        over_budget = False
+        while j < count:
+            if strengths[j] == HEADING and tokens[j] - tokens[i] >= min_tokens:
+                break
+            if tokens[j + 1] - tokens[i] > max_tokens:
+                over_budget = True
+                break
+            j += 1
+        cut = j
+        if over_budget:
+            best = 0
+            k = j
+            while k > i and tokens[k] - tokens[i] >= half:
+                if strengths[k] > best:
+                    best, cut = strengths[k], k
+                k -= 1
+        if heads[i] < tails[cut]:
+            spans.append((heads[i], tails[cut]))
+        nxt = cut
+        if over_budget and strengths[cut] < HEADING:
+            while nxt - 1 > i and tokens[cut] - tokens[nxt - 1] <= overlap_tokens:
+                nxt -= 1
+        i = nxt
+    return spans
+
+
+def _split_long(text: str, start: int, end: int, tokens: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """Window a single oversized segment at whitespace, sized by its chars-per-token ratio."""
+    width = max(1, int((end - start) * max_tokens / tokens * 0.9))
+    spans: List[Tuple[int, int]] = []
+    while start < end:
+        stop = min(start + width, end)
+        if stop < end:
+            space = text.rfind(" ", start + width // 2, stop)
+            stop = space + 1 if space > 0 else stop
+        _append_trimmed(text, spans, start, stop)
+        start = stop
+    return spans
+
+
+def _append_trimmed(text: str, spans: List[Tuple[int, int]], start: int, end: int) -> None:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        spans.append((start, end))
+
+
+def _enforce_budget(
+    text: str,
+    spans: List[Tuple[int, int]],
+    max_tokens: int,
+    token_counter: TokenCounter,
+) -> List[Tuple[int, int]]:
+    counts = token_counter([text[start:end] for start, end in spans])
+    result: List[Tuple[int, int]] = []
+    for (start, end), tokens in zip(spans, counts):
+        if tokens <= max_tokens:
+            result.append((start, end))
+            continue
+        middle = (start + end) // 2
+        space = text.rfind(" ", start, middle)
+        middle = space if space > start else middle
+        halves: List[Tuple[int, int]] = []
+        _append_trimmed(text, halves, start, middle)
+        _append_trimmed(text, halves, middle, end)
+        result.extend(_enforce_budget(text, halves, max_tokens, token_counter) if len(halves) > 1 else halves)
+    return result
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import inspect
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_RUNTIMES = ("torch", "onnx")
+DEFAULT_ONNX_DIR = Path("models/minilm_onnx")
+
+
+@dataclass(frozen=True)
+class EmbeddingOptions:
+    """How chunk embeddings are computed.
+
+    ``sort_by_length`` groups texts of similar length into the same batch so
+    padding stays short; results are returned in input order either way.
+    ``runtime="onnx"`` runs an export made by ``export_onnx`` from ``onnx_dir``
+    with ONNX Runtime on CPU, fully offline.
+    """
+
+    batch_size: int = 64
+    sort_by_length: bool = True
+    num_threads: Optional[int] = None
+    normalize: bool = True
+    runtime: str = "torch"
+    onnx_dir: Path = DEFAULT_ONNX_DIR
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingOptions":
+        threads = os.getenv("S2S_EMBED_THREADS")
+        return cls(
+            batch_size=int(os.getenv("S2S_EMBED_BATCH_SIZE", cls.batch_size)),
+            sort_by_length=os.getenv("S2S_EMBED_SORT", "1") == "1",
+            num_threads=int(threads) if threads else None,
+            normalize=os.getenv("S2S_EMBED_NORMALIZE", "1") == "1",
+            runtime=os.getenv("S2S_EMBED_RUNTIME", cls.runtime),
+            onnx_dir=Path(os.getenv("S2S_EMBED_ONNX_DIR", str(DEFAULT_ONNX_DIR))),
+        )
+
+
+class Embedder:
+    """Sentence embedder with configurable batching, threads and runtime.
+
+    Exposes ``tokenizer``, ``max_seq_length`` and ``encode`` like
+    ``SentenceTransformer`` so ``RAGIndex`` can use either. ``stats`` counts
+    encoded texts and seconds spent, reported by ``chunks_per_second``.
+    """
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL,
+        options: Optional[EmbeddingOptions] = None,
+        model: Optional[SentenceTransformer] = None,
+    ) -> None:
+        self.model_name = model_name
+        self.options = options or EmbeddingOptions.from_env()
+        if self.options.runtime not in EMBEDDING_RUNTIMES:
+            raise ValueError(f"Unknown embedding runtime '{self.options.runtime}', expected one of {EMBEDDING_RUNTIMES}")
+        self.stats: Dict[str, float] = {"chunks": 0, "seconds": 0.0}
+        self.model: Optional[SentenceTransformer] = None
+        self.session: Any = None
+        if self.options.runtime == "onnx":
+            self._load_onnx(self.options.onnx_dir)
+        else:
+            if self.options.num_threads:
+                torch.set_num_threads(self.options.num_threads)
+            self.model = model or SentenceTransformer(model_name)
+            self.tokenizer = self.model.tokenizer
+            self.max_seq_length = self.model.max_seq_length
+
+    def encode(self, texts: Sequence[str], show_progress_bar: bool = False, **_: Any) -> np.ndarray:
+        """float32 array of shape ``(len(texts), dim)`` in input order."""
+        started = time.perf_counter()
+        texts = list(texts)
+        order = np.argsort([-len(text) for text in texts], kind="stable") if self.options.sort_by_length else None
+        ordered = [texts[idx] for idx in order] if order is not None else texts
+        size = max(1, self.options.batch_size)
+        parts = [self._encode_batch(ordered[begin : begin + size]) for begin in range(0, len(ordered), size)]
+        embeddings = np.concatenate(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+        if order is not None:
+            restored = np.empty_like(embeddings)
+            restored[order] = embeddings
+            embeddings = restored
+        self.stats["chunks"] += len(texts)
+        self.stats["seconds"] += time.perf_counter() - started
+        return embeddings
+
+    def chunks_per_second(self) -> float:
+        return self.stats["chunks"] / self.stats["seconds"] if self.stats["seconds"] else 0.0
+
+    def _encode_batch(self, batch: List[str]) -> np.ndarray:
+        if self.model is not None:
+            # One call per batch: SentenceTransformer would otherwise re-sort the whole input itself.
+            embeddings = self.model.encode(
+                batch,
+                batch_size=len(batch),
+                show_progress_bar=False,
+                convert_to_numpy=True,
+                normalize_embeddings=self.options.normalize,
+            )
+            return embeddings.astype(np.float32, copy=False)
+        encoded = self.tokenizer(
+            batch, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self._onnx_inputs if name in encoded}
+        hidden = self.session.run(None, feeds)[0]
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.options.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32, copy=False)
+
+    def _load_onnx(self, folder: Path) -> None:
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = folder / "model.onnx"
+        if not model_path.exists():
+            raise FileNotFoundError(f"No ONNX export at {model_path}; run training/export_embedder_onnx.py first")
+        settings = json.loads((folder / "s2s_embedding.json").read_text(encoding="utf-8"))
+        if settings["model_name"] != self.model_name:
+            raise ValueError(f"ONNX export in {folder} is for {settings['model_name']}, not {self.model_name}")
+        session_options = ort.SessionOptions()
+        if self.options.num_threads:
+            session_options.intra_op_num_threads = self.options.num_threads
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=session_options, providers=["CPUExecutionProvider"]
+        )
+        self._onnx_inputs = [item.name for item in self.session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(folder))
+        self.max_seq_length = settings["max_seq_length"]
+
+
+def export_onnx(output_dir: Path = DEFAULT_ONNX_DIR, model_name: str = EMBEDDING_MODEL) -> Path:
+    """Export the transformer behind ``model_name`` to ``output_dir/model.onnx`` with its tokenizer.
+
+    Mean pooling and normalization run in NumPy at encode time, matching the
+    SentenceTransformer pipeline (Transformer -> mean Pooling -> Normalize).
+    """
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sample = model.tokenizer(["syllabus chunk"], return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    axes = {name: {0: "batch", 1: "tokens"} for name in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "tokens"}
+    kwargs: Dict[str, Any] = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False  # the TorchScript exporter needs no extra packages
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in names),
+            str(output_dir / "model.onnx"),
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=14,
+            **kwargs,
+        )
+    model.tokenizer.save_pretrained(str(output_dir))
+    settings = {"model_name": model_name, "max_seq_length": model.max_seq_length, "pooling": "mean"}
+    (output_dir / "s2s_embedding.json").write_text(json.dumps(settings, indent=2), encoding="utf-8")
+    return output_dir / "model.onnx"
@@ -1,92 +1,271 @@
 from __future__ import annotations
 
+import json
+import os
+import re
 from pathlib import Path
-from typing import Iterable, List, Dict, Any
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
 
-import pydantic  # ensure compatibility with chromadb on pydantic<2
+import numpy as np
+from sentence_transformers import SentenceTransformer
 
-if not hasattr(pydantic, "field_validator"):  # pragma: no cover - compatibility shim
-    from pydantic import validator as _validator  # type: ignore
+from s2s.ingest import Document
+from s2s.rag.backends import HNSWParams, VectorBackend, make_backend
+from s2s.rag.chunking import DEFAULT_MAX_TOKENS, chunk_spans, wordpiece_counter
+from s2s.rag.embedding import EMBEDDING_MODEL, Embedder, EmbeddingOptions
+from s2s.utils import ensure_dir, hash_text, log_interaction
 
-    def _compat_field_validator(*fields, mode=None, **kwargs):  # type: ignore
-        if mode == "before":
-            kwargs["pre"] = True
-        return _validator(*fields, **kwargs)
+SHARD_KEYS = ("course",)
+SHARD_SEPARATOR = "--"
 
-    setattr(pydantic, "field_validator", _compat_field_validator)
+_COURSE_LINE = re.compile(r"^\W*course\s*:\s*(.+)$", re.IGNORECASE | re.MULTILINE)
 
-import chromadb
-from sentence_transformers import SentenceTransformer
 
-from s2s.ingest import Document
-from s2s.utils import chunk_text, ensure_dir, log_interaction
+def document_course(doc: Document, text: Optional[str] = None) -> str:
+    """Course named on a ``Course:`` line, else the first non-empty line, as the extractor does."""
+    text = doc.text if text is None else text
+    match = _COURSE_LINE.search(text)
+    if match:
+        return match.group(1).strip()
+    return next((line.strip() for line in text.splitlines() if line.strip()), "unknown")
+
+
+def shard_name(project: str, key: str) -> str:
+    """Valid Chroma collection name (3-63 chars of ``[A-Za-z0-9_-]``) for one shard."""
+    slug = re.sub(r"[^a-z0-9]+", "-", key.lower()).strip("-") or "unknown"
+    name = f"{project}{SHARD_SEPARATOR}{slug}"
+    if len(name) > 63:
+        name = f"{name[:54].rstrip('-_')}-{hash_text(name)[:8]}"
+    return name
 
 
 class RAGIndex:
-    """Thin wrapper around Chroma for syllabus snippets."""
+    """Syllabus snippet index over a pluggable ``VectorBackend`` (Chroma by default).
+
+    With ``shard_by="course"`` each course gets its own collection and searches
+    fan out over all of them (or only one, given ``course=``), keeping every
+    collection small. Deleted chunks are tracked in a sidecar file and
+    ``maybe_compact`` rebuilds collections once deletions pile up, since
+    neither backend reclaims deleted entries on its own.
+    """
+
+    def __init__(
+        self,
+        project: str,
+        persist_root: Path = Path("data/processed/indices"),
+        backend: Union[str, VectorBackend, None] = None,
+        embedder: Union[Embedder, SentenceTransformer, None] = None,
+        embedding: Optional[EmbeddingOptions] = None,
+        hnsw: Optional[HNSWParams] = None,
+        quantization: Optional[str] = None,
+        shard_by: Optional[str] = None,
+        compact_ratio: float = 0.5,
+        compact_min_deleted: int = 1000,
+    ) -> None:
+        """``backend`` is ``"chroma"``, ``"numpy"`` (default ``S2S_VECTOR_BACKEND``) or a shared instance.
+
+        ``quantization`` (``float32``, ``int8`` or ``binary``) selects the NumPy
+        backend's storage format; embeddings stay ndarrays all the way down.
+        ``embedding`` sets batch size, length sorting, threads, normalization
+        and the torch/ONNX runtime (default ``EmbeddingOptions.from_env()``).
 
-    def __init__(self, project: str, persist_root: Path = Path("data/processed/indices")) -> None:
+        Passing the same backend and ``embedder`` to several project indexes
+        shares one warm client and model between them.
+        """
+        shard_by = shard_by if shard_by is not None else os.getenv("S2S_INDEX_SHARD_BY") or None
+        if shard_by is not None and shard_by not in SHARD_KEYS:
+            raise ValueError(f"Unknown shard key '{shard_by}', expected one of {SHARD_KEYS}")
         self.project = project
         self.persist_root = ensure_dir(persist_root)
-        self.client = chromadb.PersistentClient(path=str(self.persist_root))
-        self.collection = self.client.get_or_create_collection(
-            name=self.project,
-            metadata={"hnsw:space": "cosine"},
-        )
-        self.embedder = SentenceTransformer("all-MiniLM-L6-v2")
+        if not isinstance(backend, VectorBackend):
+            backend = make_backend(backend, self.persist_root, hnsw=hnsw, quantization=quantization)
+        self.backend = backend
+        self.shard_by = shard_by
+        self.compact_ratio = compact_ratio
+        self.compact_min_deleted = compact_min_deleted
+        self._stats_path = self.persist_root / f"{project}.{self.backend.name}.lifecycle.json"
+        self.embedder_name = EMBEDDING_MODEL
+        if not isinstance(embedder, Embedder):
+            embedder = Embedder(self.embedder_name, options=embedding, model=embedder)
+        self.embedder = embedder
+        # Budget chunks with the embedder's own tokenizer so nothing is truncated.
+        self.max_chunk_tokens = min(DEFAULT_MAX_TOKENS, self.embedder.max_seq_length - 2)
+        self.token_counter = wordpiece_counter(self.embedder.tokenizer)
+        self._query_embeddings: Dict[str, np.ndarray] = {}
+
+    @property
+    def layout(self) -> str:
+        """Identifies where chunks are stored; part of the index stage fingerprint."""
+        shards = f"shard:{self.shard_by}" if self.shard_by else "single"
+        return f"{self.backend.name}/{shards}"
 
     def ingest_documents(self, documents: Iterable[Document]) -> int:
-        ids: List[str] = []
-        texts: List[str] = []
-        metadatas: List[Dict[str, Any]] = []
+        batches: Dict[str, Dict[str, List[Any]]] = {}
 
         for doc in documents:
-            for idx, chunk in enumerate(chunk_text(doc.text)):
-                chunk_id = f"{doc.id}-{idx}"
-                ids.append(chunk_id)
-                texts.append(chunk)
-                metadatas.append({"doc_id": doc.id, "path": doc.path})
-        if not ids:
+            # Stored documents decode their text on every access, so read it once.
+            text = doc.text
+            page_starts = doc.page_starts()
+            spans = chunk_spans(
+                text,
+                max_tokens=self.max_chunk_tokens,
+                pages=doc.pages if page_starts is None else None,
+                token_counter=self.token_counter,
+                page_starts=page_starts,
+            )
+            if not spans:
+                continue
+            batch = batches.setdefault(self._target(doc, text), {"ids": [], "documents": [], "metadatas": []})
+            # Offsets only hold for this version of the text; readers compare the hash first.
+            doc_hash = doc.content_hash()
+            for idx, span in enumerate(spans):
+                batch["ids"].append(f"{doc.id}-{idx}")
+                batch["documents"].append(text[span.start : span.end])
+                batch["metadatas"].append(
+                    {
+                        "doc_id": doc.id,
+                        "doc_hash": doc_hash,
+                        "path": doc.path,
+                        "page": span.page,
+                        "start": span.start,
+                        "end": span.end,
+                    }
+                )
+        total = sum(len(batch["ids"]) for batch in batches.values())
+        if not total:
             return 0
 
-        embeddings = self.embedder.encode(texts, show_progress_bar=False).tolist()
-        self.collection.upsert(ids=ids, documents=texts, metadatas=metadatas, embeddings=embeddings)
+        for name, batch in batches.items():
+            embeddings = self.embedder.encode(batch["documents"], show_progress_bar=False)
+            self.backend.upsert(name, embeddings=embeddings, **batch)
         log_interaction(
             tag="rag_ingest",
-            prompt=f"Ingested {len(ids)} chunks for project {self.project}",
+            prompt=f"Ingested {total} chunks for project {self.project}",
             response="ok",
-            metadata={"chunks": len(ids)},
-        )
-        return len(ids)
-
-    def search(self, query: str, k: int = 4) -> List[Dict[str, Any]]:
-        embeddings = self.embedder.encode([query], show_progress_bar=False).tolist()
-        result = self.collection.query(query_embeddings=embeddings, n_results=k)
-        hits: List[Dict[str, Any]] = []
-        for ids, docs, metas, distances in zip(
-            result["ids"], result["documents"], result["metadatas"], result["distances"]
-        ):
-            for idx in range(len(ids)):
-                hits.append(
-                    {
-                        "id": ids[idx],
-                        "text": docs[idx],
-                        "metadata": metas[idx],
-                        "distance": distances[idx],
-                    }
-                )
-        log_interaction(
-            tag="rag_search",
-            prompt=query,
-            response=f"{len(hits)} hits",
-            metadata={"hits": hits[:2]},
+            metadata={
+                "chunks": total,
+                "collections": len(batches),
+                "backend": self.backend.name,
+                "chunks_per_second": round(self.embedder.chunks_per_second(), 1),
+            },
         )
-        return hits
+        return total
+
+    def search(
+        self,
+        query: str,
+        k: int = 4,
+        course: Optional[str] = None,
+        doc_ids: Optional[Sequence[str]] = None,
+        contains: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Nearest chunks to ``query``, optionally only within one course shard or among ``doc_ids``.
+
+        ``contains`` restricts hits to chunks mentioning one of the (lowercase) terms.
+        """
+        return self.search_many([query], k, course, doc_ids, contains)[0]
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        k: int = 4,
+        course: Optional[str] = None,
+        doc_ids: Optional[Sequence[str]] = None,
+        contains: Optional[Sequence[str]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """``search`` for each of ``queries``, embedding the ones not seen before in one batch."""
+        embeddings = self._query_embedding_batch(queries)
+        if course is not None and self.shard_by == "course":
+            names = [shard_name(self.project, course)]
+        else:
+            names = self.collection_names()
+        results: List[List[Dict[str, Any]]] = []
+        for query, embedding in zip(queries, embeddings):
+            hits: List[Dict[str, Any]] = []
+            for name in names:
+                hits.extend(self.backend.query(name, embedding, k, doc_ids=doc_ids, contains=contains))
+            hits = sorted(hits, key=lambda hit: hit["distance"])[:k]
+            log_interaction(
+                tag="rag_search",
+                prompt=query,
+                response=f"{len(hits)} hits",
+                metadata={"hits": hits[:2], "collections": len(names)},
+            )
+            results.append(hits)
+        return results
 
     def count(self) -> int:
-        return self.collection.count()
+        return sum(self.backend.count(name) for name in self.collection_names())
+
+    def collection_names(self) -> List[str]:
+        """The project's base collection plus any course shards, whatever the current layout."""
+        prefix = f"{self.project}{SHARD_SEPARATOR}"
+        return [self.project] + sorted(name for name in self.backend.list_collections() if name.startswith(prefix))
+
+    def delete_documents(self, doc_ids: Iterable[str]) -> None:
+        """Remove every chunk belonging to the given documents."""
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return
+        deleted = sum(self.backend.delete_documents(name, doc_ids) for name in self.collection_names())
+        if deleted:
+            stats = self._read_stats()
+            stats["deleted"] = stats.get("deleted", 0) + deleted
+            self._write_stats(stats)
 
     def reset(self) -> None:
-        ids = self.collection.get()["ids"]
-        if ids:
-            self.collection.delete(ids=ids)
+        """Drop the project's collections instead of deleting chunk by chunk."""
+        for name in self.collection_names():
+            self.backend.drop(name)
+        self._write_stats({"deleted": 0})
+
+    def maybe_compact(self) -> bool:
+        """Compact once deleted chunks reach ``compact_ratio`` of the live ones (and ``compact_min_deleted``)."""
+        deleted = self._read_stats().get("deleted", 0)
+        if deleted < self.compact_min_deleted or deleted < self.compact_ratio * max(self.count(), 1):
+            return False
+        self.compact()
+        return True
+
+    def compact(self) -> int:
+        """Rebuild every collection from its live chunks; empty course shards are dropped.
+
+        Returns the number of chunks kept.
+        """
+        kept = 0
+        for name in self.collection_names():
+            live = self.backend.compact(name)
+            if not live and name != self.project:
+                self.backend.drop(name)
+            kept += live
+        self._write_stats({"deleted": 0})
+        log_interaction(
+            tag="rag_compact",
+            prompt=f"Compacted index for project {self.project}",
+            response="ok",
+            metadata={"chunks": kept, "backend": self.backend.name},
+        )
+        return kept
+
+    def _query_embedding_batch(self, queries: Sequence[str]) -> List[np.ndarray]:
+        # Retrieval repeats the same few queries for every document.
+        missing = list(dict.fromkeys(query for query in queries if query not in self._query_embeddings))
+        if missing:
+            if len(self._query_embeddings) + len(missing) > 256:
+                self._query_embeddings.clear()
+            encoded = self.embedder.encode(missing, show_progress_bar=False)
+            self._query_embeddings.update(zip(missing, encoded))
+        return [self._query_embeddings[query] for query in queries]
+
+    def _target(self, doc: Document, text: Optional[str] = None) -> str:
+        if self.shard_by == "course":
+            return shard_name(self.project, document_course(doc, text))
+        return self.project
+
+    def _read_stats(self) -> Dict[str, Any]:
+        if not self._stats_path.exists():
+            return {}
+        return json.loads(self._stats_path.read_text(encoding="utf-8"))
+
+    def _write_stats(self, stats: Dict[str, Any]) -> None:
+        self._stats_path.write_text(json.dumps(stats), encoding="utf-8")
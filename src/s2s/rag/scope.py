@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from s2s.ingest import Document
+from s2s.rag.index import RAGIndex
+
+# Queries for the chunks that hold assignments: deadlines, deliverables and grading.
+DEADLINE_QUERIES = (
+    "assignment due date and submission deadline",
+    "deliverables to submit for the assignment",
+    "grading weight, points and percentage of the final grade",
+    "exam, quiz, presentation and project milestone dates",
+)
+# Words a chunk naming a deadline almost always contains; every indexed chunk
+# holding one is scanned, so work grows with the assignments, not the pages.
+DEADLINE_TERMS = ("due", "deadline", "submit", "submission", "exam", "quiz")
+SCOPE_TOP_K = 4
+# Upper bound on keyword-matched chunks per document.
+SCOPE_MAX_CHUNKS = 1024
+# Lines kept around each retrieved chunk: enough for the extractor's lookback,
+# lookahead and the heading an entry sits under.
+SCOPE_CONTEXT_LINES = 5
+
+
+@dataclass
+class Scope:
+    """The part of a document retrieval selected for extraction."""
+
+    text: str
+    windows: List[Tuple[int, int]]
+    lines: int
+    total_lines: int
+    chunks: int
+
+    @property
+    def share(self) -> float:
+        return self.lines / max(self.total_lines, 1)
+
+
+def line_windows(
+    text: str, spans: Sequence[Tuple[int, int]], context_lines: int = SCOPE_CONTEXT_LINES
+) -> Tuple[List[Tuple[int, int]], int]:
+    """Line ranges ``[first, last)`` covering character ``spans`` plus ``context_lines`` around each, merged.
+
+    Also returns the document's line count.
+    """
+    starts = [0]
+    newline = text.find("\n")
+    while newline != -1:
+        starts.append(newline + 1)
+        newline = text.find("\n", newline + 1)
+    total = len(starts)
+    ranges = []
+    for start, end in spans:
+        first = bisect_right(starts, start) - 1
+        last = bisect_right(starts, max(start, end - 1))
+        ranges.append((max(0, first - context_lines), min(total, last + context_lines)))
+    return _merge(ranges), total
+
+
+def _merge(ranges: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def retrieve_spans(
+    rag_index: RAGIndex,
+    doc: Document,
+    queries: Sequence[str] = DEADLINE_QUERIES,
+    k: int = SCOPE_TOP_K,
+    terms: Sequence[str] = DEADLINE_TERMS,
+) -> List[Tuple[int, int]]:
+    """Character spans of the chunks of ``doc`` to extract from, in document order.
+
+    The ``k`` chunks closest to any of ``queries`` catch entries phrased
+    without a deadline word; every chunk containing one of ``terms`` is kept
+    as well, so nothing an assignment line would match is lost to the cut.
+    Empty when the document is not indexed, or was indexed from other text
+    and the chunk offsets no longer apply.
+    """
+    doc_hash = doc.content_hash()
+    best: Dict[Tuple[int, int], float] = {}
+    for hits in rag_index.search_many(queries, k=k, doc_ids=[doc.id]):
+        for hit in hits:
+            if hit["metadata"].get("doc_hash") != doc_hash:
+                return []
+            span = _span(hit)
+            best[span] = min(hit["distance"], best.get(span, float("inf")))
+    spans = set(sorted(best, key=best.__getitem__)[:k])
+    if terms and spans:
+        hits = rag_index.search(queries[0], k=SCOPE_MAX_CHUNKS, doc_ids=[doc.id], contains=terms)
+        if any(hit["metadata"].get("doc_hash") != doc_hash for hit in hits):
+            return []
+        spans.update(_span(hit) for hit in hits)
+    return sorted(spans)
+
+
+def retrieve_scope(
+    rag_index: RAGIndex,
+    doc: Document,
+    queries: Sequence[str] = DEADLINE_QUERIES,
+    k: int = SCOPE_TOP_K,
+    context_lines: int = SCOPE_CONTEXT_LINES,
+    text: Optional[str] = None,
+    terms: Sequence[str] = DEADLINE_TERMS,
+) -> Optional[Scope]:
+    """Top-ranked chunks of ``doc`` plus surrounding lines, or None when it is not indexed as it reads now.
+
+    Windows are joined by blank lines, so the extractor never reads an entry
+    across a gap. The line records take their course from is always kept.
+    """
+    spans = retrieve_spans(rag_index, doc, queries, k, terms)
+    if not spans:
+        return None
+    text = doc.text if text is None else text
+    windows, total = line_windows(text, spans, context_lines)
+    lines = text.split("\n")
+    course = course_line(lines)
+    if course is not None:
+        windows = _merge(windows + [(course, course + 1)])
+    scoped = "\n\n".join("\n".join(lines[first:last]) for first, last in windows)
+    return Scope(
+        text=scoped,
+        windows=windows,
+        lines=sum(last - first for first, last in windows),
+        total_lines=total,
+        chunks=len(spans),
+    )
+
+
+def course_line(lines: Sequence[str]) -> Optional[int]:
+    """Index of the line ``ParsedDocument`` reads the course from: the first naming one, else the first non-blank."""
+    first = None
+    for number, line in enumerate(lines):
+        if "course:" in line.lower():
+            return number
+        if first is None and line.strip():
+            first = number
+    return first
+
+
+def _span(hit: Dict[str, Any]) -> Tuple[int, int]:
+    return int(hit["metadata"]["start"]), int(hit["metadata"]["end"])
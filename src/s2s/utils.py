@@ -76,3 +76,12 @@ def safe_filename(text: str) -> str:
 def hash_text(text: str) -> str:
     """Return a stable hash for supplied text."""
     return sha1(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Return a stable hash of a file's bytes."""
+    digest = sha1()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
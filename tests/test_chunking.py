@@ -0,0 +1,37 @@
+from s2s.rag.chunking import chunk_spans
+
+
+def _word_counter(texts):
+    return [len(text.split()) for text in texts]
+
+
+def test_chunks_are_offsets_within_budget_and_carry_pages():
+    section = (
+        "## Assignment {n}\n"
+        "Write the lab report for week {n}. Include plots and a short discussion.\n"
+        "Due: March {n} 2024 at 11:59 PM.\n\n"
+    )
+    pages = ["".join(section.format(n=n) for n in range(1, 6)), "".join(section.format(n=n) for n in range(6, 11))]
+    text = "\n".join(pages)
+    spans = chunk_spans(text, max_tokens=40, overlap_tokens=8, pages=pages, token_counter=_word_counter)
+
+    assert spans
+    assert all(0 <= span.start < span.end <= len(text) for span in spans)
+    assert all(len(text[span.start : span.end].split()) <= 40 for span in spans)
+    assert all(not text[span.start].isspace() and not text[span.end - 1].isspace() for span in spans)
+    assert {span.page for span in spans} == {1, 2}
+    second_page = text.index("## Assignment 6")
+    assert all(span.page == (2 if span.start >= second_page else 1) for span in spans)
+    # Headings start chunks rather than landing mid-chunk.
+    assert all(text.count("## Assignment", span.start, span.end) <= 1 for span in spans)
+    assert text[spans[0].start : spans[0].end].startswith("## Assignment 1")
+
+
+def test_long_paragraph_is_split_with_overlap():
+    text = " ".join(f"Sentence number {n} talks about the syllabus." for n in range(60))
+    spans = chunk_spans(text, max_tokens=50, overlap_tokens=10)
+
+    assert len(spans) > 1
+    assert spans[0].start == 0 and spans[-1].end == len(text)
+    assert all(later.start < earlier.end for earlier, later in zip(spans, spans[1:]))
+    assert chunk_spans("   \n\t") == []
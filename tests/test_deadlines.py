@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from s2s.execute import DeadlineIndex, MarkdownAgendaExporter
+from s2s.schemas import AssignmentRecord, Task
+
+
+def _record(title: str, course: str, due: str) -> AssignmentRecord:
+    return AssignmentRecord(course=course, assignment_title=title, due_datetime_iso=due, source_doc=f"{title}.txt")
+
+
+def test_deadline_index_range_queries_across_projects(tmp_path: Path):
+    index = DeadlineIndex(tmp_path / "deadlines.sqlite")
+    lab = _record("Lab 1", "Physics", "2024-03-10T23:59:00")
+    draft = Task(title="Draft", hours_estimate=2, due_iso="2024-03-08T12:00:00")
+    essay = _record("Essay", "History", "2024-03-05T09:00:00+02:00")
+    index.replace_project("spring", [(lab, [draft])])
+    index.replace_project("electives", [(essay, [])])
+
+    window = index.due("2024-03-01", "2024-03-09")
+    assert [(item.title, item.project) for item in window] == [("Essay", "electives"), ("Draft", "spring")]
+    assert [item.title for item in index.due("2024-03-01", "2024-03-31", course="physics")] == ["Draft", "Lab 1"]
+    assert [item.title for item in index.due(kinds=("assignment",))] == ["Essay", "Lab 1"]
+
+    index.replace_project("spring", [])
+    assert [item.project for item in index.due()] == ["electives"]
+    assert index.projects() == ["electives"]
+
+
+def test_markdown_agenda_keeps_one_heading_per_day_across_offsets(tmp_path: Path):
+    exporter = MarkdownAgendaExporter(tmp_path / "agenda.md")
+    exporter.open()
+    exporter.write(_record("Late Lab", "Physics", "2024-05-05T23:00:00-05:00"), [])
+    exporter.write(_record("Quiz", "History", "2024-05-06T01:00:00+00:00"), [])
+    exporter.write(_record("Essay", "History", "2024-05-06T09:00:00"), [])
+    lines = exporter.close().read_text().splitlines()
+    assert [line for line in lines if line.startswith("## ")] == ["## Sunday, May 05, 2024", "## Monday, May 06, 2024"]
+    assert [line.split()[2] for line in lines if line.startswith("- ")] == ["Late", "Quiz", "Essay"]
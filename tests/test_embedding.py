@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from s2s.rag.embedding import Embedder, EmbeddingOptions, export_onnx
+
+TEXTS = ["Final project", "Homework 1 is due May 5 at 9pm and covers chapters 1-3 of the reader.", "Quiz"] * 3
+
+
+def test_length_sorted_batches_keep_input_order():
+    sorted_embedder = Embedder(options=EmbeddingOptions(batch_size=2, sort_by_length=True))
+    plain = Embedder(options=EmbeddingOptions(batch_size=2, sort_by_length=False), model=sorted_embedder.model)
+    reference = sorted_embedder.model.encode(TEXTS, normalize_embeddings=True)
+
+    for embedder in (sorted_embedder, plain):
+        embeddings = embedder.encode(TEXTS)
+        assert embeddings.dtype == np.float32
+        assert np.allclose(embeddings, reference, atol=1e-5)
+    assert sorted_embedder.stats["chunks"] == len(TEXTS)
+    assert sorted_embedder.chunks_per_second() > 0
+
+
+def test_onnx_runtime_matches_torch(tmp_path: Path):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    export_onnx(tmp_path)
+    onnx = Embedder(options=EmbeddingOptions(batch_size=4, runtime="onnx", onnx_dir=tmp_path, num_threads=1))
+    torch_embedder = Embedder(options=EmbeddingOptions(batch_size=4))
+
+    assert np.allclose(onnx.encode(TEXTS), torch_embedder.encode(TEXTS), atol=1e-4)
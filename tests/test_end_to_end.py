@@ -32,3 +32,37 @@ def test_pipeline_tmpdir(tmp_path: Path):
     assert (out_dir / "calendar.ics").exists()
     assert (out_dir / "tasks.csv").exists()
     assert isinstance(record, AssignmentRecord)
+
+
+def test_orchestrator_writes_subcommand_artifacts(tmp_path: Path):
+    from s2s.pipeline import PipelineOrchestrator
+    from s2s.pipeline.artifacts import load_paired
+
+    source = tmp_path / "raw"
+    source.mkdir()
+    (source / "a.txt").write_text("Course: Streams\nAssignment: Queue Lab\nDue: May 5 2024 21:00\nSubmit: Notebook")
+    (source / "b.txt").write_text("Course: Streams\nProject: Backpressure\nDue: June 1 2024 17:00\nSubmit: Report")
+    out_dir = tmp_path / "out"
+    paths = {
+        "documents": tmp_path / "processed" / "t_documents.jsonl",
+        "assignments": out_dir / "t_assignments.json",
+        "plan": out_dir / "t_plan.json",
+        "ics": out_dir / "calendar.ics",
+        "csv": out_dir / "tasks.csv",
+        "sqlite": out_dir / "tasks.db",
+    }
+    orchestrator = PipelineOrchestrator(
+        project="pytest",
+        paths=paths,
+        source_dir=source,
+        queue_size=1,
+        ingest_executor="thread",
+        index=False,
+    )
+    result = orchestrator.run_sync()
+
+    assert result.documents == 2
+    paired = load_paired(paths)
+    assert [record.assignment_title for record, _ in paired] == ["Queue Lab", "Backpressure"]
+    assert all(tasks for _, tasks in paired)
+    assert paths["ics"].exists() and paths["sqlite"].exists()
@@ -1,4 +1,6 @@
-from s2s.extract import AssignmentExtractor
+import pytest
+
+from s2s.extract import AssignmentExtractor, ParsedDocument
 from s2s.schemas import AssignmentRecord
 
 
@@ -22,3 +24,168 @@ def test_assignment_confidence_bounds():
     extractor = AssignmentExtractor(force_rule_based=True)
     record = extractor.extract(text, "test_doc")
     assert 0.0 <= record.confidence <= 1.0
+
+
+def test_incremental_extraction_matches_full_rescan():
+    blocks = [
+        f"Homework {idx}: Problem set {idx}\nDue: March {idx + 1} 2024 at 11:59 PM\nSubmit: PDF write-up\nWorth 5 points"
+        for idx in range(1, 9)
+    ]
+    text = "Course: Incremental Testing\n\n" + "\n\n".join(blocks)
+    edits = [
+        text.replace("Due: March 4 2024", "Due: March 5 2024"),
+        text.replace("Homework 6: Problem set 6", "PROJECT KICKOFF"),
+        text.replace("Worth 5 points\n\nHomework 2", "Worth 5 points\nDeliverables: notebook\n\nHomework 2"),
+        text.replace("Course: Incremental Testing", "Course: Renamed Course"),
+        text.replace("\n\nHomework 8: Problem set 8", "\nHomework 8: Problem set 8"),
+    ]
+    incremental = AssignmentExtractor(force_rule_based=True)
+    full = AssignmentExtractor(force_rule_based=True)
+    for edited in edits:
+        sections: dict = {}
+        incremental.extract_many(text, "doc", sections)
+        scanned = incremental.stats["sections_scanned"]
+        records = incremental.extract_many(edited, "doc", sections)
+        expected = full.extract_many(edited, "doc")
+        assert [r.dict_for_storage() for r in records] == [r.dict_for_storage() for r in expected]
+        assert incremental.stats["sections_scanned"] - scanned < 9
+    assert incremental.stats["sections_reused"] > 0
+
+
+def test_fallbacks_reuse_the_parsed_document():
+    parsed = ParsedDocument("Welcome to the course\nWe meet on Mondays\n\nWe meet on Mondays\nBring a laptop")
+    extractor = AssignmentExtractor(force_rule_based=True)
+    record = extractor.extract(parsed, "doc")
+    assert record.assignment_title == "Untitled Assignment"
+    assert parsed.candidates == []
+    assert parsed.date_parses == 3
+
+
+def test_unusable_model_output_falls_back_to_rules():
+    text = "Course: Intro to Testing\nAssignment: Unit Test Draft\nDue: March 10 2024 at 11:59 PM"
+    extractor = AssignmentExtractor(force_rule_based=True)
+    for decoded in ["<pad>", '{"assignment_title": " ", "deliverables": []}']:
+        records = extractor._records_from_output(decoded, ParsedDocument(text), "doc")
+        assert [record.assignment_title for record in records] == ["Unit Test Draft"]
+    assert extractor.stats["json_failures"] == 1
+    assert extractor.stats["rule_fallbacks"] == 2
+    records = extractor._records_from_output('{"assignment_title": "Lab 1"}', ParsedDocument(text), "doc")
+    assert records[0].assignment_title == "Lab 1"
+    assert records[0].course == "Intro to Testing"
+    assert extractor.stats["rule_fallbacks"] == 2
+
+
+def test_generated_steps_count_padding_up_to_eos():
+    import torch
+
+    from s2s.extract.infer_lora_t5 import generated_steps
+
+    outputs = torch.tensor([[0, 5, 6, 1, 0, 0], [0, 0, 0, 0, 0, 0], [0, 5, 1, 0, 0, 0]])
+    assert generated_steps(outputs, eos_token_id=1) == 3 + 5 + 2
+    assert generated_steps(outputs[:, :1], eos_token_id=1) == 0
+
+
+def test_schema_grammar_restores_implicit_braces():
+    import json
+
+    from s2s.extract.constrained import SchemaGrammar, schema_fields
+    from s2s.extract.infer_lora_t5 import SCHEMA_PROMPT
+
+    grammar = SchemaGrammar(schema_fields(SCHEMA_PROMPT), implicit="{}")
+    text = (
+        '"course": null, "assignment_title": "Lab 1", "due_datetime_iso": "2024-03-10T23:59:00", '
+        '"deliverables": ["PDF"], "points_or_weight": "10%", "source_doc": "doc", '
+        '"evidence_spans": [], "confidence": 0.8'
+    )
+    parsed = json.loads(grammar.render(text))
+    assert parsed["deliverables"] == ["PDF"]
+    assert parsed["confidence"] == 0.8
+    assert grammar.render(text.replace('"Lab 1"', "Lab 1")) is None
+    assert grammar.render(text.replace(", ", ",  ", 1)) is None
+    assert grammar.render(text.replace('"Lab 1"', '" "')) is None
+    assert grammar.render(text.replace('["PDF"]', '["PDF", " "]')) is None
+    # Confidences stay within [0, 1] and never end on a bare decimal point.
+    assert json.loads(grammar.render(text.replace("0.8", "1.0")))["confidence"] == 1.0
+    for number in ("0.", "1.5", "800", "-1"):
+        assert grammar.render(text.replace("0.8", number)) is None
+    inside_title = grammar.advance(grammar.initial(), text[: text.index('"Lab 1"') + 2])
+    assert grammar.remaining(grammar.advance(inside_title, '"')) == grammar.remaining(inside_title) - 1
+
+
+def test_schema_logits_processor_masks_invalid_tokens():
+    import torch
+
+    from s2s.extract.constrained import SchemaGrammar, SchemaLogitsProcessor, SchemaStop
+
+    class TinyTokenizer:
+        eos_token_id = 1
+        pad_token_id = 0
+        all_special_ids = [0, 1]
+
+        def get_vocab(self):
+            return {"<pad>": 0, "</s>": 1, '"title"': 2, ":": 3, '"': 4, "x": 5, "oops": 6}
+
+    processor = SchemaLogitsProcessor(TinyTokenizer(), SchemaGrammar([("title", "str")], implicit="{}"))
+    scores = torch.zeros((1, 7))
+    scores[0, 6] = 5.0
+    allowed = processor(torch.tensor([[0]]), scores.clone())
+    assert torch.isfinite(allowed[0]).nonzero().flatten().tolist() == [2, 4]
+    finished = processor(torch.tensor([[0, 2, 3, 4, 5, 4]]), scores.clone())
+    assert torch.isfinite(finished[0]).nonzero().flatten().tolist() == [1]
+    assert processor.render([0, 2, 3, 4, 5, 4, 1]) == '{"title":"x"}'
+
+    narrow = SchemaLogitsProcessor(TinyTokenizer(), SchemaGrammar([("title", "str")], implicit="{}"), top_k=1)
+    scores[0, 4] = 2.0
+    assert torch.isfinite(narrow(torch.tensor([[0]]), scores.clone())[0]).nonzero().flatten().tolist() == [4]
+    fresh = processor.fresh()
+    assert fresh.token_text is processor.token_text
+    assert torch.isfinite(fresh(torch.tensor([[0]]), scores.clone())[0]).nonzero().flatten().tolist() == [2, 4]
+    blank = fresh(torch.tensor([[0, 2, 3, 4]]), scores.clone())
+    assert torch.isfinite(blank[0]).nonzero().flatten().tolist() == [3, 5, 6]
+
+    closing = SchemaLogitsProcessor(
+        TinyTokenizer(), SchemaGrammar([("title", "str")], implicit="{}"), max_new_tokens=6
+    )
+    # Two steps left inside the string: only the closing quote still fits.
+    unclosed = torch.tensor([[0, 2, 3, 4, 5]])
+    assert torch.isfinite(closing(unclosed, scores.clone())[0]).nonzero().flatten().tolist() == [4]
+    assert torch.isfinite(fresh(unclosed, scores.clone())[0]).nonzero().flatten().tolist() == [3, 4, 5, 6]
+
+    stop = SchemaStop(processor.fresh())
+    rows = torch.tensor([[0, 2, 3, 4, 5, 4], [0, 2, 3, 4, 5, 5], [0, 2, 3, 4, 5, 0]])
+    assert stop(rows, None).tolist() == [True, False, True]
+
+
+def test_cascade_escalates_only_low_confidence_sections(monkeypatch):
+    text = (
+        "Course: Cascades\n"
+        "Assignment: Lab Report\n"
+        "Due: March 10 2024 at 11:59 PM\n"
+        "Submit: PDF write-up\n"
+        "Worth 10 points\n"
+        "\n"
+        "Reading response due March 5 2024 at 5 PM\n"
+        "\n"
+        "Office hours are on Tuesdays."
+    )
+    extractor = AssignmentExtractor(cascade=True, generation_cache=False)
+    if extractor.model is None:
+        pytest.skip("t5-small is not available")
+    prompts = []
+
+    def fake_generate(batch, batch_size=1):
+        prompts.extend(batch)
+        return ['{"assignment_title": "Reading Response", "due_datetime_iso": "2024-03-05T17:00:00"}'] * len(batch)
+
+    monkeypatch.setattr(extractor, "_generate_many", fake_generate)
+    records = extractor.extract_many(text, "cascade_doc")
+
+    assert len(prompts) == 1 and "Reading response due" in prompts[0]
+    assert [(record.assignment_title, record.confidence) for record in records] == [
+        ("Lab Report", 1.0),
+        ("Reading Response", 0.55),
+    ]
+    assert records[1].course == "Cascades"
+    rates = extractor.cascade_rates()
+    assert rates["escalated_section_share"] == 1 / 3
+    assert 0 < rates["escalated_text_share"] < 0.5
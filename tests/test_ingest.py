@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from s2s.extract import AssignmentExtractor
+from s2s.ingest.html_reader import html_to_text, read_html_or_text
+
+LMS_PAGE = """<!DOCTYPE html><html><head><title>Syllabus</title>
+<script>var ENV = {"due": "Due: January 1, 2025"};</script><style>p { margin: 0 }</style></head>
+<body><header><nav role="navigation"><ul><li>Dashboard</li><li>Calendar</li></ul></nav></header>
+<main><h1>Course: Intro &amp; Testing</h1>
+<ol><li><b>Homework 1</b><ul><li>Due: March 10, 2024 at 11:59 PM</li><li>Deliverables: PDF write-up</ul></li></ol>
+<table><tr><th>Assignment</th><th>Due</th><th>Weight</th></tr>
+<tr><td>Essay 2<td>April 2, 2024 at 5:00 PM<td>10%</table></main>
+<aside>To Do: Quiz due tomorrow at 9:00 AM</aside><footer>LMS</footer></body></html>"""
+
+
+@pytest.mark.parametrize("parser", ["lxml", "stdlib"])
+def test_html_reader_keeps_structure_and_drops_boilerplate(tmp_path: Path, parser: str):
+    path = tmp_path / "syllabus.html"
+    path.write_text(LMS_PAGE, encoding="utf-8")
+
+    text = html_to_text(path, parser, chunk_size=16)
+    assert text == html_to_text(path, "lxml")  # both backends, any chunking, same text
+    lines = text.splitlines()
+    assert "Course: Intro & Testing" in lines
+    assert "1. Homework 1" in lines and "- Due: March 10, 2024 at 11:59 PM" in lines
+    assert ["Assignment: Essay 2", "Due: April 2, 2024 at 5:00 PM", "Weight: 10%"] == lines[-3:]
+    assert not any(word in text for word in ("Dashboard", "ENV", "margin", "To Do", "LMS"))
+
+    doc = read_html_or_text(path, parser)
+    records = AssignmentExtractor(force_rule_based=True).extract_many(doc.text, doc.path)
+    assert [(record.assignment_title, record.due_datetime_iso[:10]) for record in records] == [
+        ("Homework 1", "2024-03-10"),
+        ("Essay 2", "2024-04-02"),
+    ]
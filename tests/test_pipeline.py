@@ -0,0 +1,317 @@
+from pathlib import Path
+
+from s2s.ingest import Document
+from s2s.pipeline import BatchRunner, PollingWatcher, ProjectWatcher, load_manifest
+from s2s.pipeline.cache import StageCache
+from s2s.pipeline.stages import extract_documents, plan_assignments
+from s2s.schemas import AssignmentRecord
+
+
+def build_doc(name: str, due: str) -> Document:
+    text = f"Course: Caching\nAssignment: {name}\nDue: {due}\nSubmit: Report"
+    return Document(id=name, path=f"{name}.txt", text=text, pages=[text])
+
+
+def test_extract_recomputes_only_changed_documents(tmp_path: Path):
+    cache_path = tmp_path / "p_stages.json"
+    docs = [build_doc("Alpha", "May 5 2024 21:00"), build_doc("Beta", "June 1 2024 17:00")]
+    kwargs = {"force_rule_based": True}
+
+    cache = StageCache(cache_path)
+    first = extract_documents(docs, kwargs, cache)
+    cache.save()
+
+    docs[1] = build_doc("Beta", "June 2 2024 17:00")
+    cache = StageCache(cache_path)
+    second = extract_documents(docs, kwargs, cache)
+
+    assert cache.stats["extract"] == {"hits": 1, "misses": 1}
+    assert first[0] == second[0]
+    assert second[1]["due_datetime_iso"].startswith("2024-06-02")
+
+
+def test_scoped_extract_prunes_removed_documents(tmp_path: Path):
+    from s2s.pipeline.stages import extract_scoped_documents
+    from s2s.rag import RAGIndex
+
+    docs = [build_doc("Alpha", "May 5 2024 21:00"), build_doc("Beta", "June 1 2024 17:00")]
+    kwargs = {"force_rule_based": True}
+    cache = StageCache(tmp_path / "p_stages.json")
+    extract_documents(docs, kwargs, cache)
+    rag_index = RAGIndex("proj", persist_root=tmp_path / "index", backend="numpy")
+    rag_index.ingest_documents(docs[:1])
+
+    items, coverage = extract_scoped_documents(docs[:1], kwargs, rag_index, cache)
+
+    assert [item["assignment_title"] for item in items] == ["Alpha"]
+    assert coverage["full_scans"] == 0
+    assert cache.keys("extract") == cache.keys("extract_sections") == ["Alpha.txt"]
+
+    # Edited after indexing: the stored chunk offsets no longer apply.
+    items, coverage = extract_scoped_documents([build_doc("Alpha", "May 6 2024 21:00")], kwargs, rag_index, cache)
+    assert coverage["full_scans"] == 1
+    assert items[0]["due_datetime_iso"].startswith("2024-05-06")
+
+
+def test_plan_cache_reuses_tasks_without_planner(tmp_path: Path):
+    record = AssignmentRecord(
+        course="Caching",
+        assignment_title="Alpha",
+        due_datetime_iso="2024-05-05T21:00:00",
+        source_doc="Alpha.txt",
+    )
+    cache = StageCache(tmp_path / "p_stages.json")
+    first = plan_assignments(None, [record], cache)
+    second = plan_assignments(None, [record], cache)
+
+    assert first == second
+    assert cache.stats["plan"] == {"hits": 1, "misses": 1}
+
+    disabled = StageCache(tmp_path / "p_stages.json", enabled=False)
+    plan_assignments(None, [record], disabled)
+    assert disabled.stats["plan"] == {"hits": 0, "misses": 1}
+
+
+def test_batch_runner_isolates_project_outputs(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("S2S_DATA_DIR", str(tmp_path / "data"))
+    for name, due in (("alpha", "May 5 2024 21:00"), ("beta", "June 1 2024 17:00")):
+        source = tmp_path / "syllabi" / name
+        source.mkdir(parents=True)
+        (source / f"{name}.txt").write_text(build_doc(name, due).text, encoding="utf-8")
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(
+        '{"project": "alpha", "source": "syllabi/alpha"}\n'
+        '{"project": "beta", "source": "syllabi/beta"}\n'
+        '{"project": "gamma", "source": "syllabi/missing"}\n',
+        encoding="utf-8",
+    )
+
+    runner = BatchRunner(load_manifest(manifest), workers=2, stage_workers=1, ingest_executor="thread", index=False)
+    result = runner.run_sync()
+
+    status = {item.project: item.status for item in result.projects}
+    assert status == {"alpha": "ok", "beta": "ok", "gamma": "failed"}
+    assert [item.assignments for item in result.projects[:2]] == [1, 1]
+    for name in ("alpha", "beta"):
+        assert (tmp_path / "out" / name / "calendar.ics").exists()
+        assert (tmp_path / "out" / name / "tasks.csv").read_text(encoding="utf-8").count(name) >= 1
+    assert result.to_dict()["totals"]["failed"] == 1
+
+
+def test_batch_runner_keeps_concurrent_extractor_stats_apart(tmp_path: Path, monkeypatch):
+    import json
+
+    from s2s.extract import AssignmentExtractor
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("S2S_DATA_DIR", str(tmp_path / "data"))
+    counts = {"p1": 1, "p2": 2, "p3": 3, "p4": 4}
+    lines = []
+    for project, count in counts.items():
+        source = tmp_path / "syllabi" / project
+        source.mkdir(parents=True)
+        for idx in range(count):
+            name = f"{project}-hw{idx}"
+            (source / f"{name}.txt").write_text(build_doc(name, f"May {idx + 1} 2024 21:00").text, encoding="utf-8")
+        lines.append(json.dumps({"project": project, "source": f"syllabi/{project}"}))
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    single = AssignmentExtractor(force_rule_based=True)
+    single.extract_many(build_doc("probe", "May 1 2024 21:00").text, "probe.txt", {})
+
+    projects = load_manifest(manifest)
+    runner = BatchRunner(projects, workers=4, stage_workers=2, ingest_executor="thread", index=False)
+    result = runner.run_sync()
+
+    for item in result.projects:
+        count = counts[item.project]
+        assert (item.status, item.documents, item.assignments) == ("ok", count, count)
+        assert item.extractor_stats["sections_scanned"] == count * single.stats["sections_scanned"]
+        items = json.loads((tmp_path / "out" / f"{item.project}_assignments.json").read_text())
+        titles = sorted(entry["assignment_title"] for entry in items)
+        assert titles == [f"{item.project}-hw{idx}" for idx in range(count)]
+
+
+def test_columnar_artifacts_round_trip_with_stable_ids(tmp_path: Path):
+    from s2s.pipeline.artifacts import (
+        assignment_ids,
+        load_paired,
+        plan_rows,
+        read_table,
+        write_assignments,
+        write_plan,
+    )
+
+    docs = [build_doc("Alpha", "May 5 2024 21:00"), build_doc("Beta", "June 1 2024 17:00")]
+    items = extract_documents(docs, {"force_rule_based": True}, StageCache(tmp_path / "p_stages.json"))
+    records = [AssignmentRecord(**item) for item in items]
+    plans = plan_assignments(None, records)
+    json_paths = {"assignments": tmp_path / "p_assignments.json", "plan": tmp_path / "p_plan.json"}
+    write_assignments(json_paths["assignments"], items)
+    write_plan(json_paths["plan"], plans)
+    expected = load_paired(json_paths)
+
+    for suffix in (".parquet", ".arrow"):
+        paths = {"assignments": tmp_path / f"p_assignments{suffix}", "plan": tmp_path / f"p_plan{suffix}"}
+        write_assignments(paths["assignments"], items)
+        write_plan(paths["plan"], plans, records)
+        assert load_paired(paths) == expected
+        assert plan_rows(paths, ["assignment_title"], ["title"]) == plan_rows(json_paths, ["assignment_title"], ["title"])
+        assert read_table(paths["plan"], ["assignment_id"]).column_names == ["assignment_id"]
+
+    assert assignment_ids(items[::-1]) == assignment_ids(items)[::-1]
+
+
+def test_text_store_serves_lazy_document_views(tmp_path: Path):
+    import pickle
+
+    from s2s.ingest.store import StoredDocument, read_documents, write_documents
+    from s2s.rag.chunking import chunk_spans
+    from s2s.utils import hash_text
+
+    docs = [
+        build_doc("Alpha", "May 5 2024 21:00"),
+        Document(id="pdf", path="pdf.pdf", text="Cours: Café\nDue: 5 mai", pages=["Cours: Café", "Due: 5 mai"]),
+        Document(id="odd", path="odd.pdf", text="page one", pages=["page one", "not in the text"]),
+    ]
+    path = tmp_path / "p_documents.jsonl"
+    write_documents(path, docs)
+    loaded = read_documents(path)
+    # Rewriting copies stored documents' bytes into a fresh blob.
+    write_documents(path, loaded[::-1])
+
+    for doc, stored in zip(docs, read_documents(path)[::-1]):
+        assert isinstance(stored, StoredDocument)
+        assert (stored.id, stored.text, list(stored.pages)) == (doc.id, doc.text, doc.pages)
+        assert stored.content_hash() == hash_text(doc.text)
+        assert chunk_spans(stored.text, page_starts=stored.page_starts()) == chunk_spans(doc.text, pages=doc.pages)
+        assert pickle.loads(pickle.dumps(stored)) == doc
+    assert loaded[0].text == docs[0].text
+
+
+def test_watcher_reprocesses_only_changed_sources(tmp_path: Path, monkeypatch):
+    import sqlite3
+
+    monkeypatch.setenv("S2S_DATA_DIR", str(tmp_path / "data"))
+    source = tmp_path / "syllabi"
+    source.mkdir()
+    (source / "alpha.txt").write_text(build_doc("alpha", "May 5 2024 21:00").text, encoding="utf-8")
+    paths = {
+        "documents": tmp_path / "data" / "w_documents.jsonl",
+        "assignments": tmp_path / "out" / "w_assignments.json",
+        "plan": tmp_path / "out" / "w_plan.json",
+        "ics": tmp_path / "out" / "w.ics",
+        "csv": tmp_path / "out" / "w.csv",
+        "sqlite": tmp_path / "out" / "w.sqlite",
+    }
+    poller = PollingWatcher(source, interval=0.1, debounce=1.0)
+    watcher = ProjectWatcher("w", paths, source, watcher=poller, workers=1, index=False)
+    try:
+        watcher.sync()
+        assert poller.check(now=0.0) is None
+
+        (source / "beta.txt").write_text(build_doc("beta", "June 1 2024 17:00").text, encoding="utf-8")
+        assert poller.check(now=1.0) is None  # still inside the debounce window
+        changes = poller.check(now=2.1)
+        assert changes.changed == [source / "beta.txt"] and not changes.removed
+
+        event = watcher.handle(changes)
+        assert event.reprocessed() == 1
+        assert event.result.cache["ingest"] == {"hits": 0, "misses": 1}
+        assert event.result.documents == 2 and event.result.assignments == 2
+
+        # Mark alpha's exported rows and events: an in-place update must leave them alone.
+        alpha, beta = str(source / "alpha.txt"), str(source / "beta.txt")
+        with sqlite3.connect(str(paths["sqlite"])) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM tasks WHERE source_doc = ?", (beta,)).fetchone()[0]
+            conn.execute("UPDATE tasks SET hours = -1 WHERE source_doc = ?", (alpha,))
+        marker = f"X-S2S-SOURCE:{alpha}"
+        paths["ics"].write_text(paths["ics"].read_text(encoding="utf-8").replace(marker, f"{marker}\nCOMMENT:kept"))
+
+        (source / "beta.txt").unlink()
+        assert poller.check(now=3.0) is None
+        changes = poller.check(now=4.1)
+        assert changes.removed == [source / "beta.txt"] and not changes.changed
+        event = watcher.handle(changes)
+        assert event.reprocessed() == 0 and "ingest" not in event.result.cache
+        assert event.result.documents == 1 and event.result.assignments == 1
+        with sqlite3.connect(str(paths["sqlite"])) as conn:
+            rows = conn.execute("SELECT source_doc, hours FROM tasks").fetchall()
+        assert rows and all(row == (alpha, -1) for row in rows)
+        ics = paths["ics"].read_text(encoding="utf-8")
+        assert ics.count("COMMENT:kept") == ics.count("BEGIN:VEVENT") == 1 + len(rows)
+        assert "beta" not in paths["csv"].read_text(encoding="utf-8")
+    finally:
+        watcher.close()
+
+
+def test_export_fans_out_one_pass_to_selected_sinks(tmp_path: Path, monkeypatch):
+    import json
+    import sqlite3
+    import threading
+
+    import pytest
+
+    from s2s.execute import EXPORTERS, Exporter, register_exporter, write_tasks_csv
+    from s2s.pipeline.artifacts import load_paired, write_assignments, write_plan
+    from s2s.pipeline.stages import export_outputs
+
+    docs = [build_doc("Alpha", "May 5 2024 21:00"), build_doc("Beta", "June 1 2024 17:00")]
+    items = extract_documents(docs, {"force_rule_based": True}, StageCache(tmp_path / "p_stages.json"))
+    records = [AssignmentRecord(**item) for item in items]
+    paths = {
+        "assignments": tmp_path / "p_assignments.json",
+        "plan": tmp_path / "p_plan.json",
+        "exports": tmp_path / "out",
+        "ics": tmp_path / "out" / "calendar.ics",
+        "csv": tmp_path / "out" / "tasks.csv",
+        "sqlite": tmp_path / "out" / "tasks.db",
+    }
+    write_assignments(paths["assignments"], items)
+    write_plan(paths["plan"], plan_assignments(None, records))
+    paired = load_paired(paths)
+
+    seen = []
+
+    class ProbeExporter(Exporter):
+        name = "probe"
+        filename = "probe.txt"
+
+        def write(self, assignment, tasks):
+            seen.append((assignment.assignment_title, threading.current_thread().name))
+
+        def close(self):
+            self.path.write_text(str(len(seen)))
+            return self.path
+
+    monkeypatch.setitem(EXPORTERS, "probe", ProbeExporter)
+    assert register_exporter(ProbeExporter) is ProbeExporter
+
+    cache = StageCache(tmp_path / "p_stages.json")
+    formats = ["ics,csv", "sqlite", "jsonl", "markdown", "probe"]
+    assert export_outputs(paths, cache, formats)
+    assert seen == [("Alpha", "s2s-export-probe"), ("Beta", "s2s-export-probe")]
+    assert not export_outputs(paths, cache, formats)
+
+    expected_csv = write_tasks_csv(paired, output_dir=tmp_path, filename="expected.csv")
+    assert paths["csv"].read_text() == expected_csv.read_text()
+    with sqlite3.connect(paths["sqlite"]) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == sum(len(tasks) for _, tasks in paired)
+    assert paths["ics"].read_text().count("BEGIN:VEVENT") == sum(1 + len(tasks) for _, tasks in paired)
+    rows = [json.loads(line) for line in (tmp_path / "out" / "schedule.jsonl").read_text().splitlines()]
+    assert [(row["assignment_title"], len(row["tasks"])) for row in rows] == [
+        (record.assignment_title, len(tasks)) for record, tasks in paired
+    ]
+    agenda = (tmp_path / "out" / "agenda.md").read_text()
+    assert agenda.index("## Sunday, May 05, 2024") < agenda.index("**21:00 Alpha due**") < agenda.index("## Saturday")
+
+    class BrokenExporter(ProbeExporter):
+        def write(self, assignment, tasks):
+            raise RuntimeError("disk full")
+
+    monkeypatch.setitem(EXPORTERS, "probe", BrokenExporter)
+    with pytest.raises(RuntimeError, match="disk full"):
+        export_outputs(paths, None, ["csv", "probe"])
+    with pytest.raises(ValueError, match="Unknown export format 'pdf'"):
+        export_outputs(paths, None, ["pdf"])
@@ -26,3 +26,48 @@ def test_planner_generates_tasks():
     assert len(set(titles)) == len(titles)
     for task in tasks[1:]:
         assert task.depends_on
+
+
+def test_plan_many_batches_prompts_and_falls_back_per_item():
+    calls = []
+
+    def fake_generator(prompts, max_length, batch_size):
+        calls.append((list(prompts), batch_size))
+        good = '[{"title": "Outline", "hours_estimate": 3}, {"title": "Write", "hours_estimate": 5}]'
+        return [{"generated_text": good}, {"generated_text": "not json"}]
+
+    planner = TaskPlanner(batch_size=8)
+    planner.generator = fake_generator
+    first, second = planner.plan_many([build_record(), build_record()])
+
+    assert len(calls) == 1 and calls[0][1] == 8
+    assert "Due April 1 5 PM" not in calls[0][0][0]
+    assert [task.title for task in first] == ["Outline", "Write"]
+    assert second[0].title.endswith("Review requirements")
+    assert second[-1].due_iso == "2024-04-01T17:00:00"
+
+
+def test_generation_cache_skips_repeated_prompts(tmp_path):
+    from s2s.generation_cache import GenerationCache
+
+    calls = []
+
+    def fake_generator(prompts, max_length, batch_size):
+        calls.append(len(prompts))
+        return [{"generated_text": '[{"title": "Outline", "hours_estimate": 3}]'} for _ in prompts]
+
+    cache = GenerationCache(tmp_path / "gen.sqlite", max_entries=1)
+    planner = TaskPlanner(batch_size=4)
+    planner.model_name = "fake-planner"
+    planner.generator = fake_generator
+    planner.generation_cache = cache
+
+    (first,) = planner.plan_many([build_record()])
+    (second,) = planner.plan_many([build_record()])
+
+    assert calls == [1]
+    assert [t.title for t in first] == [t.title for t in second]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.put("other", "value")
+    assert cache.keys() == ["other"]
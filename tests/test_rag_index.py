@@ -0,0 +1,136 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from s2s.extract import AssignmentExtractor
+from s2s.ingest import Document
+from s2s.rag import HNSWParams, NumpyBackend, RAGIndex
+from s2s.rag.index import shard_name
+from s2s.rag.scope import retrieve_scope
+
+
+def build_doc(idx: int, course: str) -> Document:
+    text = f"Course: {course}\nAssignment: Homework {idx}\nDue: May {idx + 1} 2024\nSubmit the report as a PDF."
+    return Document(id=f"doc{idx}", path=f"doc{idx}.txt", text=text, pages=[text])
+
+
+def test_sharded_index_fans_out_and_compacts(tmp_path: Path):
+    rag_index = RAGIndex(
+        "proj",
+        persist_root=tmp_path,
+        backend="chroma",
+        hnsw=HNSWParams(search_ef=32),
+        shard_by="course",
+        compact_min_deleted=1,
+    )
+    docs = [build_doc(idx, "CS 101" if idx % 2 else "Robotics") for idx in range(4)]
+    assert rag_index.ingest_documents(docs) == 4
+    assert rag_index.collection_names() == ["proj", shard_name("proj", "CS 101"), shard_name("proj", "Robotics")]
+
+    assert len(rag_index.search("Homework", k=4)) == 4
+    hits = rag_index.search("Homework", k=4, course="Robotics")
+    assert {hit["metadata"]["doc_id"] for hit in hits} == {"doc0", "doc2"}
+
+    rag_index.delete_documents(["doc0", "doc1"])
+    assert rag_index.maybe_compact()
+    assert rag_index.count() == 2
+    assert rag_index.collection_names() == ["proj", shard_name("proj", "CS 101"), shard_name("proj", "Robotics")]
+    assert not rag_index.maybe_compact()
+
+    rag_index.reset()
+    assert rag_index.count() == 0
+    assert rag_index.collection_names() == ["proj"]
+
+
+def test_numpy_backend_exact_search_and_compaction(tmp_path: Path):
+    backend = NumpyBackend(tmp_path)
+    vectors = np.eye(4, dtype=np.float32) * 3
+    metadatas = [{"doc_id": f"doc{idx // 2}"} for idx in range(4)]
+    backend.upsert("proj", [f"c{idx}" for idx in range(4)], vectors, [f"text {idx}" for idx in range(4)], metadatas)
+
+    hits = backend.query("proj", np.array([0.1, 1.0, 0.0, 0.0]), k=2)
+    assert [hit["id"] for hit in hits] == ["c1", "c0"]
+    assert abs(hits[0]["distance"] - (1 - 1 / np.sqrt(1.01))) < 1e-6
+
+    backend.upsert("proj", ["c1"], np.array([[0.0, 0.0, 1.0, 0.0]]), ["moved"], [{"doc_id": "doc0"}])
+    assert backend.count("proj") == 4
+    assert backend.delete_documents("proj", ["doc1"]) == 2
+
+    reopened = NumpyBackend(tmp_path)
+    assert reopened.count("proj") == 2
+    assert [hit["text"] for hit in reopened.query("proj", np.array([0.0, 0.0, 1.0, 0.0]), k=5)] == ["moved", "text 0"]
+    assert reopened.compact("proj") == 2
+    assert len(np.load(tmp_path / "numpy" / "proj" / "vectors.npy")) == 2
+    assert reopened.list_collections() == ["proj"]
+
+
+def test_numpy_backend_appends_in_place(tmp_path: Path):
+    backend = NumpyBackend(tmp_path, quantization="int8", keep_float=True)
+    vectors = np.eye(6, dtype=np.float32)
+    folder = tmp_path / "numpy-int8" / "proj"
+    for idx in range(3):
+        backend.upsert("proj", [f"c{idx}"], vectors[idx : idx + 1], [f"text {idx}"], [{"doc_id": f"doc{idx}"}])
+        if idx == 0:
+            inodes = {name: (folder / name).stat().st_ino for name in ("codes.npy", "scales.npy", "vectors.npy")}
+    assert {name: (folder / name).stat().st_ino for name in inodes} == inodes
+    assert np.load(folder / "codes.npy").shape == (3, 6)
+
+    # An append cut short: rows in the arrays past the sidecar, and half a sidecar line.
+    NumpyBackend._append_array(folder / "codes.npy", np.ones((1, 6), dtype=np.int8), 3)
+    with (folder / "chunks.jsonl").open("a", encoding="utf-8") as handle:
+        handle.write('{"id": "c3", "te')
+    reopened = NumpyBackend(tmp_path, quantization="int8", keep_float=True)
+    assert reopened.count("proj") == 3
+    reopened.upsert("proj", ["c3", "c0"], vectors[3:5], ["text 3", "moved"], [{"doc_id": "doc3"}, {"doc_id": "doc0"}])
+    assert np.load(folder / "codes.npy").shape == (5, 6)
+    again = NumpyBackend(tmp_path, quantization="int8", keep_float=True)
+    assert again.count("proj") == 4
+    assert [hit["text"] for hit in again.query("proj", vectors[3], k=1)] == ["text 3"]
+    assert [hit["text"] for hit in again.query("proj", vectors[4], k=1)] == ["moved"]
+
+
+def test_quantized_backends_rescore_to_float_ranking(tmp_path: Path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((300, 64)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [str(idx) for idx in range(300)]
+    query = vectors[17] + 0.1 * rng.standard_normal(64).astype(np.float32)
+    exact = [str(idx) for idx in np.argsort(-(vectors @ query))[:5]]
+
+    for quantization, size in (("int8", 300 * 64 + 300 * 4), ("binary", 300 * 8)):
+        backend = NumpyBackend(tmp_path, quantization=quantization, rescore_multiplier=20, keep_float=True)
+        backend.upsert("proj", ids, vectors, [""] * 300, [{"doc_id": idx} for idx in ids])
+        assert backend.nbytes("proj") == size
+        hits = backend.query("proj", query, k=5)
+        assert [hit["id"] for hit in hits] == exact
+        assert [hit["id"] for hit in backend.query("proj", query, k=2, doc_ids=exact[3:0:-1])] == exact[1:3]
+        assert backend.delete_documents("proj", ["17"]) == 1
+        assert backend.compact("proj") == 299
+        reopened = NumpyBackend(tmp_path, quantization=quantization)
+        assert "17" not in [hit["id"] for hit in reopened.query("proj", query, k=5)]
+
+
+@pytest.mark.parametrize("backend", ["numpy", "chroma"])
+def test_retrieval_scope_keeps_deadline_chunks_only(tmp_path: Path, backend: str):
+    filler = [f"Week {week}: Foundations; read chapter {week} and the posted notes." for week in range(1, 60)]
+    entry = ["", "Projects:", "1. Final Report", "   - Due: April 30, 2024 at 11:59 PM", "   - Deliverables: PDF write-up", ""]
+    text = "\n".join(["Course: CS 101"] + filler[:30] + entry + filler[30:])
+    doc = Document(id="long", path="long.txt", text=text, pages=[text])
+    rag_index = RAGIndex("proj", persist_root=tmp_path, backend=backend)
+    rag_index.ingest_documents([doc, build_doc(1, "CS 101")])
+
+    hits = rag_index.search("deadline", k=50, doc_ids=["long"], contains=["due"])
+    assert hits and all(hit["metadata"]["doc_id"] == "long" and "Due" in hit["text"] for hit in hits)
+
+    scope = retrieve_scope(rag_index, doc, k=1, context_lines=2)
+    assert scope is not None and scope.lines < scope.total_lines / 2
+    records = AssignmentExtractor(force_rule_based=True).extract_many(scope.text, doc.path)
+    assert [(record.course, record.assignment_title, record.due_datetime_iso) for record in records] == [
+        ("CS 101", "Final Report", "2024-04-30T23:59:00")
+    ]
+    unindexed = Document(id="other", path="other.txt", text="Due: May 1 2024", pages=["Due: May 1 2024"])
+    assert retrieve_scope(rag_index, unindexed) is None
+    edited_text = text.replace("Week 1:", "Week 01:")
+    edited = Document(id="long", path="long.txt", text=edited_text, pages=[edited_text])
+    assert retrieve_scope(rag_index, edited) is None
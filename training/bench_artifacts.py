@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Size and load time of the assignment/plan artifacts in each storage format.
+
+Synthetic assignments with ``--tasks-per-assignment`` milestones each are
+written as JSON, Parquet and Arrow IPC, then read back three ways: the full
+``load_paired`` rebuild into records and tasks (what exports do), the
+``show`` projection through ``plan_rows``, and a raw projected column read.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from tabulate import tabulate
+
+from s2s.pipeline.artifacts import (
+    ARTIFACT_FORMATS,
+    is_columnar,
+    load_paired,
+    plan_key,
+    plan_rows,
+    read_table,
+    write_assignments,
+    write_plan,
+)
+from s2s.schemas import AssignmentRecord
+
+SHOW_COLUMNS = (["course", "assignment_title"], ["title", "earliest_start_iso", "due_iso", "hours_estimate"])
+
+
+def synthesize(tasks: int, per_assignment: int, seed: int) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict]]]:
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 13, 9)
+    items: List[Dict[str, Any]] = []
+    plans: Dict[str, List[Dict[str, Any]]] = {}
+    for idx in range(-(-tasks // per_assignment)):
+        due = start + timedelta(days=rng.randint(0, 120), hours=rng.randint(0, 12))
+        item = {
+            "course": f"Course {idx % 40:02d}",
+            "assignment_title": f"Assignment {idx}: {rng.choice(['Lab', 'Essay', 'Project', 'Quiz'])}",
+            "due_datetime_iso": due.isoformat(),
+            "deliverables": rng.sample(["report", "slides", "code", "notebook", "video"], 2),
+            "points_or_weight": f"{rng.randint(5, 30)}%",
+            "source_doc": f"data/raw/syllabus_{idx % 200:03d}.txt",
+            "evidence_spans": [f"Assignment {idx} due {due:%B %d}", "Submit via the course portal."],
+            "confidence": round(rng.random(), 3),
+        }
+        items.append(item)
+        hours = [round(rng.uniform(1, 6), 1) for _ in range(per_assignment)]
+        cursor = due - timedelta(hours=sum(hours))
+        milestones = []
+        for step, effort in enumerate(hours):
+            end = cursor + timedelta(hours=effort)
+            milestones.append(
+                {
+                    "title": f"{item['assignment_title']}: step {step + 1}",
+                    "hours_estimate": effort,
+                    "earliest_start_iso": cursor.isoformat(),
+                    "due_iso": end.isoformat(),
+                    "depends_on": [milestones[-1]["title"]] if milestones else [],
+                }
+            )
+            cursor = end
+        plans[plan_key(AssignmentRecord(**item), idx)] = milestones
+    return items, plans
+
+
+def timed(fn: Callable[[], Any], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--tasks-per-assignment", type=int, default=4)
+    parser.add_argument("--formats", nargs="+", default=list(ARTIFACT_FORMATS))
+    parser.add_argument("--repeats", type=int, default=3, help="Best-of runs per read.")
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+
+    items, plans = synthesize(args.tasks, args.tasks_per_assignment, args.seed)
+    records = [AssignmentRecord(**item) for item in items]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in args.formats:
+            suffix = ARTIFACT_FORMATS[fmt]
+            paths = {"assignments": Path(tmp) / f"a{suffix}", "plan": Path(tmp) / f"p{suffix}"}
+            started = time.perf_counter()
+            write_assignments(paths["assignments"], items)
+            write_plan(paths["plan"], plans, records)
+            write_seconds = time.perf_counter() - started
+            size = sum(path.stat().st_size for path in paths.values())
+            paired = timed(lambda: load_paired(paths), args.repeats)
+            show = timed(lambda: plan_rows(paths, *SHOW_COLUMNS), args.repeats)
+            column = ""
+            if is_columnar(paths["plan"]):
+                column = round(timed(lambda: read_table(paths["plan"], ["due_at"]), args.repeats) * 1000, 1)
+            rows.append([fmt, round(size / 2**20, 2), round(write_seconds, 2), round(paired, 2), round(show, 2), column])
+    print(f"{len(items)} assignments, {sum(len(tasks) for tasks in plans.values())} tasks")
+    print(
+        tabulate(
+            rows,
+            headers=["format", "size_mb", "write_s", "load_paired_s", "show_rows_s", "due_at_column_ms"],
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Chunks/sec of the retrieval embedder across batch size, length sorting, threads and runtime."""
+from __future__ import annotations
+
+import argparse
+import itertools
+import random
+from pathlib import Path
+from typing import List
+
+from tabulate import tabulate
+
+from s2s.ingest.store import read_documents
+from s2s.rag.chunking import chunk_spans
+from s2s.rag.embedding import DEFAULT_ONNX_DIR, Embedder, EmbeddingOptions
+
+
+def load_chunks(path: Path, limit: int) -> List[str]:
+    chunks: List[str] = []
+    for doc in read_documents(path):
+        text = doc.text
+        spans = chunk_spans(text, pages=doc.pages, page_starts=doc.page_starts())
+        chunks.extend(text[span.start : span.end] for span in spans)
+    random.Random(1337).shuffle(chunks)
+    # Cycle small corpora so every configuration embeds the same number of chunks.
+    return [chunks[idx % len(chunks)] for idx in range(limit)] if chunks else []
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=Path, default=Path("data/processed/default_documents.jsonl"))
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[16, 64])
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="0 keeps the runtime default.")
+    parser.add_argument("--runtime", nargs="+", default=["torch", "onnx"])
+    parser.add_argument("--onnx-dir", type=Path, default=DEFAULT_ONNX_DIR)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.documents, args.chunks)
+    if not chunks:
+        raise SystemExit(f"No chunks in {args.documents}; run ingest first.")
+    rows = []
+    for runtime, batch_size, sort, threads in itertools.product(
+        args.runtime, args.batch_size, (False, True), args.threads
+    ):
+        if runtime == "onnx" and not (args.onnx_dir / "model.onnx").exists():
+            print(f"Skipping onnx: no export in {args.onnx_dir} (run training/export_embedder_onnx.py).")
+            continue
+        options = EmbeddingOptions(
+            batch_size=batch_size,
+            sort_by_length=sort,
+            num_threads=threads or None,
+            runtime=runtime,
+            onnx_dir=args.onnx_dir,
+        )
+        embedder = Embedder(options=options)
+        embedder.encode(chunks[: batch_size])  # warm-up
+        embedder.stats = {"chunks": 0, "seconds": 0.0}
+        embedder.encode(chunks)
+        rows.append([runtime, batch_size, sort, threads or "default", round(embedder.chunks_per_second(), 1)])
+    print(f"{len(chunks)} chunks from {args.documents}")
+    print(tabulate(rows, headers=["runtime", "batch_size", "sort_by_length", "threads", "chunks/s"]))
+
+
+if __name__ == "__main__":
+    main()
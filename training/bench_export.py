@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Export time of a large semester: one sink after another versus the fan-out.
+
+The synthetic assignments and plans from ``bench_artifacts.synthesize`` are
+written as JSON artifacts, then exported three ways:
+
+* ``sequential``: the previous path, ``load_paired`` into a list, then
+  ``write_calendar_ics``, ``write_tasks_csv`` and ``write_sqlite`` in turn.
+* ``fan-out``: ``export_outputs``, which streams ``iter_paired`` once into
+  every selected sink on its own thread.
+* each sink alone, fed by ``iter_paired``, for the slowest-sink bound.
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from tabulate import tabulate
+
+from bench_artifacts import synthesize
+from s2s.execute import (
+    DEFAULT_EXPORT_FORMATS,
+    make_exporter,
+    run_exporters,
+    write_calendar_ics,
+    write_sqlite,
+    write_tasks_csv,
+)
+from s2s.pipeline.artifacts import iter_paired, load_paired, write_assignments, write_plan
+from s2s.pipeline.stages import export_outputs, export_paths
+from s2s.schemas import AssignmentRecord
+
+
+def timed(fn: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def sequential(paths: Dict[str, Path]) -> None:
+    paired = load_paired(paths)
+    write_calendar_ics(paired, output_dir=paths["ics"].parent, filename=paths["ics"].name)
+    write_tasks_csv(paired, output_dir=paths["csv"].parent, filename=paths["csv"].name)
+    write_sqlite(paired, output_path=paths["sqlite"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--tasks-per-assignment", type=int, default=4)
+    parser.add_argument("--formats", nargs="+", default=["ics,csv,sqlite", "ics,csv,sqlite,jsonl,markdown"])
+    parser.add_argument("--repeats", type=int, default=3, help="Best-of runs per configuration.")
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+
+    items, plans = synthesize(args.tasks, args.tasks_per_assignment, args.seed)
+    rows: List[List[object]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "out"
+        paths = {
+            "assignments": Path(tmp) / "a.json",
+            "plan": Path(tmp) / "p.json",
+            "exports": out,
+            "ics": out / "calendar.ics",
+            "csv": out / "tasks.csv",
+            "sqlite": out / "tasks.db",
+        }
+        write_assignments(paths["assignments"], items)
+        write_plan(paths["plan"], plans, [AssignmentRecord(**item) for item in items])
+
+        seconds = timed(lambda: sequential(paths), args.repeats)
+        rows.append(["sequential", ", ".join(DEFAULT_EXPORT_FORMATS), round(seconds, 2)])
+        for formats in args.formats:
+            seconds = timed(lambda: export_outputs(paths, None, [formats]), args.repeats)
+            rows.append(["fan-out", formats.replace(",", ", "), round(seconds, 2)])
+        for name, path in export_paths(paths, [",".join(args.formats)]).items():
+            seconds = timed(lambda: run_exporters(iter_paired(paths), [make_exporter(name, path)]), args.repeats)
+            rows.append(["one sink", name, round(seconds, 2)])
+    print(f"{len(items)} assignments, {sum(len(tasks) for tasks in plans.values())} tasks")
+    print(tabulate(rows, headers=["mode", "formats", "seconds"]))
+
+
+if __name__ == "__main__":
+    main()
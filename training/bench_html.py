@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Speed, memory and extraction recall of the HTML ingest paths.
+
+Synthetic syllabi (``make_synth.make_syllabus``) are rendered as LMS pages
+with Canvas- or Moodle-style chrome (navigation, scripts, sidebars) and
+concatenated into one large course export of about ``--megabytes`` MB.
+Each parser reads the export in a fresh interpreter, reporting wall time and
+peak resident memory (``VmHWM``, reset after imports) above the baseline:
+
+* ``bs4 html.parser`` / ``bs4 lxml``: the previous reader, ``read_text``
+  plus ``BeautifulSoup(...).get_text("\\n")``.
+* ``stream stdlib`` / ``stream lxml``: ``html_to_text`` with each backend.
+
+Recall is measured on ``--quality-docs`` single-syllabus pages: the share of
+gold due dates that the rule-based extractor finds in each parser's text.
+"""
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import random
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+from tabulate import tabulate
+
+from make_synth import make_syllabus
+from s2s.extract import AssignmentExtractor
+
+PARSERS = ["bs4 html.parser", "bs4 lxml", "stream stdlib", "stream lxml"]
+
+PASS = """
+import json, sys, time
+from pathlib import Path
+
+def hwm_mb():
+    status = dict(line.split(":", 1) for line in Path("/proc/self/status").read_text().splitlines())
+    return int(status["VmHWM"].split()[0]) / 1024
+
+path, parser = Path(sys.argv[1]), sys.argv[2]
+if parser.startswith("bs4"):
+    from bs4 import BeautifulSoup
+    import lxml.etree
+else:
+    from s2s.ingest.html_reader import html_to_text
+Path("/proc/self/clear_refs").write_text("5")  # reset the peak to the post-import RSS
+baseline = hwm_mb()
+started = time.perf_counter()
+if parser.startswith("bs4"):
+    text = BeautifulSoup(path.read_text(encoding="utf-8"), parser.split()[1]).get_text(separator="\\n")
+else:
+    text = html_to_text(path, parser.split()[1])
+seconds = time.perf_counter() - started
+peak = hwm_mb() - baseline
+print(json.dumps({"seconds": seconds, "peak_mb": peak, "lines": len(text.splitlines())}))
+"""
+
+CANVAS_CHROME = (
+    '<header id="header" class="ic-app-header"><nav role="navigation" aria-label="Global"><ul>{links}</ul></nav></header>'
+    '<script>window.ENV = {{"current_user": {{"id": 1}}, "due": "Due: January 1, 2025 at 11:59 PM"}};</script>'
+    '<div id="left-side"><nav role="navigation" aria-label="Courses Navigation Menu"><ul>{links}</ul></nav></div>'
+)
+MOODLE_CHROME = (
+    '<nav class="navbar fixed-top"><ul class="navbar-nav">{links}</ul></nav>'
+    '<div role="navigation" class="breadcrumb-nav"><ol class="breadcrumb">{links}</ol></div>'
+    '<style>.path-course-view .section {{ margin: 0 }}</style>'
+)
+LINKS = "".join(f'<li><a href="/courses/{idx}">Calendar week {idx} due soon</a></li>' for idx in range(30))
+SIDEBAR = '<aside class="right-side"><h2>To Do</h2><ul><li>Quiz due Tomorrow at 11:59 PM</li></ul></aside><footer>Powered by the LMS</footer>'
+
+
+def render(text: str, flavor: str) -> str:
+    """One LMS page: chrome around the syllabus, rendered as headings, lists, tables and paragraphs."""
+    body: List[str] = []
+    table: List[List[str]] = []
+    items: List[str] = []
+
+    def flush() -> None:
+        if items:
+            body.append("<ul>" + "".join(f"<li>{item}</li>" for item in items) + "</ul>")
+            items.clear()
+        if table:
+            head, *rows = table
+            body.append(
+                "<table><thead><tr>"
+                + "".join(f"<th>{cell}</th>" for cell in head)
+                + "</tr></thead><tbody>"
+                + "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows)
+                + "</tbody></table>"
+            )
+            table.clear()
+
+    for line in text.splitlines():
+        clean = html.escape(line.strip())
+        if line.startswith("|"):
+            cells = [cell.strip() for cell in clean.strip("|").split("|")]
+            if not set("".join(cells)) <= {"-"}:
+                table.append(cells)
+            continue
+        if re.match(r"^[–*\-•]\s", line):
+            items.append(clean[2:].strip())
+            continue
+        flush()
+        if not clean:
+            continue
+        if line.startswith("#"):
+            body.append(f"<h2>{clean.lstrip('#').strip()}</h2>")
+        elif clean.isupper():
+            body.append(f"<h3>{clean}</h3>")
+        else:
+            body.append(f"<p>{clean}</p>")
+    flush()
+    chrome = (CANVAS_CHROME if flavor == "canvas" else MOODLE_CHROME).format(links=LINKS)
+    return f'{chrome}<main id="content"><div class="user_content">{"".join(body)}</div></main>{SIDEBAR}'
+
+
+def page(text: str, flavor: str) -> str:
+    return f"<!DOCTYPE html><html><head><title>Syllabus</title></head><body>{render(text, flavor)}</body></html>"
+
+
+def recall(parser: str, samples: List[Tuple[Path, List[str]]], extractor: AssignmentExtractor) -> float:
+    from bs4 import BeautifulSoup
+
+    from s2s.ingest.html_reader import html_to_text
+
+    found = total = 0
+    for path, dues in samples:
+        if parser.startswith("bs4"):
+            text = BeautifulSoup(path.read_text(encoding="utf-8"), parser.split()[1]).get_text(separator="\n")
+        else:
+            text = html_to_text(path, parser.split()[1])
+        extracted = {record.due_datetime_iso for record in extractor.extract_many(text, str(path))}
+        found += sum(due in extracted for due in dues)
+        total += len(dues)
+    return found / max(total, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megabytes", type=float, default=50.0, help="Approximate size of the course export.")
+    parser.add_argument("--quality-docs", type=int, default=100)
+    parser.add_argument("--parsers", nargs="+", default=PARSERS)
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    extractor = AssignmentExtractor(force_rule_based=True)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        export = Path(tmp) / "course_export.html"
+        pages = 0
+        with export.open("w", encoding="utf-8") as handle:
+            handle.write("<!DOCTYPE html><html><head><title>Course export</title></head><body>")
+            while handle.tell() < args.megabytes * 2**20:
+                flavor = "canvas" if pages % 2 == 0 else "moodle"
+                handle.write(f'<div class="page">{render(make_syllabus(rng)["input_text"], flavor)}</div>')
+                pages += 1
+            handle.write("</body></html>")
+        size_mb = export.stat().st_size / 2**20
+
+        samples = []
+        for idx in range(args.quality_docs):
+            sample = make_syllabus(rng)
+            path = Path(tmp) / f"syllabus_{idx:04d}.html"
+            path.write_text(page(sample["input_text"], "canvas" if idx % 2 == 0 else "moodle"), encoding="utf-8")
+            samples.append((path, [item["due_datetime_iso"] for item in json.loads(sample["target_json"])]))
+
+        for name in args.parsers:
+            output = subprocess.run(
+                [sys.executable, "-c", PASS, str(export), name], check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rows.append(
+                [
+                    name,
+                    round(result["seconds"], 2),
+                    round(size_mb / result["seconds"], 1),
+                    round(result["peak_mb"], 1),
+                    result["lines"],
+                    round(recall(name, samples, extractor), 3),
+                ]
+            )
+    print(f"{pages} pages, {size_mb:.1f} MB export; recall over {args.quality_docs} single-syllabus pages")
+    print(tabulate(rows, headers=["parser", "seconds", "mb_per_s", "peak_rss_mb", "lines", "due_recall"]))
+
+
+if __name__ == "__main__":
+    main()
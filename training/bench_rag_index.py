@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Recall/latency benchmarks for ``RAGIndex`` vector backends.
+
+By default sweeps Chroma HNSW settings; ``--compare-backends`` instead builds
+the Chroma and NumPy backends over the same vectors and reports cold start
+(fresh interpreter: backend imports, open, first query), query latency and
+recall. ``--compare-quantization`` reports code size, latency and recall@k
+against exact float32 search for each NumPy storage format.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from tabulate import tabulate
+
+from s2s.rag.backends import BACKENDS, QUANTIZATIONS, HNSWParams, NumpyBackend, make_backend
+
+import chromadb
+
+COLD_START = """
+import time, numpy as np
+from s2s.rag.backends import make_backend
+started = time.perf_counter()
+backend = make_backend({kind!r}, {root!r})
+backend.query("bench", np.ones({dim}, dtype=np.float32), 10)
+print(time.perf_counter() - started)
+"""
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int, seed: int = 1337) -> np.ndarray:
+    """Unit vectors drawn around ``clusters`` centres, like embeddings of related chunks."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def document_vectors(path: Path) -> np.ndarray:
+    from sentence_transformers import SentenceTransformer
+
+    from s2s.ingest.store import read_documents
+    from s2s.rag.chunking import chunk_spans
+    from s2s.rag.index import EMBEDDING_MODEL
+
+    texts: List[str] = []
+    for doc in read_documents(path):
+        text = doc.text
+        spans = chunk_spans(text, pages=doc.pages, page_starts=doc.page_starts())
+        texts.extend(text[span.start : span.end] for span in spans)
+    return SentenceTransformer(EMBEDDING_MODEL).encode(texts, normalize_embeddings=True, show_progress_bar=False)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def bench(vectors: np.ndarray, queries: np.ndarray, params: HNSWParams, k: int, root: Path) -> Dict[str, float]:
+    client = chromadb.PersistentClient(path=str(root / f"m{params.M}_c{params.construction_ef}_s{params.search_ef}"))
+    collection = client.create_collection(name="bench", metadata=params.metadata())
+    ids = [str(idx) for idx in range(len(vectors))]
+    started = time.perf_counter()
+    for begin in range(0, len(vectors), 5000):
+        collection.add(ids=ids[begin : begin + 5000], embeddings=vectors[begin : begin + 5000].tolist())
+    build = time.perf_counter() - started
+    truth = exact_top_k(vectors, queries, k)
+    latencies: List[float] = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+        latencies.append(time.perf_counter() - started)
+        hits += len({int(idx) for idx in result["ids"][0]} & set(expected.tolist()))
+    return {
+        "build_s": build,
+        f"recall@{k}": hits / (k * len(queries)),
+        "p50_ms": 1000 * float(np.percentile(latencies, 50)),
+        "p95_ms": 1000 * float(np.percentile(latencies, 95)),
+    }
+
+
+def compare_backends(vectors: np.ndarray, queries: np.ndarray, k: int, root: Path) -> List[List[object]]:
+    truth = exact_top_k(vectors, queries, k)
+    ids = [str(idx) for idx in range(len(vectors))]
+    rows = []
+    for kind in BACKENDS:
+        backend = make_backend(kind, root / kind)
+        started = time.perf_counter()
+        for begin in range(0, len(vectors), 5000):
+            chunk_ids = ids[begin : begin + 5000]
+            blanks = [""] * len(chunk_ids)
+            metadatas = [{"doc_id": "bench"}] * len(chunk_ids)
+            backend.upsert("bench", chunk_ids, vectors[begin : begin + 5000], blanks, metadatas)
+        build = time.perf_counter() - started
+        code = COLD_START.format(kind=kind, root=str(root / kind), dim=vectors.shape[1])
+        cold = float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+        latencies: List[float] = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            result = backend.query("bench", query, k)
+            latencies.append(time.perf_counter() - started)
+            hits += len({int(hit["id"]) for hit in result} & set(expected.tolist()))
+        rows.append(
+            [
+                kind,
+                round(build, 2),
+                round(cold, 3),
+                round(1000 * float(np.percentile(latencies, 50)), 3),
+                round(1000 * float(np.percentile(latencies, 95)), 3),
+                round(hits / (k * len(queries)), 3),
+            ]
+        )
+    return rows
+
+
+def compare_quantization(
+    vectors: np.ndarray, queries: np.ndarray, k: int, root: Path, multipliers: List[int]
+) -> List[List[object]]:
+    truth = exact_top_k(vectors, queries, k)
+    ids = [str(idx) for idx in range(len(vectors))]
+    rows = []
+    # int8 scored from its own codes has no shortlist, so the multiplier only matters elsewhere.
+    settings = [("float32", False, 1), ("int8", False, 1)]
+    settings += [("binary", False, mult) for mult in multipliers]
+    settings += [(kind, True, mult) for kind in QUANTIZATIONS[1:] for mult in multipliers]
+    for quantization, keep_float, multiplier in settings:
+        folder = root / f"{quantization}_{keep_float}_{multiplier}"
+        backend = NumpyBackend(folder, quantization=quantization, rescore_multiplier=multiplier, keep_float=keep_float)
+        backend.upsert("bench", ids, vectors, [""] * len(ids), [{"doc_id": "bench"}] * len(ids))
+        latencies: List[float] = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            started = time.perf_counter()
+            result = backend.query("bench", query, k)
+            latencies.append(time.perf_counter() - started)
+            hits += len({int(hit["id"]) for hit in result} & set(expected.tolist()))
+        rows.append(
+            [
+                quantization,
+                "float32" if keep_float else "codes",
+                multiplier,
+                round(backend.nbytes("bench") / 2**20, 2),
+                round(1000 * float(np.percentile(latencies, 50)), 3),
+                round(hits / (k * len(queries)), 3),
+            ]
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=20000, help="Synthetic vectors to index.")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--documents", type=Path, help="Embed chunks of a documents.jsonl instead.")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--M", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 32, 64, 128])
+    parser.add_argument("--compare-backends", action="store_true", help="Chroma vs NumPy startup and latency.")
+    parser.add_argument("--compare-quantization", action="store_true", help="float32 vs int8 vs binary storage.")
+    parser.add_argument("--rescore-multiplier", type=int, nargs="+", default=[1, 4, 10])
+    args = parser.parse_args()
+
+    vectors = document_vectors(args.documents) if args.documents else synthetic_vectors(args.n, args.dim, args.clusters)
+    rng = np.random.default_rng(7)
+    queries = vectors[rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    if args.compare_quantization:
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = compare_quantization(vectors, queries, args.k, Path(tmp), args.rescore_multiplier)
+        print(f"{len(vectors)} vectors, {len(queries)} queries")
+        headers = ["quantization", "rescore", "multiplier", "codes_MiB", "p50_ms", f"recall@{args.k}"]
+        print(tabulate(rows, headers=headers))
+        return
+
+    if args.compare_backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = compare_backends(vectors, queries, args.k, Path(tmp))
+        print(f"{len(vectors)} vectors, {len(queries)} queries")
+        headers = ["backend", "build_s", "cold_start_s", "p50_ms", "p95_ms", f"recall@{args.k}"]
+        print(tabulate(rows, headers=headers))
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for m, construction, search in itertools.product(args.M, args.ef_construction, args.ef_search):
+            params = HNSWParams(M=m, construction_ef=construction, search_ef=search)
+            metrics = bench(vectors, queries, params, args.k, Path(tmp))
+            rows.append([m, construction, search, *(round(value, 3) for value in metrics.values())])
+    headers = ["M", "ef_construction", "ef_search", "build_s", f"recall@{args.k}", "p50_ms", "p95_ms"]
+    print(f"{len(vectors)} vectors, {len(queries)} queries")
+    print(tabulate(rows, headers=headers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Memory and load time of ingested documents: inline JSONL versus the text store.
+
+``--documents`` synthetic syllabi (``make_synth.make_syllabus``) are saved
+both ways: the old JSONL rows with ``text`` and ``pages`` inline, and the
+memory-mapped text blob with its offset table. A fresh interpreter per
+layout loads every document and then chunks them one at a time, printing
+anonymous resident memory (``RssAnon``, which excludes mapped file pages)
+after the load and at the end of the pass.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from tabulate import tabulate
+
+from make_synth import make_syllabus
+from s2s.ingest import Document
+from s2s.ingest.store import text_store_path, write_documents
+from s2s.utils import write_jsonl
+
+PASS = """
+import json, sys, time
+from pathlib import Path
+from s2s.ingest import Document
+from s2s.ingest.store import read_documents
+from s2s.rag.chunking import chunk_offsets
+from s2s.utils import read_jsonl
+
+def rss_mb():
+    # Anonymous memory only: mapped blob pages are clean page cache the kernel can drop.
+    status = dict(line.split(":", 1) for line in Path("/proc/self/status").read_text().splitlines())
+    return int(status["RssAnon"].split()[0]) / 1024
+
+path, layout = Path(sys.argv[1]), sys.argv[2]
+baseline = rss_mb()
+started = time.perf_counter()
+if layout == "jsonl":
+    docs = [Document.from_dict(row) for row in read_jsonl(path)]
+else:
+    docs = read_documents(path)
+load = time.perf_counter() - started
+loaded = rss_mb() - baseline
+started = time.perf_counter()
+chunks = 0
+for doc in docs:
+    text = doc.text
+    chunks += len(chunk_offsets(text, pages=doc.pages, page_starts=doc.page_starts()))
+print(json.dumps({"load_s": load, "loaded_mb": loaded, "pass_s": time.perf_counter() - started,
+                  "after_pass_mb": rss_mb() - baseline, "chunks": chunks}))
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    docs = []
+    for idx in range(args.documents):
+        text = make_syllabus(rng)["input_text"]
+        docs.append(Document(id=f"doc{idx}", path=f"syllabus-{idx:05d}.txt", text=text, pages=[text]))
+    text_mb = sum(len(doc.text.encode("utf-8")) for doc in docs) / 2**20
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        inline = Path(tmp) / "inline_documents.jsonl"
+        write_jsonl(inline, [doc.to_dict() for doc in docs])
+        stored = Path(tmp) / "stored_documents.jsonl"
+        write_documents(stored, docs)
+        layouts = {
+            "jsonl": (inline, inline.stat().st_size),
+            "text store": (stored, stored.stat().st_size + text_store_path(stored).stat().st_size),
+        }
+        for name, (path, size) in layouts.items():
+            layout = "jsonl" if name == "jsonl" else "store"
+            output = subprocess.run(
+                [sys.executable, "-c", PASS, str(path), layout], check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rows.append(
+                [
+                    name,
+                    round(size / 2**20, 1),
+                    round(result["load_s"], 2),
+                    round(result["loaded_mb"], 1),
+                    round(result["pass_s"], 2),
+                    round(result["after_pass_mb"], 1),
+                ]
+            )
+    print(f"{args.documents} documents, {text_mb:.1f} MB of text")
+    print(tabulate(rows, headers=["layout", "disk_mb", "load_s", "rss_after_load_mb", "pass_s", "rss_after_pass_mb"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,253 @@
 #!/usr/bin/env python3
+"""Accuracy and throughput of assignment extraction on the validation split.
+
+The rule-based backend fans samples out over ``--workers`` processes and the
+LoRA backend decodes ``--batch-size`` prompts per ``generate`` call. Metrics
+are computed over columnar arrays, and each sample's latency is the wall time
+of the call (or batch) that produced it, so p50/p95 sit next to accuracy.
+``--compare-cascade`` sets model-only extraction beside the rules-first cascade
+and reports the share of text the cascade escalated and its speedup.
+"""
 from __future__ import annotations
 
+import argparse
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
+import pandas as pd
 from datasets import load_from_disk
 from tabulate import tabulate
 
 from s2s.extract import AssignmentExtractor
 
+FIELDS = ["course", "assignment_title", "due_datetime_iso", "points_or_weight"]
+
+_WORKER_EXTRACTOR: Optional[AssignmentExtractor] = None
+
 
 def compute_metrics(golds: List[Dict], preds: List[Dict]) -> Dict[str, float]:
-    fields = ["course", "assignment_title", "due_datetime_iso", "points_or_weight"]
-    exact = []
-    for gold, pred in zip(golds, preds):
-        exact.append(int(all(pred.get(f) == gold.get(f) for f in fields)))
-
-    def list_to_set(items):
-        return set(items)
-
-    micro_tp = 0
-    micro_fn = 0
-    micro_fp = 0
-    for gold, pred in zip(golds, preds):
-        gold_set = list_to_set(gold.get("deliverables", []))
-        pred_set = list_to_set(pred.get("deliverables", []))
-        micro_tp += len(gold_set & pred_set)
-        micro_fp += len(pred_set - gold_set)
-        micro_fn += len(gold_set - pred_set)
+    if not golds:
+        return {"field_exact_match": 0.0, "deliverable_micro_f1": 1.0, "date_accuracy_hours": 0.0}
+    gold_fields = np.array([[gold.get(f) for f in FIELDS] for gold in golds], dtype=object)
+    pred_fields = np.array([[pred.get(f) for f in FIELDS] for pred in preds], dtype=object)
+    exact = (gold_fields == pred_fields).all(axis=1)
 
+    # One (sample, deliverable) row per distinct item, so set overlap becomes a join.
+    gold_items = _explode_deliverables(golds)
+    pred_items = _explode_deliverables(preds)
+    micro_tp = len(gold_items.merge(pred_items, on=["sample", "item"]))
+    micro_fp = len(pred_items) - micro_tp
+    micro_fn = len(gold_items) - micro_tp
     denom = micro_tp + 0.5 * (micro_fp + micro_fn)
     f1 = micro_tp / denom if denom else 1.0
 
-    def parse_date(value: str) -> np.datetime64:
-        return np.datetime64(value.replace("Z", "+00:00"))
-
-    date_diffs = []
-    for gold, pred in zip(golds, preds):
-        try:
-            diff = abs(
-                (parse_date(gold["due_datetime_iso"]) - parse_date(pred["due_datetime_iso"]))
-                .astype("timedelta64[m]")
-                .astype(float)
-            )
-            date_diffs.append(diff / 60.0)
-        except Exception:
-            date_diffs.append(np.inf)
+    gold_due = _parse_dates(golds)
+    pred_due = _parse_dates(preds)
+    seconds = (gold_due - pred_due).dt.total_seconds().to_numpy(dtype=float)
+    # Floored to whole minutes like timedelta64[m]; unparseable dates count as infinitely wrong.
+    hours = np.where(np.isnan(seconds), np.inf, np.abs(np.floor(seconds / 60.0)) / 60.0)
 
     return {
-        "field_exact_match": float(np.mean(exact)),
+        "field_exact_match": float(exact.mean()),
         "deliverable_micro_f1": f1,
-        "date_accuracy_hours": float(np.mean(date_diffs)),
+        "date_accuracy_hours": float(hours.mean()),
+    }
+
+
+def _explode_deliverables(items: List[Dict]) -> pd.DataFrame:
+    frame = pd.DataFrame({"item": [item.get("deliverables") or [] for item in items]})
+    frame["sample"] = np.arange(len(items))
+    return frame.explode("item").dropna(subset=["item"]).drop_duplicates()
+
+
+def _parse_dates(items: List[Dict]) -> pd.Series:
+    values = pd.Series([item.get("due_datetime_iso") for item in items], dtype=object)
+    # pandas 2 needs ISO8601 to accept offsets and fractional seconds mixed in one column.
+    options = {"format": "ISO8601"} if int(pd.__version__.split(".")[0]) >= 2 else {}
+    return pd.to_datetime(values, errors="coerce", utc=True, **options)
+
+
+def latency_summary(latencies: np.ndarray, elapsed: float) -> Dict[str, float]:
+    if not len(latencies):
+        return {"samples_per_second": 0.0, "latency_p50_ms": 0.0, "latency_p95_ms": 0.0, "latency_p99_ms": 0.0}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "samples_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_p50_ms": float(p50),
+        "latency_p95_ms": float(p95),
+        "latency_p99_ms": float(p99),
     }
 
 
+def _first_record(extractor: AssignmentExtractor, records: List[Any], text: str) -> Dict[str, Any]:
+    record = records[0] if records else extractor.extract(text, "eval")
+    return record.dict_for_storage()
+
+
+def _init_worker(extractor_kwargs: Dict[str, Any]) -> None:
+    global _WORKER_EXTRACTOR
+    _WORKER_EXTRACTOR = AssignmentExtractor(**extractor_kwargs)
+
+
+def _extract_chunk(texts: List[str]) -> Tuple[List[Dict[str, Any]], List[float]]:
+    assert _WORKER_EXTRACTOR is not None
+    preds: List[Dict[str, Any]] = []
+    latencies: List[float] = []
+    for text in texts:
+        started = time.perf_counter()
+        preds.append(_first_record(_WORKER_EXTRACTOR, _WORKER_EXTRACTOR.extract_many(text, "eval"), text))
+        latencies.append(time.perf_counter() - started)
+    return preds, latencies
+
+
+def run_parallel(
+    texts: List[str], extractor_kwargs: Dict[str, Any], workers: int
+) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Rule-based extraction spread over worker processes, each with its own extractor."""
+    size = max(1, -(-len(texts) // (workers * 4)))
+    chunks = [texts[begin : begin + size] for begin in range(0, len(texts), size)]
+    preds: List[Dict[str, Any]] = []
+    latencies: List[float] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(extractor_kwargs,)) as pool:
+        for chunk_preds, chunk_latencies in pool.map(_extract_chunk, chunks):
+            preds.extend(chunk_preds)
+            latencies.extend(chunk_latencies)
+    return preds, np.array(latencies)
+
+
+def run_batched(
+    extractor: AssignmentExtractor, texts: List[str], batch_size: int
+) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+    """Extraction in ``batch_size`` groups; every sample in a group waits for the whole group."""
+    preds: List[Dict[str, Any]] = []
+    latencies: List[float] = []
+    for begin in range(0, len(texts), batch_size):
+        batch = texts[begin : begin + batch_size]
+        started = time.perf_counter()
+        records = extractor.extract_batch(batch, ["eval"] * len(batch), batch_size=batch_size)
+        preds.extend(_first_record(extractor, found, text) for found, text in zip(records, batch))
+        latencies.extend([time.perf_counter() - started] * len(batch))
+    return preds, np.array(latencies)
+
+
+def evaluate(
+    dataset,
+    extractor_kwargs: Dict[str, Any],
+    limit: Optional[int] = None,
+    batch_size: int = 1,
+    workers: int = 1,
+) -> Dict[str, float]:
+    """Run one extractor configuration over the validation split and time it."""
+    samples = dataset["validation"]
+    if limit:
+        samples = samples.select(range(min(limit, len(samples))))
+    texts = list(samples["input_text"])
+    golds = [json.loads(target) for target in samples["target_json"]]
+    rule_based = bool(extractor_kwargs.get("force_rule_based"))
+    extractor = None if rule_based and workers > 1 else AssignmentExtractor(**extractor_kwargs)
+    started = time.perf_counter()
+    if extractor is None:
+        preds, latencies = run_parallel(texts, extractor_kwargs, workers)
+    else:
+        preds, latencies = run_batched(extractor, texts, max(1, batch_size))
+    elapsed = time.perf_counter() - started
+    metrics = compute_metrics(golds, preds)
+    metrics.update(latency_summary(latencies, elapsed))
+    if extractor is not None:
+        metrics["tokens_per_second"] = extractor.tokens_per_second()
+        metrics.update(extractor.fallback_rates())
+        if extractor.cascade:
+            metrics.update(extractor.cascade_rates())
+    return metrics
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Evaluate assignment extraction on the validation split.")
+    parser.add_argument("--backend", choices=["rules", "lora", "cascade"], default="rules")
+    parser.add_argument("--adapter-dir", default="models/s2s_lora_t5")
+    parser.add_argument("--cpu-optimized", action="store_true", help="Merge LoRA weights and decode greedily.")
+    parser.add_argument("--int8", action="store_true", help="Apply dynamic int8 quantization on CPU.")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads.")
+    parser.add_argument(
+        "--compare-cpu",
+        action="store_true",
+        help="Evaluate the LoRA backend before and after CPU optimizations side by side.",
+    )
+    parser.add_argument("--constrained", action="store_true", help="Constrain decoding to the JSON schema.")
+    parser.add_argument(
+        "--compare-constrained",
+        action="store_true",
+        help="Evaluate the LoRA backend with free-form and schema-constrained decoding side by side.",
+    )
+    parser.add_argument(
+        "--compare-cascade",
+        action="store_true",
+        help="Evaluate model-only extraction and the rules-first cascade side by side.",
+    )
+    parser.add_argument("--cascade-threshold", type=float, default=None, help="Escalate sections scoring below this.")
+    parser.add_argument(
+        "--batch-size", type=int, nargs="+", default=[1], help="LoRA prompts per generate call; several values are compared."
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes for the rule-based backend.")
+    parser.add_argument("--limit", type=int, default=None, help="Evaluate only the first N samples.")
+    return parser.parse_args()
+
+
 def main() -> None:
+    args = parse_args()
     dataset_dir = Path("training/data/dataset")
     if not dataset_dir.exists():
         raise SystemExit("Dataset missing. Run training/collate.py first.")
     dataset = load_from_disk(str(dataset_dir))
-    extractor = AssignmentExtractor(force_rule_based=True)
-    golds: List[Dict] = []
-    preds: List[Dict] = []
-    for sample in dataset["validation"]:
-        gold = json.loads(sample["target_json"])
-        record = extractor.extract(sample["input_text"], "eval")
-        golds.append(gold)
-        preds.append(record.dict_for_storage())
-    metrics = compute_metrics(golds, preds)
-    table = tabulate(metrics.items(), headers=["Metric", "Value"])
+    base_kwargs: Dict[str, Any] = {
+        "force_rule_based": args.backend == "rules"
+        and not (args.compare_cpu or args.compare_constrained or args.compare_cascade),
+        "adapter_dir": args.adapter_dir,
+        "num_threads": args.threads,
+        "generation_cache": False,
+    }
+    if args.cascade_threshold is not None:
+        base_kwargs["cascade_threshold"] = args.cascade_threshold
+    if args.compare_cpu:
+        configs = {
+            "baseline": dict(base_kwargs, constrained=args.constrained),
+            "cpu_optimized": dict(base_kwargs, optimize_cpu=True, quantize_int8=args.int8, constrained=args.constrained),
+        }
+    else:
+        selected = dict(
+            base_kwargs,
+            optimize_cpu=args.cpu_optimized,
+            quantize_int8=args.int8,
+            cascade=args.backend == "cascade",
+        )
+        if args.compare_constrained:
+            configs = {"free_form": selected, "constrained": dict(selected, constrained=True)}
+        elif args.compare_cascade:
+            configs = {
+                "model_only": dict(selected, constrained=args.constrained, cascade=False),
+                "cascade": dict(selected, constrained=args.constrained, cascade=True),
+            }
+        else:
+            configs = {args.backend: dict(selected, constrained=args.constrained)}
+    batch_sizes = [1] if base_kwargs["force_rule_based"] else args.batch_size
+    results = {}
+    for name, kwargs in configs.items():
+        for batch_size in batch_sizes:
+            label = f"{name}@{batch_size}" if len(batch_sizes) > 1 else name
+            results[label] = evaluate(dataset, kwargs, args.limit, batch_size=batch_size, workers=args.workers)
+    if args.compare_cascade:
+        for batch_size in batch_sizes:
+            suffix = f"@{batch_size}" if len(batch_sizes) > 1 else ""
+            baseline = results[f"model_only{suffix}"]["samples_per_second"]
+            cascade = results[f"cascade{suffix}"]
+            cascade["speedup_vs_model_only"] = cascade["samples_per_second"] / baseline if baseline else 0.0
+    metric_names = list(dict.fromkeys(metric for metrics in results.values() for metric in metrics))
+    rows = [[metric] + [results[name].get(metric, "") for name in results] for metric in metric_names]
+    table = tabulate(rows, headers=["Metric"] + list(results))
     print(table)
 
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Recall and cost of retrieval-scoped extraction against full-scan extraction.
+
+Validation samples, or ``--synthetic N`` full syllabi from
+``make_synth.make_syllabus``, are indexed into a throwaway NumPy-backed
+``RAGIndex`` (``--concat N`` joins N samples into one long document first;
+``--filler N`` appends N lines of weekly topics and readings to each
+syllabus, the prose that makes up most of a real one). Every
+document is then extracted twice with the rule-based extractor: once over
+all of its lines, and once over the ``--top-k`` chunks retrieved for the
+deadline queries plus ``--context-lines`` lines around each. Reported per k:
+the share of full-scan assignments (course, title, due) the scoped run also finds,
+the share of gold due dates each run finds, the share of lines scanned and
+the extraction time (retrieval included).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Set, Tuple
+
+from datasets import load_from_disk
+from tabulate import tabulate
+
+from make_synth import make_syllabus
+
+from s2s.extract import AssignmentExtractor
+from s2s.ingest import Document
+from s2s.rag import RAGIndex
+from s2s.rag.scope import SCOPE_CONTEXT_LINES, retrieve_scope
+
+Pair = Tuple[str, str, str]
+
+TOPICS = ["Foundations", "Methods", "Case studies", "Modeling", "Data analysis", "Ethics", "Review", "Applications"]
+
+
+def schedule(rng: random.Random, lines: int) -> str:
+    """A weekly topics-and-readings section with no deadlines in it."""
+    rows = ["", "Course Schedule:"]
+    for week in range(1, lines + 1):
+        chapter = rng.randint(1, 20)
+        rows.append(f"Week {week}: {rng.choice(TOPICS)}; read chapter {chapter} and the posted notes.")
+    return "\n".join(rows) + "\n"
+
+
+def pairs(records) -> Set[Pair]:
+    return {(record.course or "", record.assignment_title.lower(), record.due_datetime_iso) for record in records}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=None, help="Use only the first N validation samples.")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic syllabi instead of the validation split.")
+    parser.add_argument("--filler", type=int, default=0, help="Schedule lines appended to each synthetic syllabus.")
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--concat", type=int, default=1, help="Validation samples joined into each document.")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--context-lines", type=int, default=SCOPE_CONTEXT_LINES)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rng = random.Random(args.seed)
+        samples = [make_syllabus(rng) for _ in range(args.synthetic)]
+        texts = [sample["input_text"] + schedule(rng, args.filler) for sample in samples]
+        targets = [sample["target_json"] for sample in samples]
+    else:
+        dataset_dir = Path("training/data/dataset")
+        if not dataset_dir.exists():
+            raise SystemExit("Dataset missing. Run training/collate.py first.")
+        split = load_from_disk(str(dataset_dir))["validation"]
+        if args.limit:
+            split = split.select(range(min(args.limit, len(split))))
+        texts = list(split["input_text"])
+        targets = list(split["target_json"])
+    golds = []
+    for target in targets:
+        gold = json.loads(target)
+        golds.append([item["due_datetime_iso"] for item in (gold if isinstance(gold, list) else [gold])])
+
+    docs: List[Document] = []
+    gold_dues: List[List[str]] = []
+    for begin in range(0, len(texts), args.concat):
+        text = "\n\n".join(texts[begin : begin + args.concat])
+        path = Path(f"{'synthetic' if args.synthetic else 'validation'}_{begin:04d}.txt")
+        docs.append(Document(id=Document.make_id(path, text), path=str(path), text=text, pages=[text]))
+        gold_dues.append([due for gold in golds[begin : begin + args.concat] for due in gold])
+
+    extractor = AssignmentExtractor(force_rule_based=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        rag_index = RAGIndex(project="evalscope", persist_root=Path(tmp), backend="numpy")
+        rag_index.ingest_documents(docs)
+
+        started = time.perf_counter()
+        full = [pairs(extractor.extract_many(doc.text, doc.path)) for doc in docs]
+        full_seconds = time.perf_counter() - started
+        total_lines = sum(doc.text.count("\n") + 1 for doc in docs)
+        found = sum(len(full_pairs) for full_pairs in full)
+        gold_total = sum(len(dues) for dues in gold_dues)
+        full_gold = sum(due in {pair[2] for pair in found_pairs} for found_pairs, dues in zip(full, gold_dues) for due in dues)
+        rows = [["full scan", 1.0, round(full_gold / max(gold_total, 1), 3), 1.0, round(full_seconds, 2)]]
+
+        for k in args.top_k:
+            started = time.perf_counter()
+            kept = scanned = gold_found = 0
+            for doc, full_pairs, dues in zip(docs, full, gold_dues):
+                scope = retrieve_scope(rag_index, doc, k=k, context_lines=args.context_lines)
+                text = doc.text if scope is None else scope.text
+                scanned += doc.text.count("\n") + 1 if scope is None else scope.lines
+                scoped_pairs = pairs(extractor.extract_many(text, doc.path))
+                kept += len(full_pairs & scoped_pairs)
+                scoped_dues = {pair[2] for pair in scoped_pairs}
+                gold_found += sum(due in scoped_dues for due in dues)
+            seconds = time.perf_counter() - started
+            rows.append(
+                [
+                    f"retrieval k={k}",
+                    round(kept / max(found, 1), 3),
+                    round(gold_found / max(gold_total, 1), 3),
+                    round(scanned / max(total_lines, 1), 3),
+                    round(seconds, 2),
+                ]
+            )
+    print(f"{len(docs)} documents ({args.concat} samples each), {total_lines} lines, {found} full-scan assignments")
+    print(tabulate(rows, headers=["scope", "recall_vs_full", "gold_due_recall", "lines_scanned", "seconds"]))
+
+
+if __name__ == "__main__":
+    main()
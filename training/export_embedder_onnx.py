@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""Export the retrieval embedder to ONNX for ``S2S_EMBED_RUNTIME=onnx`` / ``--embed-runtime onnx``."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from s2s.rag.embedding import DEFAULT_ONNX_DIR, EMBEDDING_MODEL, export_onnx
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_ONNX_DIR)
+    args = parser.parse_args()
+    print(f"Exported {args.model} to {export_onnx(args.output_dir, args.model)}")
+
+
+if __name__ == "__main__":
+    main()
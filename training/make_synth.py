@@ -1,11 +1,28 @@
 #!/usr/bin/env python3
+"""Synthetic extraction data: one-sentence snippets or whole noisy syllabi.
+
+``--kind snippet`` (the default) writes the original single-assignment
+sentences. ``--kind syllabus`` writes multi-section syllabi whose
+assignments appear as numbered lists, bullets, tables or prose, with dates
+in mixed formats including week-relative ones ("Friday of Week 6"); the
+target is the JSON list of every assignment.
+
+Samples are generated in shards of ``--shard-size``, each seeded only by
+``--seed`` and its shard number, so the output is identical for any
+``--workers`` count. Rows are streamed to one JSONL file per shard and
+``--corpus DIR`` also writes each syllabus as a ``.txt`` file that
+``s2s-agent run --source DIR`` can ingest for pipeline benchmarks.
+"""
 from __future__ import annotations
 
+import argparse
 import json
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 COURSES = [
     "Intro to Robotics",
@@ -38,9 +55,41 @@ DELIVERABLE_TEMPLATES: List[List[str]] = [
 
 SPAN_TEMPLATE = "Assignment {title} is due {date} at {time}."
 
+DEPARTMENTS = ["CS", "ECE", "BIO", "PHIL", "MATH", "STAT", "DES", "ENVS", "FIN", "COMM"]
+INSTRUCTORS = ["Dr. Rivera", "Prof. Okafor", "Dr. Chen", "Prof. Lindqvist", "Dr. Haddad", "Prof. Nakamura"]
+SECTIONS = {
+    "Assignment Schedule": ["Homework", "Problem Set", "Assignment"],
+    "Projects": ["Project Proposal", "Project Milestone", "Final Project Report", "Design Brief"],
+    "Labs": ["Lab", "Lab Report"],
+    "Exams and Quizzes": ["Quiz", "Midterm Exam", "Final Exam"],
+    "Writing": ["Reflection", "Critique", "Reading Journal"],
+}
+WEIGHTS = ["5%", "7%", "10%", "12%", "15%", "20%", "25%", "30 pts", "40 pts", "50 points"]
+BULLETS = ["-", "*", "•", "–"]
+POLICIES = [
+    "Late work loses 10% per day unless an extension is approved in advance.",
+    "Office hours are held Tuesdays 2-4 PM in the lab and by appointment.",
+    "All submissions go through the course LMS; email submissions are not accepted.",
+    "Collaboration is encouraged, but every student submits their own write-up.",
+    "Readings are posted one week before each session.",
+]
+DATE_FORMATS = [
+    "%B %d, %Y at %I:%M %p",
+    "%b %d %Y %H:%M",
+    "%m/%d/%Y %I:%M %p",
+    "%Y-%m-%d %H:%M",
+    "%A, %B %d, %Y by %I:%M %p",
+]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
 
-def _random_due(base_date: datetime) -> datetime:
-    return base_date + timedelta(days=random.randint(5, 80), hours=random.choice([9, 17, 23]))
+def shard_seed(seed: int, shard: int) -> int:
+    """Seed of one shard; shard 0 uses ``seed`` itself so the default output never changes."""
+    return seed + shard * 1_000_003
+
+
+def _random_due(rng: random.Random, base_date: datetime) -> datetime:
+    return base_date + timedelta(days=rng.randint(5, 80), hours=rng.choice([9, 17, 23]))
 
 
 def _render(course: str, title: str, due: datetime, deliverables: List[str], weight: str) -> Tuple[str, dict]:
@@ -63,24 +112,155 @@ def _render(course: str, title: str, due: datetime, deliverables: List[str], wei
     return input_text, target
 
 
-def main(count: int = 150, seed: int = 1337) -> None:
-    random.seed(seed)
-    out_path = Path("training/data/synth.jsonl")
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    records = []
+def make_snippet(rng: random.Random, idx: int) -> Dict[str, str]:
     base = datetime(2024, 1, 15)
-    for idx in range(count):
-        course = random.choice(COURSES)
-        title = f"{random.choice(['Project', 'Assignment', 'Lab', 'Presentation', 'Memo', 'Quiz'])} {idx + 1}"
-        deliverables = random.choice(DELIVERABLE_TEMPLATES)
-        due = _random_due(base)
-        weight = random.choice(["5%", "8%", "10%", "12%", "15%", "20%", "30 pts", "40 pts"])
-        input_text, target = _render(course, title, due, deliverables, weight)
-        records.append({"input_text": input_text, "target_json": json.dumps(target)})
-    with out_path.open("w", encoding="utf-8") as handle:
-        for row in records:
+    course = rng.choice(COURSES)
+    title = f"{rng.choice(['Project', 'Assignment', 'Lab', 'Presentation', 'Memo', 'Quiz'])} {idx + 1}"
+    deliverables = rng.choice(DELIVERABLE_TEMPLATES)
+    due = _random_due(rng, base)
+    weight = rng.choice(["5%", "8%", "10%", "12%", "15%", "20%", "30 pts", "40 pts"])
+    input_text, target = _render(course, title, due, deliverables, weight)
+    return {"input_text": input_text, "target_json": json.dumps(target)}
+
+
+def _format_due(rng: random.Random, due: datetime, term_start: datetime) -> str:
+    week = (due - term_start).days // 7 + 1
+    if rng.random() < 0.15 and due.weekday() < 5:
+        time_text = "noon" if due.hour == 12 else due.strftime("%I:%M %p").lstrip("0")
+        return f"{WEEKDAYS[due.weekday()]} of Week {week} at {time_text}"
+    if rng.random() < 0.1 and due.hour in (0, 12) and due.minute == 0:
+        return due.strftime("%B %d, %Y at ") + ("noon" if due.hour == 12 else "midnight")
+    text = due.strftime(rng.choice(DATE_FORMATS))
+    return text.replace(" 0", " ") if rng.random() < 0.5 else text
+
+
+def _render_item(
+    rng: random.Random, style: str, number: int, item: Dict[str, object], due_text: str, bullet: str
+) -> Tuple[List[str], str]:
+    """Lines for one assignment in ``style`` and the line that carries its due date."""
+    title = item["assignment_title"]
+    deliverables = ", ".join(item["deliverables"])
+    weight = item["points_or_weight"]
+    if style == "numbered":
+        due_line = f"   {bullet} Due: {due_text}"
+        lines = [f"{number}. {title}"]
+        if rng.random() < 0.5:
+            lines.append(f"   {bullet} Released: {item['released']}")
+        lines += [due_line, f"   {bullet} Deliverables: {deliverables}.", f"   {bullet} Weight: {weight}"]
+        return lines, due_line.strip(" -*•–")
+    if style == "bullets":
+        line = f"{bullet} {title}: due {due_text}. Submit {deliverables}. ({weight})"
+        return [line], line
+    if style == "table":
+        line = f"| {title} | {due_text} | {weight} | {deliverables} |"
+        return [line], line
+    line = f"{title} is due {due_text}; turn in {deliverables}. It counts for {weight} of the grade."
+    return [line], line
+
+
+def make_syllabus(rng: random.Random) -> Dict[str, str]:
+    course = f"{rng.choice(DEPARTMENTS)} {rng.randint(100, 599)} {rng.choice(COURSES)}"
+    year = rng.choice([2024, 2025, 2026])
+    month = rng.choice([1, 8, 9])
+    term_start = datetime(year, month, 1)
+    term_start += timedelta(days=(7 - term_start.weekday()) % 7)  # first Monday
+    lines = [
+        rng.choice([f"Course: {course}", f"COURSE: {course}", f"Course:  {course}"]),
+        f"Instructor: {rng.choice(INSTRUCTORS)}",
+        f"Semester: {'Spring' if month == 1 else 'Fall'} {year}",
+        f"Week 1 begins {term_start.strftime('%B %d, %Y').replace(' 0', ' ')}.",
+        "",
+    ]
+    records: List[Dict[str, object]] = []
+    seen_titles = set()
+    for section in rng.sample(sorted(SECTIONS), rng.randint(2, 4)):
+        style = rng.choice(["numbered", "bullets", "table", "prose"])
+        bullet = rng.choice(BULLETS)
+        lines.append(rng.choice([f"{section}:", section.upper(), f"## {section}"]))
+        if style == "table":
+            lines += ["| Item | Due | Weight | Deliverables |", "|---|---|---|---|"]
+        for number in range(1, rng.randint(2, 6) + 1):
+            kind = rng.choice(SECTIONS[section])
+            title = f"{kind} {number}" if kind in ("Homework", "Problem Set", "Assignment", "Lab", "Quiz") else kind
+            if title in seen_titles:
+                continue
+            seen_titles.add(title)
+            due = term_start + timedelta(
+                days=rng.randint(7, 105), hours=rng.choice([9, 12, 17, 23]), minutes=rng.choice([0, 0, 30, 59])
+            )
+            item: Dict[str, object] = {
+                "course": course,
+                "assignment_title": title,
+                "due_datetime_iso": due.replace(microsecond=0).isoformat(),
+                "deliverables": rng.choice(DELIVERABLE_TEMPLATES),
+                "points_or_weight": rng.choice(WEIGHTS),
+                "released": (due - timedelta(days=14)).strftime("%B %d, %Y"),
+            }
+            item_lines, evidence = _render_item(rng, style, number, item, _format_due(rng, due, term_start), bullet)
+            lines += item_lines
+            if style == "numbered":
+                lines.append("")
+            item.pop("released")
+            item.update(source_doc="synth", evidence_spans=[evidence.strip()], confidence=0.9)
+            records.append(item)
+        if rng.random() < 0.6:
+            lines.append(rng.choice(POLICIES))
+        lines.append("")
+    lines += ["Policies:"] + [f"{rng.choice(BULLETS)} {policy}" for policy in rng.sample(POLICIES, 2)]
+    return {"input_text": "\n".join(lines) + "\n", "target_json": json.dumps(records)}
+
+
+def write_shard(
+    kind: str, seed: int, shard: int, start: int, stop: int, path: Path, corpus: Optional[Path]
+) -> Tuple[Path, int]:
+    """Generate samples ``start..stop`` and stream them to ``path`` (and ``corpus``)."""
+    rng = random.Random(shard_seed(seed, shard))
+    corpus_dir = corpus / f"shard-{shard:05d}" if corpus else None
+    if corpus_dir:
+        corpus_dir.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        for idx in range(start, stop):
+            row = make_snippet(rng, idx) if kind == "snippet" else make_syllabus(rng)
             handle.write(json.dumps(row) + "\n")
-    print(f"Wrote {len(records)} synthetic samples to {out_path}")
+            if corpus_dir:
+                (corpus_dir / f"synth-{idx:08d}.txt").write_text(row["input_text"], encoding="utf-8")
+    return path, stop - start
+
+
+def shard_paths(out: Path, shards: int) -> List[Path]:
+    if shards == 1:
+        return [out]
+    return [out.with_name(f"{out.stem}-{shard:05d}{out.suffix}") for shard in range(shards)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--kind", choices=["snippet", "syllabus"], default="snippet")
+    parser.add_argument("--count", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=1337)
+    parser.add_argument("--out", type=Path, default=Path("training/data/synth.jsonl"))
+    parser.add_argument("--shard-size", type=int, default=None, help="Samples per output shard (default: one file).")
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating shards.")
+    parser.add_argument("--corpus", type=Path, default=None, help="Also write every sample as a .txt source file.")
+    args = parser.parse_args()
+
+    shard_size = max(1, args.shard_size or args.count)
+    shards = max(1, -(-args.count // shard_size))
+    paths = shard_paths(args.out, shards)
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    jobs = [
+        (args.kind, args.seed, shard, shard * shard_size, min(args.count, (shard + 1) * shard_size), paths[shard], args.corpus)
+        for shard in range(shards)
+    ]
+    started = time.perf_counter()
+    if args.workers > 1 and shards > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            written = sum(rows for _, rows in pool.map(write_shard, *zip(*jobs)))
+    else:
+        written = sum(write_shard(*job)[1] for job in jobs)
+    elapsed = time.perf_counter() - started
+    target = args.out if shards == 1 else f"{shards} shards next to {args.out}"
+    print(f"Wrote {written} synthetic {args.kind} samples to {target} in {elapsed:.1f}s ({written / elapsed:.0f}/s)")
 
 
 if __name__ == "__main__":